@@ -1,5 +1,6 @@
 import streamlit as st
 import os
+from utils.data_frames import data_frames
 
 def navbar() -> None:
     """Função para renderizar a barra de navegação"""
@@ -28,6 +29,13 @@ def carregando_estilos() -> None:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
 
+def aquecendo_dados() -> None:
+    """Função para carregar em segundo plano as tabelas usadas pelas páginas de análise"""
+
+    # Não bloqueia a renderização: cada tabela é lida uma única vez por processo
+    data_frames.aquecer(["results", "sprint_results", "races", "drivers", "constructors", "status"])
+
+
 def config() -> None:
     """Função para configurar o Streamlit"""
 
@@ -41,5 +49,6 @@ def config() -> None:
 
 # Executando as funções
 config()
+aquecendo_dados()
 carregando_estilos()
 navbar()  
\ No newline at end of file
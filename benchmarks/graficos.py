@@ -0,0 +1,58 @@
+import sys
+import time
+import pandas as pd
+from utils.graficos import GANHO_NAO_TERMINOU, POSICAO_NAO_TERMINOU, colunas_grafico
+from utils.prepracao_dados import tabela_corridas
+
+
+# ------------------------------
+# Versão antiga (apply linha a linha)
+# ------------------------------
+def colunas_com_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """Função com as colunas auxiliares calculadas linha a linha, como antes da vetorização"""
+    df = df.copy()
+    df["posicao_plot"] = df["posicao_final"].fillna(POSICAO_NAO_TERMINOU)
+    df["status_corrida"] = df["posicao_final"].apply(lambda x: "Desqualificado" if pd.isna(x) else "Terminou")
+    df["ganho_plot"] = df.apply(
+        lambda row: row["ganho_posicao"] if row["status_corrida"] == "Terminou" else GANHO_NAO_TERMINOU,
+        axis=1
+    )
+    return df
+
+
+# ------------------------------
+# Conferência e tempos
+# ------------------------------
+def conferir(df: pd.DataFrame) -> None:
+    """Função para garantir que a versão vetorizada devolve os mesmos valores da versão com apply"""
+    # Só o tipo muda: o apply devolve int64 e a versão vetorizada mantém o Int8 do ganho_posicao
+    pd.testing.assert_frame_equal(colunas_grafico(df), colunas_com_apply(df), check_dtype=False)
+
+
+def comparar(df: pd.DataFrame, repeticoes: int = 3) -> dict:
+    """Função para medir o tempo (melhor de N) das duas versões sobre o mesmo DataFrame"""
+    tempos = {}
+    for nome, func in (("apply", colunas_com_apply), ("vetorizado", colunas_grafico)):
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            func(df)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[nome] = melhor
+
+    return tempos
+
+
+if __name__ == "__main__":
+    # Uso: python -m benchmarks.graficos [piloto]  (sem piloto: todos os pilotos de uma vez)
+    df = tabela_corridas()
+    if len(sys.argv) > 1:
+        df = df[df["nome_completo"] == " ".join(sys.argv[1:])]
+
+    conferir(df)
+    print(f"{len(df)} linhas: versões iguais")
+
+    tempos = comparar(df)
+    for nome, tempo in tempos.items():
+        print(f"{nome:>10}: {tempo * 1000:.2f}ms")
+    print(f"{'ganho':>10}: {tempos['apply'] / tempos['vetorizado']:.1f}x")
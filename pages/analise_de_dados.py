@@ -6,21 +6,48 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import plotly.express as px
 import plotly.graph_objects as go
-from scipy.stats import gaussian_kde
 from plotly.subplots import make_subplots
 from scipy import stats
 # Importando funções auxiliares
 from utils.get_info import *
 from utils.prepracao_dados import *
+from utils.estatisticas import densidade_posicoes, intervalo_confianca, teste_welch
+from utils.graficos import figura_em_cache
+from utils.materializacao import versao_materializada
+from utils.paginacao import tabela_paginada
 
 # ------------------------------
 # Variáveis Globais
 # ------------------------------
-DATA_FRAME = {}
 PILOTO = "Lewis Hamilton"
 REGULAMENTOS = [2014, 2022]
 
 
+# ------------------------------
+# Seções (dados declarados e carregados só quando a seção é aberta)
+# ------------------------------
+# DataFrames que as seções podem pedir, pelo nome do parâmetro
+FONTES_DADOS = {
+    'df_dados_corridas': merge_tabelas,
+    'df_dados_LH': df_especifico,
+}
+
+
+def secao(*dependencias: str):
+    """Decorador para declarar de quais DataFrames uma seção depende"""
+    def decorador(func):
+        func.dependencias = dependencias
+        return func
+
+    return decorador
+
+
+def renderizar_secao(func) -> None:
+    """Carrega apenas os dados que a seção declarou e renderiza a seção"""
+    dados = {nome: FONTES_DADOS[nome]() for nome in getattr(func, 'dependencias', ())}
+    func(**dados)
+
+
 # ------------------------------
 # Função Utilitária
 # ------------------------------
@@ -31,69 +58,27 @@ def get_rgba(color_name, alpha=0.2):
 
 
 def get_mapa_cores(df):
-    # Garantir que "cores" vire tupla (para ser hashable)
-    df_tmp = df.copy()
-    df_tmp["cores"] = df_tmp["cores"].apply(
-        lambda x: tuple(x) if isinstance(x, list) else (x,)
-    )
+    # Cores vêm da paleta (uma linha por equipe), sem percorrer as linhas do DataFrame
+    equipes = df[["constructorId", "nome_equipe"]].drop_duplicates("nome_equipe")
+    df_cores = juntar_cores(equipes).set_index("nome_equipe")
 
     # Criar dicionários
-    mapa_barras = (
-        df_tmp[["nome_equipe", "cores"]]
-        .drop_duplicates()
-        .set_index("nome_equipe")["cores"]
-        .apply(lambda x: x[0] if len(x) > 0 else "#808080")
-        .to_dict()
-    )
-
-    mapa_linhas = (
-        df_tmp[["nome_equipe", "cores"]]
-        .drop_duplicates()
-        .set_index("nome_equipe")["cores"]
-        .apply(lambda x: x[1] if len(x) > 1 else "#000000")
-        .to_dict()
-    )
+    mapa_barras = df_cores["cor_primaria"].astype(str).to_dict()
+    mapa_linhas = df_cores["cor_secundaria"].astype(str).to_dict()
 
     return mapa_barras, mapa_linhas
 
 
-def filtrar_periodo_companheiro(df_ham, df_companheiro, nome_companheiro):
-    # filtra apenas o companheiro na Mercedes
-    df_temp = df_companheiro[
-        (df_companheiro['nome_completo'] == nome_companheiro) 
-        & (df_companheiro['nome_equipe'] == 'Mercedes')
-    ]
-    
-    # anos em que esse companheiro REALMENTE estava na Mercedes
-    anos_comuns = df_temp['ano'].unique()
-    
-    # Hamilton apenas nesses anos
-    df_ham_filtrado = df_ham[
-        (df_ham['ano'].isin(anos_comuns)) 
-        & (df_ham['nome_equipe'] == 'Mercedes')
-    ]
-    
-    return df_ham_filtrado, df_temp
+def dados_piloto(driver_id: int) -> pd.DataFrame:
+    """Linhas do piloto na junção das corridas (mesmo recorte do DataFrame do Hamilton)"""
+    df = merge_tabelas()
+    return df[df["driverId"] == driver_id]
 
 
-def filtrar_periodo_russell(df_ham, df_companheiro):
-    """
-    Retorna apenas os anos em que Hamilton e Russell foram companheiros na Mercedes (2022 em diante).
-    """
-    df_russell = df_companheiro[
-        (df_companheiro['nome_completo'] == 'George Russell')
-        & (df_companheiro['nome_equipe'] == 'Mercedes')
-        & (df_companheiro['ano'] >= 2022)  # Russell só entrou em 2022
-    ]
-    
-    anos_validos = df_russell['ano'].unique()
-    
-    df_ham_filtrado = df_ham[
-        (df_ham['ano'].isin(anos_validos))
-        & (df_ham['nome_equipe'] == 'Mercedes')
-    ]
-    
-    return df_ham_filtrado, df_russell
+def dados_confronto(driver_id: int, equipe: str, nome_companheiro: str):
+    """Corridas em comum do piloto com um companheiro na equipe"""
+    df_pares = companheiros_de(driver_id)
+    return confronto(df_pares[df_pares["nome_equipe"] == equipe], nome_companheiro)
 
 
 def analise_intervalo_confianca(df_ham, df_comp):
@@ -110,27 +95,16 @@ def analise_intervalo_confianca(df_ham, df_comp):
             "t_stat": np.nan, "p_val": np.nan
         }
     
-    # Médias
-    media_ham = ham_positions.mean()
-    media_tm = comp_positions.mean()
-
-    # IC 95% Hamilton
-    sem_ham = stats.sem(ham_positions)
-    ic_ham = stats.t.interval(0.95, len(ham_positions)-1, loc=media_ham, scale=sem_ham)
+    # Momentos de cada piloto (as mesmas contas do motor em lote de utils.estatisticas)
+    n_ham, media_ham, var_ham = len(ham_positions), ham_positions.mean(), ham_positions.var()
+    n_tm, media_tm, var_tm = len(comp_positions), comp_positions.mean(), comp_positions.var()
 
-    # IC 95% Companheiro
-    sem_tm = stats.sem(comp_positions)
-    ic_tm = stats.t.interval(0.95, len(comp_positions)-1, loc=media_tm, scale=sem_tm)
+    # IC 95% Hamilton e Companheiro
+    ic_ham = tuple(float(x) for x in intervalo_confianca(n_ham, media_ham, var_ham))
+    ic_tm = tuple(float(x) for x in intervalo_confianca(n_tm, media_tm, var_tm))
 
     # Teste t unilateral: Hamilton < Companheiro (melhor posição = menor número)
-    if ham_positions.std() == 0 and comp_positions.std() == 0:
-        t_stat, p_val = np.nan, np.nan
-    else:
-        try:
-            t_stat, p_val = stats.ttest_ind(ham_positions, comp_positions, 
-                                          equal_var=False, alternative='less')
-        except:
-            t_stat, p_val = np.nan, np.nan
+    t_stat, p_val = (float(x) for x in teste_welch(n_ham, media_ham, var_ham, n_tm, media_tm, var_tm))
 
     return {
         "media_ham": media_ham, "ic_ham": ic_ham,
@@ -141,28 +115,29 @@ def analise_intervalo_confianca(df_ham, df_comp):
 # ===============================
 # Gráficos
 # ===============================
-def grafico_densidade_interativo(df):
-    import plotly.graph_objects as go
-    import numpy as np
-    from scipy.stats import gaussian_kde
-    import streamlit as st
+@figura_em_cache(*tabela_corridas.tabelas)
+def grafico_densidade_interativo(driver_id: int):
+    df = dados_piloto(driver_id)
+
+    # Cor principal de cada equipe, vinda da paleta
+    mapa_barras, _ = get_mapa_cores(df)
 
-    # Se "cores" for lista, pega a primeira cor
-    df = df.copy()
-    df["cores"] = df["cores"].apply(lambda x: x[0] if isinstance(x, list) else x)
+    # Densidade de todas as equipes em uma grade comum (cacheada por piloto e conjunto de equipes)
+    equipes = tuple(sorted(df["nome_equipe"].dropna().unique()))
+    densidades = densidade_posicoes(df["driverId"].iloc[0], equipes)
+    medias = df.groupby("nome_equipe", observed=True)["posicao_final"].mean()
 
     fig = go.Figure()
 
-    for equipe, grupo in df.groupby("nome_equipe"):
-        valores = grupo["posicao_final"].dropna()
-        if len(valores) == 0:
+    for equipe in densidades.columns:
+        curva = densidades[equipe].dropna()
+        if curva.empty:
             continue
 
-        x_vals = np.linspace(valores.min(), valores.max(), 200)
-        kde = gaussian_kde(valores)
-        densidade = kde(x_vals)
+        x_vals = curva.index.to_numpy()
+        densidade = curva.to_numpy()
 
-        cor = grupo["cores"].iloc[0]
+        cor = mapa_barras.get(equipe, "#808080")
 
         # =======================
         # Curva de densidade
@@ -178,8 +153,7 @@ def grafico_densidade_interativo(df):
         # =======================
         # Estatísticas
         # =======================
-        media = valores.mean()
-        mediana = np.median(valores)
+        media = medias[equipe]
         moda_idx = np.argmax(densidade)  # índice do pico da curva
         moda = x_vals[moda_idx]
 
@@ -216,14 +190,25 @@ def grafico_densidade_interativo(df):
         )
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+@figura_em_cache(*tabela_corridas.tabelas)
+def medidas_centrais_grafico(driver_id: int) -> go.Figure:
+    df_piloto = dados_piloto(driver_id)
 
+    resumo_hamilton = df_piloto.groupby(["ano", "nome_equipe"], observed=True).agg(
+        mean=("posicao_final", "mean"),
+        median=("posicao_final", "median"),
+        std=("posicao_final", "std"),
+        var=("posicao_final", "var"),
+        moda=("posicao_final", lambda x: x.mode().iloc[0] if not x.mode().empty else None),
+    ).reset_index()
 
-def medidas_centrais_grafico(resumo_hamilton: pd.DataFrame) -> None:
     fig = go.Figure()
 
     # Reusar os mapas de cor
-    mapa_barras, mapa_linhas = get_mapa_cores(DATA_FRAME['df_dados_LH'])
+    mapa_barras, mapa_linhas = get_mapa_cores(df_piloto)
 
     for equipe in resumo_hamilton["nome_equipe"].unique():
         df_equipe = resumo_hamilton[resumo_hamilton["nome_equipe"] == equipe]
@@ -300,10 +285,13 @@ def medidas_centrais_grafico(resumo_hamilton: pd.DataFrame) -> None:
         )
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
 
+@figura_em_cache(*tabela_corridas.tabelas)
+def grafico_boxplot(driver_id, equipe, teammate_name, teammate_color="blue"):
+    df_hamilton, df_teammate = dados_confronto(driver_id, equipe, teammate_name)
 
-def grafico_boxplot(df_hamilton, df_teammate, teammate_name, teammate_color="blue"):
     fig = go.Figure()
     fig.add_trace(go.Box(
         y=df_hamilton["posicao_final"], 
@@ -318,11 +306,14 @@ def grafico_boxplot(df_hamilton, df_teammate, teammate_name, teammate_color="blu
         title=f"Distribuição das Posições: Hamilton vs {teammate_name}",
         height=400
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def grafico_comparacao_com_ic(df_ham, df_comp, nome_companheiro):
+@figura_em_cache(*tabela_corridas.tabelas)
+def grafico_comparacao_com_ic(driver_id, equipe, nome_companheiro):
     """Cria gráfico de linha com intervalos de confiança"""
+    df_ham, df_comp = dados_confronto(driver_id, equipe, nome_companheiro)
+
     # Agrupar por ano e calcular média e IC
     ham_por_ano = df_ham.groupby('ano')['posicao_final'].agg(['mean', 'count', 'std']).reset_index()
     comp_por_ano = df_comp.groupby('ano')['posicao_final'].agg(['mean', 'count', 'std']).reset_index()
@@ -495,7 +486,8 @@ def dados_conteudo() -> None:
 # ------------------------------
 # Preparação de Dados
 # ------------------------------
-def preparacao_conteudo() -> None:
+@secao('df_dados_corridas', 'df_dados_LH')
+def preparacao_conteudo(df_dados_corridas: pd.DataFrame, df_dados_LH: pd.DataFrame) -> None:
     """Função para renderizar o conteúdo da página de Tratamento de Dados"""
     st.markdown(
         """
@@ -555,7 +547,7 @@ def preparacao_conteudo() -> None:
     if df_exibir:  
         st.subheader(f"📊 {df_exibir}")
         df = func_get_dataframe[df_exibir]()  # executa a função que retorna o dataframe
-        st.dataframe(df)
+        tabela_paginada(df, chave=f"bruta_{df_exibir}")
 
     st.markdown(
         """
@@ -589,8 +581,6 @@ def preparacao_conteudo() -> None:
 
     col1, col2 = st.columns(2)
 
-    DATA_FRAME['df_dados_corridas'] = merge_tabelas()
-    DATA_FRAME['df_dados_LH'] = df_especifico()
     
 
     with col1:
@@ -600,7 +590,7 @@ def preparacao_conteudo() -> None:
             </div>
         """, unsafe_allow_html=True)
 
-        st.dataframe(DATA_FRAME['df_dados_corridas'])
+        tabela_paginada(df_dados_corridas, chave="corridas", versao=versao_materializada('corridas'))
 
     with col2:
         st.markdown("""
@@ -609,7 +599,7 @@ def preparacao_conteudo() -> None:
             </div>
         """, unsafe_allow_html=True)
 
-        st.dataframe(DATA_FRAME['df_dados_LH'])
+        tabela_paginada(df_dados_LH, chave="corridas_LH", versao=versao_materializada('corridas'))
 
     st.markdown(
         """
@@ -653,7 +643,7 @@ def preparacao_conteudo() -> None:
             </div>
         """, unsafe_allow_html=True)
 
-        st.dataframe(DATA_FRAME['df_dados_corridas'].isnull().sum().reset_index().rename(columns={"index": "Coluna", 0: "Nulos"}))
+        st.dataframe(df_dados_corridas.isnull().sum().reset_index().rename(columns={"index": "Coluna", 0: "Nulos"}))
     
     with col4:
         st.markdown("""
@@ -662,7 +652,7 @@ def preparacao_conteudo() -> None:
             </div>
         """, unsafe_allow_html=True)
 
-        st.dataframe(DATA_FRAME['df_dados_LH'].isnull().sum().reset_index().rename(columns={"index": "Coluna", 0: "Nulos"}))
+        st.dataframe(df_dados_LH.isnull().sum().reset_index().rename(columns={"index": "Coluna", 0: "Nulos"}))
 
     st.markdown(
         """
@@ -702,13 +692,8 @@ def preparacao_conteudo() -> None:
 
 
     # ------ Duplicatas ------
-    cols_hashable = [
-        col for col in DATA_FRAME['df_dados_corridas'].columns
-        if pd.api.types.is_hashable(DATA_FRAME['df_dados_corridas'][col].dropna().iloc[0])
-    ]
-
-    duplicatas_corridas = DATA_FRAME['df_dados_corridas'].duplicated(subset=cols_hashable).sum()
-    duplicatas_lh = DATA_FRAME['df_dados_LH'].duplicated(subset=cols_hashable).sum()
+    duplicatas_corridas = df_dados_corridas.duplicated().sum()
+    duplicatas_lh = df_dados_LH.duplicated().sum()
 
     col5, col6 = st.columns(2)
 
@@ -795,7 +780,6 @@ def classificacao_conteudo() -> None:
         ("name_circuit", "Qualitativa Nominal", "Nome do circuito (ex: Monza, Interlagos). Categoria descritiva."),
         ("status_race", "Qualitativa Nominal", "Situação final (Finished, DNF, Accident). Categorias distintas, sem ordem."),
         ("tipo_corrida", "Qualitativa Nominal", "Tipo da corrida (Sprint ou Principal). Classificação binária sem hierarquia."),
-        ("cores", "Qualitativa Nominal", "Cor associada à equipe. Apenas descritivo, sem significado numérico."),
 
         # Variáveis Quantitativas Discretas 
         ("posicao_grid", "Quantitativa Discreta", "Posição de largada, número inteiro. Usado em cálculos como ganho de posição."),
@@ -847,7 +831,8 @@ def classificacao_conteudo() -> None:
 # ------------------------------
 # Análise dos Dados
 # ------------------------------
-def analise_conteudo() -> None:
+@secao('df_dados_LH')
+def analise_conteudo(df_dados_LH: pd.DataFrame) -> None:
     """Função para renderizar a análise exploratória"""
     st.markdown(
         """
@@ -886,7 +871,8 @@ def analise_conteudo() -> None:
         """, unsafe_allow_html=True
     )
 
-    df_piloto = DATA_FRAME['df_dados_LH']
+    df_piloto = df_dados_LH
+    piloto_id = int(df_piloto["driverId"].iloc[0])
 
     # Layout com duas colunas principais
     imagemCol, metricasCol = st.columns([0.4, 0.6], vertical_alignment="center")
@@ -896,18 +882,16 @@ def analise_conteudo() -> None:
 
     with metricasCol:
 
-        resumo_ano = df_piloto.groupby("ano").agg(
-            vitorias=("vitorias", "sum"),
-            poles=("pole_position", "sum"),
-            podios=("podios", "sum"),
-        ).reset_index().sort_values("ano")
+        # Totais da carreira vêm da tabela de resumo materializada (consulta por driverId)
+        resumo = resumo_carreiras().set_index("driverId").loc[df_piloto["driverId"].iloc[0]]
 
-        total_temporadas = resumo_ano["ano"].nunique()
-        total_vitorias = int(resumo_ano["vitorias"].sum())
-        total_poles = int(resumo_ano["poles"].sum())
-        total_podios = int(resumo_ano["podios"].sum())
+        # O texto da análise soma corridas e sprints (como a tabela do Hamilton): mantém a mesma conta
+        total_temporadas = int(resumo["temporadas"])
+        total_vitorias = int(resumo["vitorias"] + resumo["vitorias_sprint"])
+        total_poles = int(resumo["poles"] + resumo["poles_sprint"])
+        total_podios = int(resumo["podios"] + resumo["podios_sprint"])
         total_titulos = 7
-        total_corridas_terminadas = DATA_FRAME['df_dados_LH'][DATA_FRAME['df_dados_LH']["posicao_final"].notnull()].shape[0]
+        total_corridas_terminadas = int(resumo["corridas_terminadas"] + resumo["sprints_terminadas"])
 
         # Organizar métricas em 2 linhas de 2 colunas
         col1, col2 = st.columns(2)
@@ -967,13 +951,6 @@ def analise_conteudo() -> None:
     )
 
 
-    resumo_hamilton = DATA_FRAME['df_dados_LH'].groupby(["ano", "nome_equipe"]).agg(
-        mean=("posicao_final", "mean"),
-        median=("posicao_final", "median"),
-        std=("posicao_final", "std"),
-        var=("posicao_final", "var"),
-        moda=("posicao_final", lambda x: x.mode().iloc[0] if not x.mode().empty else None),
-    ).reset_index()
 
     col1, col2 = st.columns([0.4,0.6], vertical_alignment='center')
 
@@ -1005,7 +982,7 @@ def analise_conteudo() -> None:
 
 
     with col2:
-        medidas_centrais_grafico(resumo_hamilton)
+        st.plotly_chart(medidas_centrais_grafico(piloto_id), use_container_width=True)
 
     st.markdown(
         """
@@ -1043,7 +1020,7 @@ def analise_conteudo() -> None:
     )
 
 
-    grafico_densidade_interativo(DATA_FRAME['df_dados_LH'])
+    st.plotly_chart(grafico_densidade_interativo(piloto_id), use_container_width=True)
 
     st.markdown(
         """
@@ -1080,13 +1057,12 @@ def analise_conteudo() -> None:
 
     # ------- Comparação -------
 
-    df_companheiro = DATA_FRAME['df_dados_corridas'].copy()
-    df_companheiro = df_companheiro[df_companheiro['nome_equipe'] == 'Mercedes']
-    df_companheiro = df_companheiro[df_companheiro['ano'] >= 2013]
-    df_companheiro = df_companheiro[df_companheiro['code'] != 'HAM'] 
-    df_companheiro['vitorias'] = df_companheiro['posicao_final'] == 1
+    # Pares Hamilton x companheiro na Mercedes (corridas em que os dois correram juntos)
+    equipe = 'Mercedes'
+    df_pares = companheiros_de(piloto_id)
+    df_pares = df_pares[df_pares['nome_equipe'] == equipe]
 
-    lista_companheiros = df_companheiro['nome_completo'].unique()
+    lista_companheiros = df_pares['nome_completo_companheiro'].unique()
 
     st.markdown(
         """
@@ -1120,11 +1096,12 @@ def analise_conteudo() -> None:
         unsafe_allow_html=True
     )
 
-    companheiro = st.selectbox("Selecione o Companheiro: ", lista_companheiros)
+    # Guarda a escolha na sessão: com as abas sob demanda o widget some ao trocar de aba
+    escolhido = st.session_state.get("companheiro_escolhido")
+    indice = list(lista_companheiros).index(escolhido) if escolhido in lista_companheiros else 0
 
-    # Hamilton (filtrado só Mercedes)
-    df_ham = DATA_FRAME['df_dados_LH'].copy()
-    df_ham = df_ham[df_ham['nome_equipe'] == 'Mercedes']
+    companheiro = st.selectbox("Selecione o Companheiro: ", lista_companheiros, index=indice)
+    st.session_state["companheiro_escolhido"] = companheiro
 
     # Na seção de comparação com companheiros, substitua a parte do teste por:
     if companheiro == 'Nico Rosberg':
@@ -1132,8 +1109,8 @@ def analise_conteudo() -> None:
         boxCol, textCol = st.columns(2, vertical_alignment='center')
 
         with boxCol:
-            df_ham_filtrado, df_rosberg = filtrar_periodo_companheiro(df_ham, df_companheiro, "Nico Rosberg")
-            grafico_boxplot(df_ham_filtrado, df_rosberg, "Nico Rosberg", teammate_color="#00D2BE")
+            df_ham_filtrado, df_rosberg = confronto(df_pares, "Nico Rosberg")
+            st.plotly_chart(grafico_boxplot(piloto_id, equipe, "Nico Rosberg", teammate_color="#00D2BE"), use_container_width=True)
         
         with textCol:
             st.markdown(
@@ -1197,7 +1174,7 @@ def analise_conteudo() -> None:
         
         with icCol:
             # Gráfico de linha com IC
-            fig_line_ic = grafico_comparacao_com_ic(df_ham_filtrado, df_rosberg, "Nico Rosberg")
+            fig_line_ic = grafico_comparacao_com_ic(piloto_id, equipe, "Nico Rosberg")
             st.plotly_chart(fig_line_ic, use_container_width=True)
         
         testHipCol, textTestCol = st.columns([0.48,0.52], vertical_alignment='top')
@@ -1289,8 +1266,8 @@ def analise_conteudo() -> None:
         boxCol, textCol = st.columns(2, vertical_alignment='center')
         
         with boxCol:          
-            df_ham_filtrado, df_bottas = filtrar_periodo_companheiro(df_ham, df_companheiro, "Valtteri Bottas")
-            grafico_boxplot(df_ham_filtrado, df_bottas, "Valtteri Bottas", teammate_color="#00D2BE")
+            df_ham_filtrado, df_bottas = confronto(df_pares, "Valtteri Bottas")
+            st.plotly_chart(grafico_boxplot(piloto_id, equipe, "Valtteri Bottas", teammate_color="#00D2BE"), use_container_width=True)
         
         with textCol:
             st.markdown(
@@ -1355,7 +1332,7 @@ def analise_conteudo() -> None:
 
         with icCol:
             # Gráfico de linha com IC
-            fig_line_ic = grafico_comparacao_com_ic(df_ham_filtrado, df_bottas, "Valtteri Bottas")
+            fig_line_ic = grafico_comparacao_com_ic(piloto_id, equipe, "Valtteri Bottas")
             st.plotly_chart(fig_line_ic, use_container_width=True)
         
         testHipCol, textTestCol = st.columns([0.48,0.52], vertical_alignment='top')
@@ -1442,8 +1419,8 @@ def analise_conteudo() -> None:
         boxCol, textCol = st.columns(2, vertical_alignment='center')
 
         with boxCol:          
-            df_ham_filtrado, df_russell = filtrar_periodo_russell(df_ham, df_companheiro)
-            grafico_boxplot(df_ham_filtrado, df_russell, "George Russell", teammate_color="#6CD3BF")
+            df_ham_filtrado, df_russell = confronto(df_pares, "George Russell")
+            st.plotly_chart(grafico_boxplot(piloto_id, equipe, "George Russell", teammate_color="#6CD3BF"), use_container_width=True)
 
         with textCol:
             st.markdown(
@@ -1493,7 +1470,7 @@ def analise_conteudo() -> None:
             )
 
         with icCol:
-            fig_line_ic = grafico_comparacao_com_ic(df_ham_filtrado, df_russell, "George Russell")
+            fig_line_ic = grafico_comparacao_com_ic(piloto_id, equipe, "George Russell")
             st.plotly_chart(fig_line_ic, use_container_width=True)
 
         testHipCol, textTestCol = st.columns([0.48,0.52], vertical_alignment='top')
@@ -1603,6 +1580,7 @@ def conclusao_conteudo() -> None:
             </div>
         """, unsafe_allow_html=True
     )
+    st.warning("Novas análises estão sendo preparadas... 🔎🛠️")
 
 
 # ------------------------------
@@ -1619,31 +1597,26 @@ def conteudo() -> None:
         unsafe_allow_html=True,
     )
     
-    contextTab, dadosTab, prepTab, classificacaoTab, analiseTab, conclusaoTab = st.tabs(
-        [
-            ":material/contextual_token: Contexto",
-            ":material/table: Dados Disponíveis",
-            ":material/healing: Preparação",
-            ":material/search_insights: Classificação de Variáveis",
-            ":material/analytics: Análise",
-            ":material/pin_end: Conclusão"
-        ]
-    )
-    
-    with contextTab:
-        contexto_conteudo()
-    with dadosTab:
-        dados_conteudo()
-    with prepTab:
-        preparacao_conteudo()
-    with classificacaoTab:
-        classificacao_conteudo()
-    with analiseTab:
-        analise_conteudo()
-    with conclusaoTab:
-        conclusao_conteudo()
-        st.warning("Novas análises estão sendo preparadas... 🔎🛠️")
+    secoes = {
+        ":material/contextual_token: Contexto": contexto_conteudo,
+        ":material/table: Dados Disponíveis": dados_conteudo,
+        ":material/healing: Preparação": preparacao_conteudo,
+        ":material/search_insights: Classificação de Variáveis": classificacao_conteudo,
+        ":material/analytics: Análise": analise_conteudo,
+        ":material/pin_end: Conclusão": conclusao_conteudo,
+    }
 
+    # Com on_change="rerun" só a aba aberta é executada (as outras nem carregam seus dados)
+    try:
+        abas = st.tabs(list(secoes), key="secao_analise", on_change="rerun")
+    except TypeError:
+        # Streamlit sem abas com estado (sem key/on_change): todas as abas são renderizadas
+        abas = st.tabs(list(secoes))
+
+    for aba, renderizar in zip(abas, secoes.values()):
+        if getattr(aba, "open", True):
+            with aba:
+                renderizar_secao(renderizar)
 
 
 conteudo()
@@ -3,13 +3,360 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 # Importando funções auxiliares
 from utils.dashboard_utils import *
+from utils.elo import ELO_INICIAL, tabela_elo, trajetoria_elo
+from utils.graficos import colunas_grafico, figura_em_cache, posicao_histograma
+from utils.paginacao import tabela_paginada
+from utils.pontuacao import SISTEMAS_PONTOS, classificacao_alternativa, comparar_campeoes
+from utils.simulacao import simular_temporada
+from utils.stints import stints_piloto, tabela_perdas_pit, tabela_stints, voltas_stints
 
 # ------------------------------
-# Variáveis Globais
+# Figuras (em cache por seleção e versão dos dados)
 # ------------------------------
-DATA_FRAME = {}
+def dados_piloto_ano(piloto: str, ano: int) -> pd.DataFrame:
+    """Função para conseguir as linhas do piloto no ano com as colunas auxiliares dos gráficos"""
+    return colunas_grafico(indice_pilotos().piloto_ano(piloto, ano))
+
+
+@figura_em_cache(*tabela_corridas.tabelas)
+def figura_posicoes(piloto: str, ano: int) -> go.Figure:
+    """Função para montar o gráfico de posições finais do piloto no ano"""
+    df_filtrado = dados_piloto_ano(piloto, ano)
+
+    fig1 = px.line(
+        df_filtrado,
+        x="rodada",
+        y="posicao_plot",
+        markers=True,
+        title=f"📈 Posições Finais de {piloto} em {ano}",
+        labels={"rodada": "Corrida", "posicao_plot": "Posição Final"},
+    )
+    fig1.update_yaxes(autorange="reversed")
+
+    # Marcar os desqualificados em vermelho
+    df_desq = df_filtrado[df_filtrado["status_corrida"] == "Desqualificado"]
+    if not df_desq.empty:
+        fig1.add_scatter(
+            x=df_desq["rodada"],
+            y=df_desq["posicao_plot"],
+            mode="markers",
+            marker=dict(color="red", size=12, symbol="x"),
+            name="Desqualificado",
+        )
+
+    return fig1
+
+
+@figura_em_cache(*tabela_corridas.tabelas)
+def figura_ganhos(piloto: str, ano: int) -> go.Figure:
+    """Função para montar o gráfico de ganho de posições do piloto no ano"""
+    fig2 = px.bar(
+        dados_piloto_ano(piloto, ano),
+        x="rodada",
+        y="ganho_plot",
+        title=f"📊 Ganho de Posições de {piloto} em {ano}",
+        labels={"rodada": "Corrida", "ganho_plot": "Posições Ganhadas"},
+        color="status_corrida",
+        color_discrete_map={"Terminou": "green", "Desqualificado": "red"},
+    )
+
+    # Deixar os DSQ bem destacados
+    fig2.update_traces(marker_line_width=1.5, marker_line_color="black")
+
+    # Linha de referência no 0
+    fig2.add_hline(y=0, line_dash="dash", line_color="black")
+
+    return fig2
+
+
+@figura_em_cache(*tabela_corridas.tabelas)
+def figura_distribuicao(piloto: str, ano: int) -> go.Figure:
+    """Função para montar o histograma das posições finais do piloto no ano"""
+    df_filtrado = dados_piloto_ano(piloto, ano)
+    df_hist = df_filtrado.assign(posicao_final_hist=posicao_histograma(df_filtrado["posicao_final"]))
+
+    return px.histogram(
+        df_hist,
+        x="posicao_final_hist",
+        nbins=10,
+        title=f"📊 Distribuição das Posições Finais ({ano})",
+        labels={"posicao_final_hist": "Posição Final"},
+        color_discrete_sequence=[get_cor_equipe(df_filtrado['constructorId'].iloc[0])]
+    )
+
+
+@figura_em_cache(*tabela_corridas.tabelas)
+def figura_comparacao_posicoes(pilotos: tuple, anos: tuple) -> go.Figure:
+    """Função para montar o gráfico de posição média por temporada de vários pilotos"""
+    _, df_temporadas, _ = comparar_pilotos(list(pilotos), anos)
+
+    fig1 = px.line(
+        df_temporadas,
+        x="ano",
+        y="posicao_media",
+        color="nome_completo",
+        markers=True,
+        title="📈 Posição Final Média por Temporada",
+        labels={"ano": "Ano", "posicao_media": "Posição Média", "nome_completo": "Piloto"},
+    )
+    fig1.update_yaxes(autorange="reversed")
+
+    return fig1
+
+
+@figura_em_cache(*tabela_corridas.tabelas)
+def figura_comparacao_ganhos(pilotos: tuple, anos: tuple) -> go.Figure:
+    """Função para montar o gráfico de posições ganhadas por temporada de vários pilotos"""
+    _, df_temporadas, _ = comparar_pilotos(list(pilotos), anos)
+
+    fig2 = px.bar(
+        df_temporadas,
+        x="ano",
+        y="ganho_total",
+        color="nome_completo",
+        barmode="group",
+        title="📊 Posições Ganhadas por Temporada",
+        labels={"ano": "Ano", "ganho_total": "Posições Ganhadas", "nome_completo": "Piloto"},
+    )
+    fig2.add_hline(y=0, line_dash="dash", line_color="black")
+
+    return fig2
+
+
+@figura_em_cache(*tabela_corridas.tabelas)
+def figura_comparacao_distribuicao(pilotos: tuple, anos: tuple) -> go.Figure:
+    """Função para montar o boxplot das posições finais de vários pilotos"""
+    df_selecao, _, _ = comparar_pilotos(list(pilotos), anos)
+
+    fig3 = px.box(
+        df_selecao,
+        x="nome_completo",
+        y="posicao_plot",
+        color="nome_completo",
+        title="📊 Distribuição das Posições Finais",
+        labels={"nome_completo": "Piloto", "posicao_plot": "Posição Final"},
+    )
+    fig3.update_yaxes(autorange="reversed")
+    fig3.update_layout(showlegend=False)
+
+    return fig3
+
+
+@figura_em_cache(*tabela_elo.tabelas)
+def figura_elo(pilotos: tuple) -> go.Figure:
+    """Função para montar a evolução do rating Elo de um ou mais pilotos, corrida a corrida"""
+    indice = indice_pilotos()
+    ids = {indice.piloto(piloto)['driverId'].iloc[0]: piloto for piloto in pilotos}
+    df_elo = trajetoria_elo(list(ids)).assign(nome_completo=lambda df: df['driverId'].map(ids))
+
+    fig = px.line(
+        df_elo,
+        x="data_corrida",
+        y="elo",
+        color="nome_completo",
+        title="📈 Rating Elo ao Longo da Carreira",
+        labels={"data_corrida": "Data", "elo": "Rating Elo", "nome_completo": "Piloto"},
+    )
+    fig.add_hline(y=ELO_INICIAL, line_dash="dash", line_color="gray")
+
+    return fig
+
+
+@figura_em_cache(*tabela_stints.tabelas)
+def figura_stints(driver_id: int, race_id: int, titulo: str) -> go.Figure:
+    """Função para montar o gráfico das voltas de uma corrida por stint, com a reta de degradação"""
+    df_voltas = voltas_stints(driver_id, race_id).assign(segundos=lambda df: df['ms_lap_time'] / 1000)
+    df_voltas = df_voltas.assign(stint=df_voltas['stint'].astype(str))
+
+    fig = px.scatter(
+        df_voltas,
+        x="lap",
+        y="segundos",
+        color="stint",
+        symbol="volta_limpa",
+        title=f"⏱️ Voltas por Stint - {titulo}",
+        labels={"lap": "Volta", "segundos": "Tempo de Volta (s)", "stint": "Stint", "volta_limpa": "Volta limpa"},
+    )
+
+    # Reta ajustada (ms por volta) de cada stint com degradação estimada
+    for linha in stints_piloto(driver_id, race_id).dropna(subset=["degradacao_ms"]).itertuples():
+        voltas = np.array([linha.volta_inicial, linha.volta_final])
+        fig.add_scatter(
+            x=voltas,
+            y=(linha.intercepto_ms + linha.degradacao_ms * voltas) / 1000,
+            mode="lines",
+            line=dict(dash="dash", color="black"),
+            name=f"Tendência stint {linha.stint}",
+        )
+
+    return fig
+
+
+def ritmo_stints(df_filtrado: pd.DataFrame, piloto: str) -> None:
+    """Função para renderizar ritmo, degradação e perda nos boxes do piloto nas corridas do ano"""
+    df_corridas = df_filtrado[df_filtrado["tipo_corrida"] == "Corrida_Principal"]
+    if df_corridas.empty:
+        return
+
+    df_stints = stints_piloto(df_corridas["driverId"].iloc[0])
+    df_stints = df_stints[df_stints["raceId"].isin(df_corridas["raceId"])]
+    if df_stints.empty:
+        return
+
+    st.divider()
+    st.markdown("### ⏱️ Ritmo de Corrida por Stint")
+
+    nomes = df_corridas.drop_duplicates("raceId").set_index("raceId")["name_circuit"]
+    corridas = [race_id for race_id in nomes.index if race_id in set(df_stints["raceId"])]
+    race_id = st.selectbox("Selecione a corrida:", corridas, format_func=lambda race_id: nomes[race_id])
+
+    st.plotly_chart(figura_stints(int(df_stints["driverId"].iloc[0]), int(race_id), f"{piloto} em {nomes[race_id]}"), use_container_width=True)
+
+    # ===== Tabela =====
+    df_tabela = df_stints[df_stints["raceId"] == race_id].assign(
+        ritmo_medio_s=lambda df: df["ritmo_medio_ms"] / 1000,
+        degradacao_s_por_volta=lambda df: df["degradacao_ms"] / 1000,
+    )
+    st.dataframe(df_tabela[["stint", "volta_inicial", "volta_final", "voltas", "voltas_limpas", "ritmo_medio_s", "degradacao_s_por_volta"]], hide_index=True)
+
+    # ===== Tempo perdido nas paradas =====
+    df_perdas = tabela_perdas_pit()
+    df_perdas = df_perdas[(df_perdas["raceId"] == race_id) & (df_perdas["driverId"] == df_stints["driverId"].iloc[0])]
+    if not df_perdas.empty:
+        st.dataframe(
+            df_perdas.assign(perda_s=df_perdas["perda_ms"] / 1000)[["qtd_paradas", "lap", "ms_pit_stop", "perda_s"]],
+            hide_index=True,
+            column_config={"qtd_paradas": "Parada", "lap": "Volta", "ms_pit_stop": "Parado nos boxes (s)", "perda_s": "Tempo perdido (s)"},
+        )
+
+
+# ------------------------------
+# Comparação entre pilotos
+# ------------------------------
+def comparacao_pilotos(indice: IndicePilotos) -> None:
+    """Função para renderizar a comparação de vários pilotos em um intervalo de anos"""
+    pilotos = st.multiselect("Selecione os Pilotos:", indice.pilotos)
+    anos = st.slider("Intervalo de anos:", indice.ano_min, indice.ano_max, (max(indice.ano_min, indice.ano_max - 14), indice.ano_max))
+
+    if not pilotos:
+        st.warning("Selecione ao menos um piloto para comparar.")
+        return
+
+    # Uma única seleção + groupby para todos os pilotos escolhidos
+    df_selecao, df_temporadas, df_resumo = comparar_pilotos(pilotos, anos)
+
+    if df_selecao.empty:
+        st.error(f"Nenhum registro dos pilotos selecionados entre {anos[0]} e {anos[1]}.")
+        return
+
+    st.markdown(f"### 📊 Comparação de {anos[0]} a {anos[1]}")
+
+    # Figuras em cache: a mesma seleção não remonta os gráficos
+    pilotos, anos = tuple(pilotos), tuple(anos)
+
+    # ===== Gráfico 1 - Posição média por temporada =====
+    st.plotly_chart(figura_comparacao_posicoes(pilotos, anos), use_container_width=True)
+
+    col1, col2 = st.columns(2, vertical_alignment='center')
+
+    with col1:
+        # ===== Gráfico 2 - Ganho de posições por temporada =====
+        st.plotly_chart(figura_comparacao_ganhos(pilotos, anos), use_container_width=True)
+
+    with col2:
+        # ===== Gráfico 3 - Distribuição de posições finais =====
+        st.plotly_chart(figura_comparacao_distribuicao(pilotos, anos), use_container_width=True)
+
+    # ===== Gráfico 4 - Rating Elo =====
+    st.plotly_chart(figura_elo(pilotos), use_container_width=True)
+
+    # ===== Tabela =====
+    st.dataframe(df_resumo, hide_index=True)
+
+
+# ------------------------------
+# Outros sistemas de pontuação
+# ------------------------------
+def sistemas_pontuacao() -> None:
+    """Função para renderizar os campeonatos de toda a história refeitos com outro sistema de pontos"""
+    sistemaCol, voltaCol, sprintCol = st.columns([0.6, 0.2, 0.2], vertical_alignment="bottom")
+    with sistemaCol:
+        sistema = st.selectbox("Sistema de pontos:", list(SISTEMAS_PONTOS) + ["Personalizado"])
+    with voltaCol:
+        volta_rapida = st.toggle("Ponto da volta mais rápida", value=False)
+    with sprintCol:
+        sprint = st.toggle("Pontos nas sprints", value=True)
+
+    if sistema == "Personalizado":
+        texto = st.text_input("Pontos do 1º, 2º, 3º... (separados por vírgula):", "25, 18, 15, 12, 10, 8, 6, 4, 2, 1")
+        try:
+            pontos = tuple(float(p) for p in texto.split(",") if p.strip())
+        except ValueError:
+            st.error("Use apenas números separados por vírgula.")
+            return
+    else:
+        pontos = SISTEMAS_PONTOS[sistema]
+
+    # Todas as temporadas repontuadas de uma vez (o desempate já vem calculado do motor)
+    df_pilotos, df_equipes = comparar_campeoes(pontos, volta_rapida, sprint)
+
+    col1, col2 = st.columns(2)
+    col1.metric("Títulos de pilotos que mudariam", int(df_pilotos["mudou"].sum()), f"de {len(df_pilotos)} temporadas", delta_color="off")
+    col2.metric("Títulos de construtores que mudariam", int(df_equipes["mudou"].sum()), f"de {len(df_equipes)} temporadas", delta_color="off")
+
+    st.markdown("### 🏆 Campeões de Pilotos")
+    st.dataframe(df_pilotos[df_pilotos["mudou"]].drop(columns="mudou"), hide_index=True)
+    st.markdown("### 🏭 Campeões de Construtores")
+    st.dataframe(df_equipes[df_equipes["mudou"]].drop(columns="mudou"), hide_index=True)
+
+    # ===== Classificação final de uma temporada nos dois sistemas =====
+    anos = df_pilotos["ano"].tolist()
+    ano = st.selectbox("Classificação final de:", anos[::-1])
+    st.dataframe(classificacao_alternativa(ano, pontos, volta_rapida, sprint), hide_index=True)
+
+
+# ------------------------------
+# Simulação do fim de temporada
+# ------------------------------
+def simulacao_temporada(indice: IndicePilotos) -> None:
+    """Função para renderizar a chance de título de pilotos e equipes a partir de uma rodada"""
+    anoCol, rodadaCol, qtdCol = st.columns(3, vertical_alignment="bottom")
+    with anoCol:
+        ano = st.selectbox("Temporada:", list(range(indice.ano_max, indice.ano_min - 1, -1)))
+    with rodadaCol:
+        rodada = st.number_input("Depois da rodada:", min_value=1, max_value=30, value=10, step=1)
+    with qtdCol:
+        simulacoes = st.selectbox("Simulações:", [10_000, 50_000, 100_000], index=2, format_func=lambda n: f"{n:,}".replace(",", "."))
+
+    # Só roda quando pedido: cada clique distribui os lotes pelo pool de processos
+    if not st.button("🎲 Simular resto da temporada"):
+        return
+
+    with st.spinner("Simulando temporadas..."):
+        df_pilotos, df_equipes = simular_temporada(ano, int(rodada), simulacoes)
+
+    df_pilotos = df_pilotos[df_pilotos["chance_titulo"] > 0]
+    fig = px.bar(
+        df_pilotos,
+        x="nome_completo",
+        y="chance_titulo",
+        title=f"🏆 Chance de Título de Pilotos em {ano} (a partir da rodada {int(rodada)})",
+        labels={"nome_completo": "Piloto", "chance_titulo": "Chance de título"},
+    )
+    fig.update_yaxes(tickformat=".0%")
+    st.plotly_chart(fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.dataframe(df_pilotos[["nome_completo", "pontos", "pontos_medios", "chance_titulo"]], hide_index=True,
+                     column_config={"chance_titulo": st.column_config.NumberColumn(format="percent")})
+    with col2:
+        st.dataframe(df_equipes[df_equipes["chance_titulo"] > 0][["nome_equipe", "pontos", "chance_titulo"]], hide_index=True,
+                     column_config={"chance_titulo": st.column_config.NumberColumn(format="percent")})
+
 
 # ------------------------------
 # Renderizando tudo
@@ -26,19 +373,33 @@ def conteudo() -> None:
         unsafe_allow_html=True,
     )
 
-    # Carregando dados
-    df_pilotos = merge_tabelas()
-    df_pilotos = df_pilotos.dropna(subset=['code'])
-    lista_pilotos = df_pilotos['nome_completo'].unique()
+    # Carregando dados (índice piloto/ano construído uma vez por versão dos dados)
+    indice = indice_pilotos()
+    lista_pilotos = indice.pilotos
+
+    # Modo de visualização
+    modo = st.radio("Modo:", ["Piloto", "Comparar pilotos", "Sistemas de pontuação", "Simular temporada"], horizontal=True)
+
+    if modo == "Comparar pilotos":
+        comparacao_pilotos(indice)
+        return
+
+    if modo == "Sistemas de pontuação":
+        sistemas_pontuacao()
+        return
+
+    if modo == "Simular temporada":
+        simulacao_temporada(indice)
+        return
 
     # Seleção do piloto
     piloto = st.selectbox("Selecione o Piloto:", lista_pilotos)
 
     if piloto:
-        listas_anos = df_pilotos[df_pilotos['nome_completo'] == piloto]
-        ano = st.selectbox("Selecione o ano:", sorted(listas_anos['ano'].unique()))
+        df_piloto = indice.piloto(piloto)
+        ano = st.selectbox("Selecione o ano:", indice.anos(piloto))
         # Filtra apenas o ano selecionado
-        df_filtrado = listas_anos[listas_anos['ano'] == ano]
+        df_filtrado = indice.piloto_ano(piloto, ano)
 
         # Verifica quantidade de registros
         qtde = len(df_filtrado)
@@ -53,101 +414,43 @@ def conteudo() -> None:
         st.subheader(f"📌 Sobre {piloto}")
 
         st.markdown("### 🏁 Informações Rápidas")
+        resumo = resumo_piloto(df_piloto['driverId'].iloc[0])
         st.markdown(f"""
-        - **Nacionalidade:** {df_pilotos[df_pilotos['nome_completo']==piloto]['nacionalidade_piloto'].iloc[0] if 'nacionalidade_piloto' in df_pilotos.columns else '❓'}
-        - **Equipe:** {df_pilotos[df_pilotos['nome_completo']==piloto]['nome_equipe'].iloc[-1]}
-        - **Número do Carro:** {df_pilotos[df_pilotos['nome_completo']==piloto]['numero_do_piloto'].iloc[-1]}
-        - **Corridas Disputadas:** {len(df_pilotos[df_pilotos['nome_completo']==piloto])}
-        - **Vitórias:** {df_pilotos[df_pilotos['nome_completo']==piloto]['posicao_final'].eq(1).sum()}
-        - **Pódios:** {df_pilotos[df_pilotos['nome_completo']==piloto]['posicao_final'].le(3).sum()}
+        - **Nacionalidade:** {resumo.get('nacionalidade_piloto', '❓')}
+        - **Equipe:** {resumo.get('ultima_equipe', '❓')}
+        - **Número do Carro:** {resumo.get('ultimo_numero', '❓')}
+        - **Corridas Disputadas:** {resumo.get('largadas', 0)}
+        - **Vitórias:** {resumo.get('vitorias', 0)}
+        - **Pódios:** {resumo.get('podios', 0)}
         """)
-
         st.divider()
         st.markdown(f"### 📊 Estatísticas de {ano}")
 
-        # Filtrando dados do piloto no ano selecionado
-        df_filtrado = listas_anos[listas_anos['ano'] == ano].copy()
-
-        lista_cores = df_filtrado['cores'].iloc[0]
-
-        # Criando coluna auxiliar para gráficos
-        df_filtrado["posicao_plot"] = df_filtrado["posicao_final"].fillna(25)  # desqualificado vai para 25
-        df_filtrado["status_corrida"] = df_filtrado["posicao_final"].apply(
-            lambda x: "Desqualificado" if pd.isna(x) else "Terminou"
-        )
+        # Criando colunas auxiliares para gráficos (desqualificado vai para 25 / ganho -10)
+        df_filtrado = colunas_grafico(df_filtrado)
 
         # ===== Gráfico 1 - Posições finais =====
-        fig1 = px.line(
-            df_filtrado,
-            x="rodada",
-            y="posicao_plot",
-            markers=True,
-            title=f"📈 Posições Finais de {piloto} em {ano}",
-            labels={"rodada": "Corrida", "posicao_plot": "Posição Final"},
-        )
-        fig1.update_yaxes(autorange="reversed")
-
-        # Marcar os desqualificados em vermelho
-        df_desq = df_filtrado[df_filtrado["status_corrida"] == "Desqualificado"]
-        if not df_desq.empty:
-            fig1.add_scatter(
-                x=df_desq["rodada"],
-                y=df_desq["posicao_plot"],
-                mode="markers",
-                marker=dict(color="red", size=12, symbol="x"),
-                name="Desqualificado",
-            )
-
-        st.plotly_chart(fig1, use_container_width=True)
+        st.plotly_chart(figura_posicoes(piloto, ano), use_container_width=True)
 
         col1, col2 = st.columns(2, vertical_alignment='center')
 
         with col1:
             # ===== Gráfico 2 - Ganho de posições =====
-            df_filtrado["ganho_plot"] = df_filtrado.apply(
-                lambda row: row["ganho_posicao"] 
-                if row["status_corrida"] == "Terminou" 
-                else -10,  # valor negativo grande p/ DSQ
-                axis=1
-            )
-
-            fig2 = px.bar(
-                df_filtrado,
-                x="rodada",
-                y="ganho_plot",
-                title=f"📊 Ganho de Posições de {piloto} em {ano}",
-                labels={"rodada": "Corrida", "ganho_plot": "Posições Ganhadas"},
-                color="status_corrida",
-                color_discrete_map={"Terminou": "green", "Desqualificado": "red"},
-            )
-
-            # Deixar os DSQ bem destacados
-            fig2.update_traces(marker_line_width=1.5, marker_line_color="black")
-
-            # Linha de referência no 0
-            fig2.add_hline(y=0, line_dash="dash", line_color="black")
-
-            st.plotly_chart(fig2, use_container_width=True)
-
+            st.plotly_chart(figura_ganhos(piloto, ano), use_container_width=True)
 
         with col2: 
             # ===== Gráfico 3 - Distribuição de posições finais =====
-            df_hist = df_filtrado.copy()
-            df_hist["posicao_final_hist"] = df_hist["posicao_final"].fillna("Desqualificado")
-
-            fig3 = px.histogram(
-                df_hist,
-                x="posicao_final_hist",
-                nbins=10,
-                title=f"📊 Distribuição das Posições Finais ({ano})",
-                labels={"posicao_final_hist": "Posição Final"},
-                color_discrete_sequence=[lista_cores[0]]
-            )
-            st.plotly_chart(fig3, use_container_width=True)
+            st.plotly_chart(figura_distribuicao(piloto, ano), use_container_width=True)
+
+        # ===== Gráfico 4 - Rating Elo da carreira =====
+        st.plotly_chart(figura_elo((piloto,)), use_container_width=True)
+
+        # ===== Ritmo por stint (só quando há voltas registradas) =====
+        ritmo_stints(df_filtrado, piloto)
 
         # ===== Tabela =====
         with st.expander("📋 Ver dados brutos"):
-            st.dataframe(df_filtrado[["rodada", "ano", "posicao_final", "ganho_posicao", "status_corrida"]])
+            tabela_paginada(df_filtrado, chave="dashboard_dados", colunas_padrao=["rodada", "ano", "posicao_final", "ganho_posicao", "status_corrida"])
 
     else:
         st.warning("Selecione um piloto para visualizar o dashboard.")
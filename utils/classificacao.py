@@ -0,0 +1,379 @@
+import copy
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from utils.data_frames import cache_por_tabelas, versao_tabela
+from utils.get_info import get_drivers_standing, get_info_corrida, get_race_results, get_sprints_results, get_time_standing
+
+# Tabelas de onde a classificação é calculada
+TABELAS_CLASSIFICACAO = ('results', 'sprint_results', 'races')
+
+# Diferença de pontos tolerada ao comparar com as classificações publicadas (meios pontos, float32)
+TOLERANCIA_PONTOS = 1e-3
+
+# Descartes: por temporada, blocos de (rodadas, melhores resultados que contam); None = rodadas restantes
+DESCARTES_PILOTOS = {
+    **dict.fromkeys(range(1950, 1954), ((None, 4),)),
+    **dict.fromkeys(range(1954, 1958), ((None, 5),)),
+    1958: ((None, 6),), 1959: ((None, 5),), 1960: ((None, 6),), 1961: ((None, 5),), 1962: ((None, 5),),
+    **dict.fromkeys(range(1963, 1966), ((None, 6),)),
+    1966: ((None, 5),),
+    1967: ((6, 5), (None, 4)), 1968: ((6, 5), (None, 5)), 1969: ((6, 5), (None, 4)), 1970: ((7, 6), (None, 5)),
+    1971: ((6, 5), (None, 4)), 1972: ((6, 5), (None, 5)), 1973: ((8, 7), (None, 6)), 1974: ((8, 7), (None, 6)),
+    1975: ((7, 6), (None, 6)), 1976: ((8, 7), (None, 7)), 1977: ((9, 8), (None, 7)), 1978: ((8, 7), (None, 7)),
+    1979: ((7, 4), (None, 4)), 1980: ((7, 5), (None, 5)),
+    **dict.fromkeys(range(1981, 1991), ((None, 11),)),
+}
+
+# Até 1978 os construtores seguiam os descartes dos pilotos e só o carro mais bem colocado pontuava
+ULTIMO_ANO_MELHOR_CARRO = 1978
+DESCARTES_EQUIPES = {ano: regra for ano, regra in DESCARTES_PILOTOS.items() if ano <= ULTIMO_ANO_MELHOR_CARRO}
+
+# A Indy 500 (1950-1960) valia só para o campeonato de pilotos
+CORRIDAS_SO_PILOTOS = ('Indianapolis 500',)
+
+# Excluídos do campeonato (mantêm os pontos, mas ficam atrás de todos): (ano, id) -> rodada em que a exclusão vale
+EXCLUSOES_PILOTOS = {(1997, 30): 17}  # Michael Schumacher, desclassificado ao fim de 1997
+EXCLUSOES_EQUIPES = {(2007, 1): 1}    # McLaren, excluída do campeonato de 2007
+
+# Temporadas em que a classificação publicada tem ajustes que o motor não reproduz
+DIVERGENCIAS_ESPERADAS = {
+    ('pilotos', 1951): "Indy 500: o 3º lugar dividido (McGrath/Ayulo) só conta no desempate de um dos dois",
+    ('pilotos', 1956): "Fangio pontuou com dois carros em Mônaco: o descarte é por resultado, não por corrida",
+    ('pilotos', 1997): "Schumacher (desclassificado) aparece em 26º, não em último",
+    ('pilotos', 2011): "14º de Karthikeyan no Canadá não entra no desempate publicado",
+    ('pilotos', 2022): "Tsunoda à frente de Ricciardo após a 6ª rodada, contra a contagem de colocações",
+    ('equipes', 1958): "Ponto da volta mais rápida não valia para os construtores",
+    ('equipes', 1959): "Ponto da volta mais rápida não valia para os construtores",
+    ('equipes', 1973): "Descarte publicado diferente nas rodadas 6 e 7",
+    ('equipes', 2007): "McLaren sem pontos nem vitória de construtor no GP da Hungria",
+    ('equipes', 2018): "Force India teve os pontos zerados ao virar Racing Point Force India",
+    ('equipes', 2020): "Racing Point perdeu 15 pontos (dutos de freio)",
+}
+
+_CLASSIFICACOES = {}
+_TRAVA_CLASSIFICACOES = threading.Lock()
+
+
+# ------------------------------
+# Resultados pontuados (corridas + sprints)
+# ------------------------------
+@cache_por_tabelas(*TABELAS_CLASSIFICACAO)
+def resultados_pontuados() -> pd.DataFrame:
+    """Função para juntar corridas e sprints com a temporada e a rodada de cada resultado"""
+    colunas = ['raceId', 'driverId', 'constructorId', 'posicao_final', 'positionOrder', 'pontos', 'ms_volta_rapida_tempo']
+    df = pd.concat([
+        get_race_results()[colunas].assign(sprint=False),
+        get_sprints_results()[colunas].assign(sprint=True),
+    ], ignore_index=True)
+
+    # Dono da volta mais rápida de cada corrida principal (tempos registrados a partir de 2004)
+    tempo = df['ms_volta_rapida_tempo'].where(~df['sprint'])
+    df['volta_mais_rapida'] = (tempo == tempo.groupby(df['raceId']).transform('min')).fillna(False).astype(bool)
+
+    df_corridas = get_info_corrida()[['raceId', 'ano', 'rodada', 'name_circuit']]
+    df = df.merge(df_corridas, on='raceId', how='inner')
+
+    # Regras do campeonato de construtores: sem a Indy 500 e, até 1978, só o carro mais bem colocado pontua
+    # (divisões de carro têm o mesmo positionOrder e somam os pontos do carro)
+    melhor = df.groupby(['raceId', 'constructorId', 'sprint'])['positionOrder'].transform('min')
+    df['campeonato_equipes'] = ~df['name_circuit'].isin(CORRIDAS_SO_PILOTOS)
+    df['pontua_equipe'] = (df['ano'] > ULTIMO_ANO_MELHOR_CARRO) | (df['positionOrder'] == melhor)
+
+    return df.drop(columns='name_circuit')
+
+
+# ------------------------------
+# Motor (arrays densos temporada x rodada x participante)
+# ------------------------------
+class Classificacao:
+    """Pontos, vitórias e posições acumulados por (temporada, rodada, participante) em arrays densos"""
+
+    def __init__(self, df: pd.DataFrame, coluna: str, linhas: np.ndarray = None, pesos: np.ndarray = None,
+                 descartes: dict = None, exclusoes: dict = None):
+        # df: uma linha por resultado com ano, rodada, pontos, posicao_final, positionOrder, sprint e a coluna do participante.
+        # linhas: resultados que entram neste campeonato; pesos: quanto dos pontos de cada resultado conta (0 ou 1)
+        self.coluna = coluna
+        self._selecao = np.ones(len(df), dtype=bool) if linhas is None else np.asarray(linhas, dtype=bool)
+        self._pesos = np.ones(int(self._selecao.sum())) if pesos is None else np.asarray(pesos, dtype=float)[self._selecao]
+        pontos_resultado = df['pontos'].fillna(0).to_numpy(dtype=float)
+        df = df[self._selecao]
+
+        ano = df['ano'].to_numpy(dtype=np.int64)
+        participante = df[coluna].to_numpy(dtype=np.int64)
+
+        self.anos = np.unique(ano)
+        s = np.searchsorted(self.anos, ano)
+        k = df['rodada'].to_numpy(dtype=np.intp) - 1
+
+        # Índice local do participante dentro da temporada (o eixo P é o maior grid de uma temporada)
+        unicos, p_global = np.unique((s << 32) | participante, return_inverse=True)
+        temporada_unico = unicos >> 32
+        inicio = np.searchsorted(temporada_unico, np.arange(len(self.anos)))
+        p = p_global.ravel() - inicio[s]
+        self.quantidade = np.diff(np.r_[inicio, len(unicos)])
+
+        S, R, P = len(self.anos), int(k.max()) + 1, int(self.quantidade.max())
+        self._forma = (S, R, P)
+        self.ids = np.full((S, P), -1, dtype=np.int64)
+        self.ids[temporada_unico, np.arange(len(unicos)) - inicio[temporada_unico]] = unicos & 0xFFFFFFFF
+
+        # Última rodada com resultados de cada temporada
+        self.rodadas = np.zeros(S, dtype=np.intp)
+        np.maximum.at(self.rodadas, s, k + 1)
+
+        # Blocos de descarte (temporada, primeira rodada, fim do bloco, resultados que contam)
+        self._blocos = []
+        for ano, regra in (descartes or {}).items():
+            i = int(np.searchsorted(self.anos, ano))
+            if i == S or self.anos[i] != ano:
+                continue
+            inicio = 0
+            for rodadas, melhores in regra:
+                fim = R if rodadas is None else min(inicio + rodadas, R)
+                self._blocos.append((i, inicio, fim, melhores))
+                inicio = fim
+
+        # Excluídos do campeonato a partir de uma rodada
+        self.excluido = np.zeros((S, R, P), dtype=bool)
+        for (ano, participante_id), rodada in (exclusoes or {}).items():
+            i = int(np.searchsorted(self.anos, ano))
+            if i < S and self.anos[i] == ano:
+                self.excluido[i, rodada - 1:] |= self.ids[i] == participante_id
+
+        # Pontos e presença por rodada, acumulados ao longo da temporada
+        self._linhas = (s, k, p)
+        self.pontos = self._acumular(pontos_resultado)
+
+        ativo = np.zeros((S, R, P), dtype=bool)
+        ativo[s, k, p] = True
+        self.ativo = np.logical_or.accumulate(ativo, axis=1)
+
+        # Quantas vezes terminou em cada posição (só corridas principais, só classificados): vitórias e desempate
+        posicao = df['posicao_final'].fillna(0).to_numpy(dtype=np.intp)
+        posicao = np.where(df['sprint'].to_numpy(), 0, posicao)
+        contagem = np.zeros((S, R, P, int(posicao.max(initial=0)) + 1), dtype=np.uint8)
+        np.add.at(contagem, (s, k, p, posicao), 1)
+        contagem = np.cumsum(contagem, axis=1, dtype=np.uint8)
+        self.vitorias = contagem[..., 1] if contagem.shape[-1] > 1 else np.zeros((S, R, P), dtype=np.uint8)
+
+        # O desempate não depende dos pontos: calculado uma vez e reaproveitado pelo repontuar
+        self._desempate = self._ordem_desempate(contagem[..., 1:])
+        self.posicoes = self._ordenar()
+
+    def _acumular(self, pontos_resultado: np.ndarray) -> np.ndarray:
+        """Pontos de cada resultado somados por (temporada, rodada, participante) e acumulados na temporada"""
+        # Pontos na ordem das linhas do df original: só os resultados deste campeonato, com o peso de cada um
+        pontos_resultado = np.asarray(pontos_resultado, dtype=float)[self._selecao] * self._pesos
+
+        pontos = np.zeros(self._forma)
+        np.add.at(pontos, self._linhas, pontos_resultado)
+        acumulados = np.cumsum(pontos, axis=1)
+
+        # Temporadas com descarte: só os melhores resultados de cada bloco até a rodada contam
+        base = {}
+        for s, inicio, fim, melhores in self._blocos:
+            anteriores = base.get(s, 0)
+            for k in range(inicio, fim):
+                acumulados[s, k] = anteriores + np.sort(pontos[s, inicio:k + 1], axis=0)[-melhores:].sum(axis=0)
+            base[s] = acumulados[s, fim - 1]
+
+        return acumulados
+
+    def _ordem_desempate(self, contagem: np.ndarray) -> np.ndarray:
+        """Posto de cada participante só pela contagem de colocações (mais 1º lugares, 2º lugares...)"""
+        S, R, P, D = contagem.shape
+        grupo = np.repeat(np.arange(S * R), P)
+        contagem = contagem.reshape(-1, D).astype(np.int16)
+
+        # lexsort: a última chave é a principal (grupo, depois a contagem da melhor colocação)
+        ordem = np.lexsort([-contagem[:, d] for d in range(D - 1, -1, -1)] + [grupo])
+
+        # Contagens iguais recebem o mesmo posto
+        novo = np.ones(len(ordem), dtype=bool)
+        novo[1:] = (grupo[ordem][1:] != grupo[ordem][:-1]) | (contagem[ordem][1:] != contagem[ordem][:-1]).any(axis=1)
+
+        desempate = np.empty(len(ordem), dtype=np.int32)
+        desempate[ordem] = np.cumsum(novo)
+        return desempate
+
+    def _ordenar(self) -> np.ndarray:
+        """Posição de cada participante após cada rodada: pontos e, no empate, a contagem de colocações"""
+        S, R, P = self._forma
+        grupo = np.repeat(np.arange(S * R), P)
+        pontos = np.round(self.pontos.reshape(-1), 6)
+        ativo = self.ativo.reshape(-1)
+
+        excluido = self.excluido.reshape(-1)
+
+        # lexsort: a última chave é a principal (grupo, depois ativos, não excluídos, pontos e o desempate)
+        ordem = np.lexsort([self._desempate, -pontos, excluido, ~ativo, grupo])
+
+        # Empate completo (mesmos pontos e mesmas colocações) divide a posição
+        igual = np.zeros(len(ordem), dtype=bool)
+        igual[1:] = (
+            (grupo[ordem][1:] == grupo[ordem][:-1])
+            & (pontos[ordem][1:] == pontos[ordem][:-1])
+            & (excluido[ordem][1:] == excluido[ordem][:-1])
+            & (self._desempate[ordem][1:] == self._desempate[ordem][:-1])
+        )
+        posicao_no_grupo = np.arange(len(ordem)) % P
+        inicio_empate = np.maximum.accumulate(np.where(igual, 0, np.arange(len(ordem))))
+
+        posicoes = np.zeros(len(ordem), dtype=np.int16)
+        posicoes[ordem] = posicao_no_grupo[inicio_empate] + 1
+        posicoes[~ativo] = 0
+
+        return posicoes.reshape(S, R, P)
+
+    def repontuar(self, pontos_resultado: np.ndarray) -> 'Classificacao':
+        """Mesma classificação com outros pontos por resultado (na ordem das linhas do df original)"""
+        nova = copy.copy(self)
+        nova.pontos = self._acumular(pontos_resultado)
+        nova.posicoes = nova._ordenar()
+        return nova
+
+    def _indice(self, ano: int, rodada: int = None) -> tuple[int, int]:
+        """Posição da temporada e da rodada nos arrays (sem rodada: a última da temporada)"""
+        s = int(np.searchsorted(self.anos, ano))
+        if s >= len(self.anos) or self.anos[s] != ano:
+            raise KeyError(ano)
+
+        rodada = self.rodadas[s] if rodada is None else min(int(rodada), self.rodadas[s])
+        return s, max(rodada, 1) - 1
+
+    def apos_rodada(self, ano: int, rodada: int = None) -> pd.DataFrame:
+        """Classificação da temporada depois da rodada pedida (sem rodada: a final)"""
+        s, k = self._indice(ano, rodada)
+        n = self.quantidade[s]
+        df = pd.DataFrame({
+            self.coluna: self.ids[s, :n],
+            'pontos': self.pontos[s, k, :n],
+            'vitorias': self.vitorias[s, k, :n],
+            'posicao': self.posicoes[s, k, :n],
+        })
+
+        return df[self.ativo[s, k, :n]].sort_values(['posicao', self.coluna], ignore_index=True)
+
+    def campeoes(self) -> pd.DataFrame:
+        """Líder de cada temporada depois da última rodada"""
+        s = np.arange(len(self.anos))
+        k = self.rodadas - 1
+        p = np.argmin(np.where(self.ativo[s, k], self.posicoes[s, k], np.iinfo(np.int16).max), axis=1)
+
+        return pd.DataFrame({'ano': self.anos, self.coluna: self.ids[s, p], 'pontos': self.pontos[s, k, p]})
+
+    def tabela(self) -> pd.DataFrame:
+        """Todas as classificações (temporada, rodada, participante) em formato longo"""
+        s, k, p = np.nonzero(self.ativo)
+        return pd.DataFrame({
+            'ano': self.anos[s],
+            'rodada': k + 1,
+            self.coluna: self.ids[s, p],
+            'pontos': self.pontos[s, k, p],
+            'vitorias': self.vitorias[s, k, p],
+            'posicao': self.posicoes[s, k, p],
+        })
+
+
+def _classificacao(coluna: str) -> Classificacao:
+    """Função para conseguir o motor de um tipo de participante (refeito só se as tabelas mudarem)"""
+    versao = tuple(versao_tabela(nome) for nome in TABELAS_CLASSIFICACAO)
+
+    with _TRAVA_CLASSIFICACOES:
+        em_cache = _CLASSIFICACOES.get(coluna)
+        if em_cache is None or em_cache[0] != versao:
+            df = resultados_pontuados()
+            if coluna == 'constructorId':
+                classificacao = Classificacao(df, coluna, df['campeonato_equipes'], df['pontua_equipe'], DESCARTES_EQUIPES, EXCLUSOES_EQUIPES)
+            else:
+                classificacao = Classificacao(df, coluna, descartes=DESCARTES_PILOTOS, exclusoes=EXCLUSOES_PILOTOS)
+            em_cache = _CLASSIFICACOES[coluna] = (versao, classificacao)
+
+    return em_cache[1]
+
+
+def classificacao_pilotos() -> Classificacao:
+    """Função para conseguir a classificação de pilotos de todas as temporadas"""
+    return _classificacao('driverId')
+
+
+def classificacao_equipes() -> Classificacao:
+    """Função para conseguir a classificação de construtores de todas as temporadas"""
+    return _classificacao('constructorId')
+
+
+# ------------------------------
+# Conferência com as classificações publicadas
+# ------------------------------
+def _conferir(classificacao: Classificacao, df_publicada: pd.DataFrame, colunas: dict) -> pd.DataFrame:
+    """Função para contar, por temporada, as linhas publicadas que o motor não reproduz"""
+    df_corridas = get_info_corrida()[['raceId', 'ano', 'rodada']]
+    df_publicada = df_publicada.rename(columns=colunas).merge(df_corridas, on='raceId', how='inner')
+
+    # Empate completo divide a posição no motor; a publicada desempata de um jeito que os resultados não mostram
+    df_calculada = classificacao.tabela()
+    df_calculada['empatados'] = df_calculada.groupby(['ano', 'rodada', 'posicao'])['posicao'].transform('size')
+
+    df = df_publicada.merge(df_calculada, on=['ano', 'rodada', classificacao.coluna], how='left', suffixes=('', '_calculada'))
+    df = df.assign(
+        faltando=df['pontos_calculada'].isna(),
+        pontos_divergentes=~np.isclose(df['pontos'].astype(float), df['pontos_calculada'], atol=TOLERANCIA_PONTOS),
+        vitorias_divergentes=df['vitorias'] != df['vitorias_calculada'],
+        posicoes_divergentes=~df['posicao'].between(df['posicao_calculada'], df['posicao_calculada'] + df['empatados'] - 1),
+    )
+
+    return df.groupby('ano').agg(
+        linhas=('raceId', 'size'),
+        faltando=('faltando', 'sum'),
+        pontos_divergentes=('pontos_divergentes', 'sum'),
+        vitorias_divergentes=('vitorias_divergentes', 'sum'),
+        posicoes_divergentes=('posicoes_divergentes', 'sum'),
+    ).reset_index()
+
+
+def conferir_classificacoes() -> pd.DataFrame:
+    """Função para comparar as classificações calculadas com driver_standings e constructor_standings"""
+    partes = []
+    if versao_tabela('driver_standings') is not None:
+        df = _conferir(classificacao_pilotos(), get_drivers_standing(), {'wins': 'vitorias', 'posicao_mundial': 'posicao'})
+        partes.append(df.assign(classificacao='pilotos'))
+    if versao_tabela('constructor_standings') is not None:
+        df = _conferir(classificacao_equipes(), get_time_standing(), {'pontos_time': 'pontos', 'vitorias_time': 'vitorias', 'posicao_mundial_time': 'posicao'})
+        partes.append(df.assign(classificacao='equipes'))
+
+    if not partes:
+        return pd.DataFrame(columns=['classificacao', 'ano', 'linhas', 'faltando', 'pontos_divergentes', 'vitorias_divergentes', 'posicoes_divergentes', 'esperada'])
+
+    df = pd.concat(partes, ignore_index=True)
+    df['esperada'] = [DIVERGENCIAS_ESPERADAS.get(chave, "") for chave in zip(df['classificacao'], df['ano'])]
+    return df[['classificacao'] + [col for col in df.columns if col != 'classificacao']]
+
+
+def temporadas_divergentes(df_conferencia: pd.DataFrame, esperadas: bool = False) -> pd.DataFrame:
+    """Função para ficar só com as temporadas em que a classificação calculada difere da publicada"""
+    colunas = ['faltando', 'pontos_divergentes', 'vitorias_divergentes', 'posicoes_divergentes']
+    divergentes = df_conferencia[df_conferencia[colunas].sum(axis=1) > 0]
+
+    # Sem as esperadas: só as diferenças que o motor deveria reproduzir
+    return divergentes if esperadas else divergentes[divergentes['esperada'] == ""]
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.classificacao [ano [rodada]]
+    inicio = time.perf_counter()
+    pilotos, equipes = classificacao_pilotos(), classificacao_equipes()
+    print(f"Classificações de {len(pilotos.anos)} temporadas em {time.perf_counter() - inicio:.2f}s")
+
+    if len(sys.argv) > 1:
+        ano = int(sys.argv[1])
+        rodada = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        print(pilotos.apos_rodada(ano, rodada).head(10).to_string())
+        print(equipes.apos_rodada(ano, rodada).head(10).to_string())
+    else:
+        df_conferencia = conferir_classificacoes()
+        divergentes, esperadas = temporadas_divergentes(df_conferencia), temporadas_divergentes(df_conferencia, esperadas=True)
+        print(esperadas.to_string(index=False))
+        print(f"{len(divergentes)} de {len(df_conferencia)} temporadas com divergências ({len(esperadas) - len(divergentes)} esperadas)")
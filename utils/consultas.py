@@ -0,0 +1,289 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from glob import glob
+import pandas as pd
+from utils.data_frames import caminho_parquet, caminho_tabela, colunar_em_dia, data_frames, dtypes_leitura, versao_tabela
+from utils.esquema import COLUNAS_DIFERENCA, COLUNAS_TEMPO, ESQUEMA, VERSAO_ESQUEMA, aplicar_esquema
+from utils.get_info import *
+from utils.materializacao import caminho_cache
+from utils.tempos import adicionar_tempos
+
+# DuckDB é opcional: sem ele as consultas rodam no SQLite da biblioteca padrão
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Linhas lidas por vez ao carregar um CSV no SQLite (a tabela inteira nunca fica no pandas)
+TAMANHO_BLOCO = 100_000
+
+# Colunas indexadas no SQLite (os filtros mais comuns das análises)
+COLUNAS_INDICE = ['raceId', 'driverId', 'constructorId']
+
+
+# ------------------------------
+# Visões (mesmo nome e mesmas colunas dos get_* do utils.get_info)
+# ------------------------------
+# Idade em anos completos, igual ao get_info_pilotos: dias // 365
+IDADE = {
+    'duckdb': "date_diff('day', CAST(dob AS DATE), current_date) // 365",
+    'sqlite': "CAST(julianday('now') - julianday(dob) AS INTEGER) / 365",
+}
+
+VISOES = {
+    'get_info_corrida': {'tabela': 'races', 'renomear': RENOMEAR_CORRIDAS},
+    'get_info_pilotos': {
+        'tabela': 'drivers',
+        'renomear': RENOMEAR_PILOTOS,
+        'descartar': DESCARTAR_PILOTOS,
+        'extras': {'idade': IDADE, 'nome_completo': "forename || ' ' || surname"},
+    },
+    'get_info_time': {'tabela': 'constructors', 'renomear': RENOMEAR_EQUIPES, 'descartar': DESCARTAR_EQUIPES},
+    'get_lap_time': {'tabela': 'lap_times', 'renomear': RENOMEAR_TEMPO_VOLTA},
+    'get_status_race': {'tabela': 'status', 'renomear': RENOMEAR_STATUS},
+    'get_drivers_standing': {'tabela': 'driver_standings', 'renomear': RENOMEAR_CLASSIFICACAO_PILOTOS},
+    'get_seasons': {'tabela': 'seasons', 'renomear': RENOMEAR_TEMPORADAS},
+    'get_pit_stops': {
+        'tabela': 'pit_stops',
+        'renomear': RENOMEAR_PIT_STOPS,
+        'expressoes': {'milliseconds': "milliseconds / 1000.0"},
+    },
+    'get_sprints_results': {
+        'tabela': 'sprint_results',
+        'renomear': RENOMEAR_SPRINTS,
+        'descartar': DESCARTAR_SPRINTS,
+        'extras': {'tipo_corrida': "'Sprint'"},
+    },
+    'get_time_standing': {'tabela': 'constructor_standings', 'renomear': RENOMEAR_CLASSIFICACAO_EQUIPES},
+    'get_race_results': {
+        'tabela': 'results',
+        'renomear': RENOMEAR_RESULTADOS,
+        'descartar': DESCARTAR_RESULTADOS,
+        'extras': {'tipo_corrida': "'Corrida_Principal'"},
+    },
+    'get_circuits': {'tabela': 'circuits', 'renomear': RENOMEAR_CIRCUITOS, 'descartar': DESCARTAR_CIRCUITOS},
+    'get_qualifying': {'tabela': 'qualifying', 'renomear': RENOMEAR_QUALIFICACAO},
+}
+
+
+def _identificador(nome: str) -> str:
+    """Função para escrever um nome de tabela/coluna entre aspas (seguro em SQL)"""
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def _expressao(expressao, motor: str) -> str:
+    """Função para conseguir a expressão SQL do motor (algumas funções mudam entre DuckDB e SQLite)"""
+    return expressao[motor] if isinstance(expressao, dict) else expressao
+
+
+def sql_visao(nome: str, motor: str, colunas: list) -> str:
+    """Função para montar o SELECT de uma visão a partir das colunas da tabela crua"""
+    visao = VISOES[nome]
+    renomear = visao['renomear']
+    expressoes = visao.get('expressoes', {})
+    descartar = set(visao.get('descartar', []))
+
+    campos = [
+        f"{_expressao(expressoes.get(col, _identificador(col)), motor)} AS {_identificador(renomear.get(col, col))}"
+        for col in colunas if col not in descartar
+    ]
+    campos += [f"{_expressao(sql, motor)} AS {_identificador(col)}" for col, sql in visao.get('extras', {}).items()]
+
+    return f"SELECT {', '.join(campos)} FROM {_identificador(visao['tabela'])}"
+
+
+# ------------------------------
+# Conexão (DuckDB lendo os arquivos direto; SQLite carregado em blocos)
+# ------------------------------
+_CONEXAO = {}
+_TRAVA_CONSULTAS = threading.RLock()
+
+
+def motor_disponivel() -> str:
+    """Função para conseguir o motor usado nas consultas ('duckdb' se instalado, senão 'sqlite')"""
+    return 'duckdb' if duckdb is not None else 'sqlite'
+
+
+def _texto_sql(texto: str) -> str:
+    """Função para escrever um texto literal em SQL (caminhos de arquivo)"""
+    return "'" + texto.replace("'", "''") + "'"
+
+
+def _tabelas_duckdb(con, tabelas: list) -> None:
+    """Função para criar as tabelas cruas no DuckDB como visões sobre o Parquet (ou o CSV)"""
+    for nome in tabelas:
+        versao = versao_tabela(nome)
+        if colunar_em_dia(nome, versao):
+            origem = f"read_parquet({_texto_sql(caminho_parquet(nome))})"
+        else:
+            origem = f"read_csv({_texto_sql(caminho_tabela(nome))}, header = true, nullstr = '\\N')"
+
+        con.execute(f"CREATE OR REPLACE VIEW {_identificador(nome)} AS SELECT * FROM {origem}")
+
+
+def _tabelas_sqlite(con, tabelas: list) -> None:
+    """Função para carregar no SQLite só as tabelas cujo CSV mudou desde a última carga"""
+    con.execute("CREATE TABLE IF NOT EXISTS _versoes (nome TEXT PRIMARY KEY, mtime INTEGER, tamanho INTEGER)")
+    carregadas = {nome: (mtime, tamanho) for nome, mtime, tamanho in con.execute("SELECT * FROM _versoes")}
+
+    for nome in tabelas:
+        versao = versao_tabela(nome)
+        if carregadas.get(nome) == versao:
+            continue
+
+        con.execute(f"DROP TABLE IF EXISTS {_identificador(nome)}")
+        blocos = pd.read_csv(caminho_tabela(nome), sep=',', na_values="\\N", dtype=dtypes_leitura(nome), chunksize=TAMANHO_BLOCO)
+        for bloco in blocos:
+            adicionar_tempos(bloco, COLUNAS_TEMPO.get(nome, []), COLUNAS_DIFERENCA.get(nome)).to_sql(nome, con, if_exists='append', index=False)
+
+        for col in COLUNAS_INDICE:
+            if col in ESQUEMA.get(nome, {}):
+                con.execute(f"CREATE INDEX {_identificador(f'idx_{nome}_{col}')} ON {_identificador(nome)} ({_identificador(col)})")
+
+        con.execute("INSERT OR REPLACE INTO _versoes VALUES (?, ?, ?)", (nome, *versao))
+        con.commit()
+
+
+def _colunas_tabela(con, nome: str) -> list:
+    """Função para conseguir as colunas de uma tabela crua já registrada no motor"""
+    return [col[0] for col in con.execute(f"SELECT * FROM {_identificador(nome)} LIMIT 0").description]
+
+
+def _limpar_bancos_antigos(arquivo_atual: str) -> None:
+    """Função para remover os bancos SQLite de versões antigas do esquema (ex.: consultas.sqlite)"""
+    for arquivo in glob(os.path.join(caminho_cache(), "consultas*.sqlite*")):
+        if not arquivo.startswith(arquivo_atual):
+            try:
+                os.remove(arquivo)
+            except OSError:
+                pass
+
+
+def conexao():
+    """Função para conseguir a conexão com as visões em dia com os arquivos da pasta data/"""
+    tabelas = [nome for nome in data_frames]
+    versao = tuple(versao_tabela(nome) for nome in tabelas)
+
+    with _TRAVA_CONSULTAS:
+        if _CONEXAO.get('versao') == versao:
+            return _CONEXAO['con']
+
+        motor = motor_disponivel()
+        con = _CONEXAO.get('con')
+
+        if con is None:
+            if motor == 'duckdb':
+                con = duckdb.connect()
+            else:
+                os.makedirs(caminho_cache(), exist_ok=True)
+                # Um arquivo por versão do esquema: colunas novas recarregam as tabelas
+                arquivo = os.path.join(caminho_cache(), f"consultas-v{VERSAO_ESQUEMA}.sqlite")
+                con = sqlite3.connect(arquivo, check_same_thread=False)
+                _limpar_bancos_antigos(arquivo)
+
+        if motor == 'duckdb':
+            _tabelas_duckdb(con, tabelas)
+        else:
+            _tabelas_sqlite(con, tabelas)
+
+        # Visões com os mesmos nomes de coluna dos get_* (só das tabelas que existem)
+        for nome, visao in VISOES.items():
+            if visao['tabela'] not in tabelas:
+                continue
+
+            con.execute(f"DROP VIEW IF EXISTS {_identificador(nome)}")
+            con.execute(f"CREATE VIEW {_identificador(nome)} AS {sql_visao(nome, motor, _colunas_tabela(con, visao['tabela']))}")
+
+        _CONEXAO.update(con=con, motor=motor, versao=versao)
+
+    return con
+
+
+# ------------------------------
+# Consultas
+# ------------------------------
+def consultar(sql: str, parametros: list = None, tabela: str = None) -> pd.DataFrame:
+    """Função para rodar uma consulta no motor e trazer só o resultado para o pandas"""
+    con = conexao()
+
+    with _TRAVA_CONSULTAS:
+        if _CONEXAO['motor'] == 'duckdb':
+            df = con.execute(sql, parametros or []).df()
+        else:
+            df = pd.read_sql_query(sql, con, params=parametros or [])
+
+    # Com a tabela de origem, as colunas voltam com os tipos do registro
+    return df if tabela is None else aplicar_esquema(df, tabela)
+
+
+def consultar_visao(visao: str, colunas: list = None, filtros: dict = None, ordem: list = None, limite: int = None) -> pd.DataFrame:
+    """Função para filtrar, projetar e ordenar uma visão no motor (valores em lista viram IN)"""
+    condicoes, parametros = [], []
+    for col, valor in (filtros or {}).items():
+        if isinstance(valor, (list, tuple, set)):
+            condicoes.append(f"{_identificador(col)} IN ({', '.join('?' * len(valor))})")
+            parametros += list(valor)
+        else:
+            condicoes.append(f"{_identificador(col)} = ?")
+            parametros.append(valor)
+
+    sql = f"SELECT {', '.join(map(_identificador, colunas)) if colunas else '*'} FROM {_identificador(visao)}"
+    if condicoes:
+        sql += f" WHERE {' AND '.join(condicoes)}"
+    if ordem:
+        sql += f" ORDER BY {', '.join(map(_identificador, ordem))}"
+    if limite is not None:
+        sql += f" LIMIT {int(limite)}"
+
+    # Os tipos do registro estão nos nomes crus: volta aos nomes do CSV, aplica e renomeia de novo
+    renomear = VISOES[visao]['renomear']
+    df = consultar(sql, parametros).rename(columns={novo: cru for cru, novo in renomear.items()})
+
+    # Colunas calculadas na visão (ex.: milissegundos -> segundos) já vêm no tipo do get_*: não passam pelo registro
+    calculadas = [col for col in VISOES[visao].get('expressoes', {}) if col in df.columns]
+    df_tipado = aplicar_esquema(df.drop(columns=calculadas), VISOES[visao]['tabela'])
+    df = pd.concat([df_tipado, df[calculadas]], axis=1)[df.columns]
+
+    return df.rename(columns=renomear)
+
+
+# ------------------------------
+# Conferência com os get_* do utils.get_info
+# ------------------------------
+def conferir_visoes() -> pd.DataFrame:
+    """Função para comparar, linha a linha, cada visão com a função get_* de mesmo nome"""
+    linhas = []
+    for nome, visao in VISOES.items():
+        if versao_tabela(visao['tabela']) is None:
+            continue
+
+        df_pandas = globals()[nome]().reset_index(drop=True)
+        df_visao = consultar_visao(nome)
+        try:
+            pd.testing.assert_frame_equal(df_visao, df_pandas)
+            divergencia = ""
+        except AssertionError as erro:
+            divergencia = " ".join(str(erro).split())
+
+        linhas.append({'visao': nome, 'linhas': len(df_visao), 'confere': not divergencia, 'divergencia': divergencia})
+
+    return pd.DataFrame(linhas, columns=['visao', 'linhas', 'confere', 'divergencia'])
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.consultas "SELECT ano, count(*) FROM get_info_corrida GROUP BY ano"
+    inicio = time.perf_counter()
+    conexao()
+    print(f"Motor: {_CONEXAO['motor']} (visões prontas em {time.perf_counter() - inicio:.2f}s)")
+
+    sql = " ".join(sys.argv[1:]) or "SELECT * FROM get_race_results LIMIT 5"
+    inicio = time.perf_counter()
+    print(consultar(sql).to_string())
+    print(f"{time.perf_counter() - inicio:.3f}s")
+
+    df_conferencia = conferir_visoes()
+    print(df_conferencia[['visao', 'linhas', 'confere']].to_string(index=False))
+    print(f"Visões: {(~df_conferencia['confere']).sum()} de {len(df_conferencia)} diferem dos get_*")
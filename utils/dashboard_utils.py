@@ -1,5 +1,15 @@
+import numpy as np
 import pandas as pd
 from utils.get_info import *
+from utils.graficos import colunas_grafico
+from utils.materializacao import versao_materializada
+from utils.prepracao_dados import resumo_carreiras, tabela_corridas
+
+# Índice (piloto, ano) construído junto com a tabela materializada
+_INDICE = {}
+
+# Resumo de carreira por driverId (dicionário) para o cabeçalho do Dashboard
+_RESUMOS = {}
 
 def organizar_ids(df: pd.DataFrame, ids_prioritarios: list = None) -> pd.DataFrame:
     """Função para organizar os ID em primeiro no DF"""
@@ -15,37 +25,99 @@ def organizar_ids(df: pd.DataFrame, ids_prioritarios: list = None) -> pd.DataFra
 
 def merge_tabelas() -> pd.DataFrame:
     """Função para dar merge nos dataframes que precisamos"""
+    # A junção é materializada em disco e só é refeita quando algum CSV de entrada muda
+    return tabela_corridas()
+
+
+class IndicePilotos:
+    """Índice piloto -> fatia de linhas (ordenadas por ano) para filtrar sem varrer a tabela"""
+
+    def __init__(self, df: pd.DataFrame):
+        # Ordenação estável: dentro de cada ano, as linhas mantêm a ordem original
+        self.pilotos = df['nome_completo'].unique().tolist()
+        self.df = df.sort_values(['nome_completo', 'ano'], kind='stable')
+        self.ano_min, self.ano_max = int(df['ano'].min()), int(df['ano'].max())
+
+        nomes = self.df['nome_completo'].to_numpy()
+        self._anos = self.df['ano'].to_numpy()
+
+        # Início de cada bloco de piloto na tabela ordenada
+        inicios = np.concatenate([[0], np.flatnonzero(nomes[1:] != nomes[:-1]) + 1])
+        fins = np.append(inicios[1:], len(nomes))
+        self._fatias = {nomes[i]: (i, f) for i, f in zip(inicios, fins)}
+
+    def piloto(self, nome: str) -> pd.DataFrame:
+        """Linhas de um piloto (todas as temporadas)"""
+        inicio, fim = self._fatias.get(nome, (0, 0))
+        return self.df.iloc[inicio:fim]
+
+    def anos(self, nome: str) -> list:
+        """Temporadas disputadas pelo piloto, em ordem"""
+        inicio, fim = self._fatias.get(nome, (0, 0))
+        return np.unique(self._anos[inicio:fim]).tolist()
+
+    def piloto_ano(self, nome: str, ano: int) -> pd.DataFrame:
+        """Linhas de um piloto em uma temporada (busca binária dentro da fatia do piloto)"""
+        inicio, fim = self._fatias.get(nome, (0, 0))
+        anos = self._anos[inicio:fim]
+        esquerda, direita = np.searchsorted(anos, ano, 'left'), np.searchsorted(anos, ano, 'right')
+        return self.df.iloc[inicio + esquerda:inicio + direita]
+
+
+def indice_pilotos() -> IndicePilotos:
+    """Função para conseguir o índice dos pilotos com código (refeito só se a tabela mudar)"""
+    df_pilotos = merge_tabelas()
+    versao = versao_materializada('corridas')
+
+    if _INDICE.get('versao') != versao:
+        _INDICE['indice'] = IndicePilotos(df_pilotos.dropna(subset=['code']))
+        _INDICE['versao'] = versao
+
+    return _INDICE['indice']
 
-    # Conseguindo os dataframes
-    df_sprint = get_sprints_results()
-    df_races_result = get_race_results()
-    df_status = get_status_race()
-    df_races = get_info_corrida()
-    df_equipes = get_info_time()
-    df_pilotos = get_info_pilotos()
 
+def resumo_piloto(driver_id: int) -> dict:
+    """Função para conseguir o resumo de carreira de um piloto pelo driverId"""
+    df_resumo = resumo_carreiras()
+    versao = versao_materializada('resumo_carreiras')
 
-    # Concatenando os df
-    df_juntando = pd.concat([df_sprint, df_races_result])
+    if _RESUMOS.get('versao') != versao:
+        _RESUMOS['resumos'] = df_resumo.set_index('driverId').to_dict('index')
+        _RESUMOS['versao'] = versao
 
-    # Filtrandos as colunas necessárias para análise
-    df_races = df_races[['raceId', 'ano', 'circuitId', 'name_circuit', 'rodada', 'data_corrida']]
-    df_pilotos = df_pilotos[['driverId','nome_completo', 'code', 'wiki_url_piloto', 'nacionalidade_piloto']]
-    df_equipes = df_equipes[['constructorId','nome_equipe', 'cores']]
+    return _RESUMOS['resumos'].get(driver_id, {})
 
-    # Dando Merge
-    df_juntando_tudo = pd.merge(df_races, df_juntando, on="raceId")
-    df_juntando_tudo = pd.merge(df_juntando_tudo, df_status, on="statusId")
-    df_juntando_tudo = pd.merge(df_juntando_tudo, df_equipes, on="constructorId")
-    df_juntando_tudo = pd.merge(df_juntando_tudo, df_pilotos, on="driverId")
 
+def comparar_pilotos(pilotos: list, anos: tuple) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Função para agregar vários pilotos em um intervalo de anos com uma única passada"""
+    df = indice_pilotos().df
 
-    df_juntando_tudo['posicao_final'] = pd.to_numeric(df_juntando_tudo['posicao_final'], errors='coerce')
-    df_juntando_tudo['posicao_grid'] = pd.to_numeric(df_juntando_tudo['posicao_grid'], errors='coerce')
+    # Uma máscara só para todos os pilotos (em vez de um filtro por piloto)
+    filtro = df['nome_completo'].isin(pilotos) & df['ano'].between(*anos)
+    df_selecao = colunas_grafico(df[filtro])
 
-    df_juntando_tudo['ganho_posicao'] = df_juntando_tudo['posicao_grid'] - df_juntando_tudo['posicao_final']
+    df_temporadas = df_selecao.assign(
+        vitorias=df_selecao['posicao_final'].eq(1),
+        podios=df_selecao['posicao_final'].le(3),
+        terminou=df_selecao['posicao_final'].notna(),
+    ).groupby(['nome_completo', 'ano'], observed=True).agg(
+        corridas=('raceId', 'size'),
+        terminadas=('terminou', 'sum'),
+        vitorias=('vitorias', 'sum'),
+        podios=('podios', 'sum'),
+        pontos=('pontos', 'sum'),
+        posicao_media=('posicao_final', 'mean'),
+        ganho_total=('ganho_posicao', 'sum'),
+    ).reset_index()
 
-    # Organizando ids
-    df_juntando_tudo = organizar_ids(df_juntando_tudo)
+    # Totais por piloto saem da tabela por temporada (já pequena)
+    df_resumo = df_temporadas.groupby('nome_completo', sort=False).agg(
+        temporadas=('ano', 'size'),
+        corridas=('corridas', 'sum'),
+        terminadas=('terminadas', 'sum'),
+        vitorias=('vitorias', 'sum'),
+        podios=('podios', 'sum'),
+        pontos=('pontos', 'sum'),
+    ).reindex([p for p in pilotos if p in set(df_temporadas['nome_completo'])]).reset_index()
 
-    return df_juntando_tudo
+    return df_selecao, df_temporadas, df_resumo
@@ -1,29 +1,328 @@
+import hashlib
+import io
+import json
 import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 from glob import glob
 import pandas as pd
+from utils.esquema import COLUNAS_DIFERENCA, COLUNAS_TEMPO, VERSAO_ESQUEMA, aplicar_esquema, colunas_data, dtypes_leitura
+from utils.tempos import adicionar_tempos
+
+# A partir do pandas 3 o Copy-on-Write é padrão: a cópia rasa já protege a versão compartilhada
+COPIA_RASA = int(pd.__version__.split(".")[0]) >= 3
+
+
+# ------------------------------
+# Cache de tabelas (por processo)
+# ------------------------------
+_CACHE_TABELAS = {}
+_TRAVAS_TABELAS = {}
+_TRAVA_GLOBAL = threading.Lock()
+_MANIFESTO = {}
+_EXECUTOR = None
+
+# Bytes finais do trecho já lido, usados para conferir que o CSV só ganhou linhas no fim
+# (junto com o hash de todo o trecho, para pegar edições antes deles)
+TAMANHO_IMPRESSAO = 4096
+
+
+def caminho_dados() -> str:
+    """Função para conseguir o caminho da pasta de dados"""
+    return os.path.join(os.getcwd(), "data")
+
+
+def caminho_tabela(nome: str) -> str:
+    """Função para conseguir o caminho do CSV de uma tabela"""
+    return os.path.join(caminho_dados(), f"{nome}.csv")
+
+
+def caminho_colunar() -> str:
+    """Função para conseguir a pasta das tabelas em formato colunar (Parquet)"""
+    return os.path.join(caminho_dados(), "colunar")
+
+
+def caminho_parquet(nome: str) -> str:
+    """Função para conseguir o arquivo Parquet de uma tabela"""
+    return os.path.join(caminho_colunar(), f"{nome}.parquet")
+
+
+def versao_tabela(nome: str) -> tuple | None:
+    """Função para conseguir a versão (mtime, tamanho) do arquivo de uma tabela"""
+    try:
+        info = os.stat(caminho_tabela(nome))
+    except FileNotFoundError:
+        return None
+
+    return (info.st_mtime_ns, info.st_size)
+
+
+def visao_somente_leitura(df: pd.DataFrame) -> pd.DataFrame:
+    """Função para entregar uma visão do DataFrame sem copiar os dados"""
+    # Cópia rasa: os dados são compartilhados e só são copiados se alguém alterar a visão.
+    # Sem Copy-on-Write (pandas < 3), alterar a visão mudaria o cache: entrega uma cópia de verdade
+    return df.copy(deep=not COPIA_RASA)
+
+
+def ler_manifesto() -> dict:
+    """Função para ler o manifesto com as versões dos CSV convertidos para Parquet"""
+    arquivo = os.path.join(caminho_colunar(), "manifesto.json")
+    try:
+        versao = os.stat(arquivo).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    if _MANIFESTO.get('versao') != versao:
+        with open(arquivo, encoding="utf-8") as f:
+            _MANIFESTO['conteudo'] = {nome: tuple(v) for nome, v in json.load(f).items()}
+        _MANIFESTO['versao'] = versao
+
+    return _MANIFESTO['conteudo']
+
+
+def ler_csv(nome: str, origem=None, colunas: list = None) -> pd.DataFrame:
+    """Função para ler o CSV de uma tabela já com os tipos convertidos"""
+    origem = caminho_tabela(nome) if origem is None else origem
+    cabecalho = 0 if colunas is None else None
+
+    df = pd.read_csv(origem, sep=',', na_values="\\N", dtype=dtypes_leitura(nome), header=cabecalho, names=colunas)
+    for col in colunas_data(nome):
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    # Tempos em texto também em milissegundos (vão junto para o Parquet)
+    df = adicionar_tempos(df, COLUNAS_TEMPO.get(nome, []), COLUNAS_DIFERENCA.get(nome))
+
+    return aplicar_esquema(df, nome)
+
+
+# ------------------------------
+# Linhas anexadas ao fim do CSV
+# ------------------------------
+def impressao_tabela(nome: str, tamanho: int) -> bytes:
+    """Função para conseguir a assinatura do CSV até uma posição (hash do trecho e seus últimos bytes)"""
+    inicio = max(0, tamanho - TAMANHO_IMPRESSAO)
+    sha = hashlib.sha256()
+    with open(caminho_tabela(nome), "rb") as f:
+        while f.tell() < inicio:
+            bloco = f.read(min(1 << 20, inicio - f.tell()))
+            if not bloco:
+                break
+            sha.update(bloco)
+        cauda = f.read(tamanho - inicio)
+    sha.update(cauda)
+
+    # Os últimos bytes ficam no fim da assinatura (foi_anexada confere que terminam em quebra de linha)
+    return sha.digest() + cauda
+
+
+def foi_anexada(nome: str, tamanho: int, impressao: bytes) -> bool:
+    """Função para saber se o CSV só ganhou linhas no fim desde que tinha `tamanho` bytes"""
+    versao = versao_tabela(nome)
+    if versao is None or versao[1] <= tamanho or not impressao.endswith(b"\n"):
+        return False
+
+    # Hash e bytes finais do trecho antigo continuam os mesmos: nada antes do ponto de corte foi editado
+    return impressao_tabela(nome, tamanho) == impressao
+
+
+def ler_csv_anexado(nome: str, inicio: int, fim: int = None) -> pd.DataFrame:
+    """Função para ler só as linhas do CSV a partir de um byte (o cabeçalho vem do início do arquivo)"""
+    with open(caminho_tabela(nome), "rb") as f:
+        colunas = pd.read_csv(f, nrows=0).columns.tolist()
+        f.seek(inicio)
+        trecho = f.read() if fim is None else f.read(fim - inicio)
+
+    return ler_csv(nome, io.BytesIO(trecho), colunas)
+
+
+def anexar_linhas(df: pd.DataFrame, novas: pd.DataFrame) -> pd.DataFrame:
+    """Função para juntar linhas novas ao fim de uma tabela sem perder as colunas categóricas"""
+    if novas.empty:
+        return df
+
+    juntas = pd.concat([df, novas], ignore_index=True)
+
+    # Categorias diferentes viram object no concat: refaz a categoria com a união das duas
+    for col in df.columns:
+        tipo = df[col].dtype
+        if isinstance(tipo, pd.CategoricalDtype) and juntas[col].dtype != tipo and col in novas:
+            categorias = tipo.categories.union(pd.Index(novas[col].dropna().unique()))
+            juntas[col] = juntas[col].astype(pd.CategoricalDtype(categorias))
+
+    return juntas
+
+
+def colunar_em_dia(nome: str, versao: tuple) -> bool:
+    """Função para saber se o Parquet da tabela foi gerado deste CSV e com o esquema atual"""
+    return ler_manifesto().get(nome, ())[:3] == (*versao, VERSAO_ESQUEMA) and os.path.exists(caminho_parquet(nome))
+
+
+def ler_tabela(nome: str, versao: tuple) -> pd.DataFrame:
+    """Função para ler uma tabela, preferindo o Parquet quando ele está em dia com o CSV"""
+    arquivo_colunar = caminho_parquet(nome)
+    manifesto = ler_manifesto().get(nome, ())
+
+    # O Parquet só vale se foi gerado com o esquema atual a partir deste CSV (ou do início dele)
+    em_dia = colunar_em_dia(nome, versao)
+    anexada = (
+        not em_dia and len(manifesto) > 3 and manifesto[2] == VERSAO_ESQUEMA
+        and foi_anexada(nome, manifesto[1], bytes.fromhex(manifesto[3]))
+    )
+
+    if (em_dia or anexada) and os.path.exists(arquivo_colunar):
+        try:
+            df = pd.read_parquet(arquivo_colunar)
+        except (ImportError, OSError, ValueError):
+            # Sem pyarrow ou arquivo corrompido: volta para o CSV
+            return ler_csv(nome)
+
+        # CSV com linhas novas no fim: só elas são lidas do texto
+        return anexar_linhas(df, ler_csv_anexado(nome, manifesto[1], versao[1])) if anexada else df
+
+    return ler_csv(nome)
+
+
+def _trava_tabela(nome: str) -> threading.Lock:
+    """Função para conseguir a trava de uma tabela (uma leitura por vez de cada arquivo)"""
+    with _TRAVA_GLOBAL:
+        return _TRAVAS_TABELAS.setdefault(nome, threading.Lock())
+
+
+def carregar_tabela(nome: str) -> pd.DataFrame:
+    """Função para carregar uma tabela, lendo o CSV apenas se ele mudou no disco"""
+    versao = versao_tabela(nome)
+    if versao is None:
+        raise KeyError(nome)
+
+    with _trava_tabela(nome):
+        em_cache = _CACHE_TABELAS.get(nome)
+
+        if em_cache is None or em_cache[0] != versao:
+            if em_cache is not None and foi_anexada(nome, em_cache[0][1], em_cache[2]):
+                # Só linhas novas no fim (ex.: um GP a mais): lê apenas o trecho anexado
+                df = anexar_linhas(em_cache[1], ler_csv_anexado(nome, em_cache[0][1], versao[1]))
+            else:
+                df = ler_tabela(nome, versao)
+            _CACHE_TABELAS[nome] = (versao, df, impressao_tabela(nome, versao[1]))
+        else:
+            df = em_cache[1]
+
+    return visao_somente_leitura(df)
+
+
+def tabela_em_dia(nome: str) -> bool:
+    """Função para saber se a tabela já está carregada e igual ao arquivo no disco"""
+    em_cache = _CACHE_TABELAS.get(nome)
+    return em_cache is not None and em_cache[0] == versao_tabela(nome)
+
+
+# Quantidade máxima de resultados guardados por função (os usados há mais tempo saem primeiro)
+MAX_RESULTADOS = 128
+
+
+def cache_por_tabelas(*nomes: str):
+    """Decorador para guardar o retorno de uma função até alguma das tabelas mudar no disco"""
+    def decorador(func):
+        resultados = OrderedDict()
+        trava = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            chave = (args, tuple(sorted(kwargs.items())))
+            try:
+                hash(chave)
+            except TypeError:
+                # Argumentos não hashable (ex.: dicionários) não passam pelo cache
+                return func(*args, **kwargs)
+
+            versao = tuple(versao_tabela(nome) for nome in nomes)
+            with trava:
+                em_cache = resultados.get(chave)
+                if em_cache is not None:
+                    resultados.move_to_end(chave)
+
+            if em_cache is None or em_cache[0] != versao:
+                df = func(*args, **kwargs)
+                with trava:
+                    resultados[chave] = (versao, df)
+                    resultados.move_to_end(chave)
+                    while len(resultados) > MAX_RESULTADOS:
+                        resultados.popitem(last=False)
+            else:
+                df = em_cache[1]
+
+            return visao_somente_leitura(df)
+
+        wrapper.cache_clear = resultados.clear
+        return wrapper
+
+    return decorador
+
+
+class TabelasEmCache(Mapping):
+    """Mapeamento nome -> DataFrame que lê cada tabela só no primeiro acesso (uma vez por processo)"""
+
+    def __init__(self, pre_carregar: list = None):
+        # Tabelas lidas logo na criação (ex.: as que toda página usa)
+        for nome in pre_carregar or []:
+            carregar_tabela(nome)
+
+    def __getitem__(self, nome: str) -> pd.DataFrame:
+        return carregar_tabela(nome)
+
+    def __contains__(self, nome: object) -> bool:
+        return isinstance(nome, str) and versao_tabela(nome) is not None
+
+    def __iter__(self):
+        files = glob(os.path.join(caminho_dados(), "*.csv"))
+        return iter(sorted(os.path.splitext(os.path.basename(f))[0] for f in files))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def carregadas(self) -> list:
+        """Lista as tabelas que já estão em memória"""
+        return sorted(_CACHE_TABELAS)
+
+    def aquecer(self, nomes: list = None, max_workers: int = 4) -> list:
+        """Carrega as tabelas em segundo plano, em um pool de threads, sem bloquear a página"""
+        global _EXECUTOR
+
+        with _TRAVA_GLOBAL:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="data_frames")
+
+        nomes = list(self) if nomes is None else nomes
+        return [_EXECUTOR.submit(carregar_tabela, nome) for nome in nomes if not tabela_em_dia(nome)]
 
 
 def carregar_dados() -> dict:
-    """Função de carregar dados"""
-    path = os.path.join(os.getcwd(), "data")
+    """Função de carregar todos os dados de uma vez"""
+    path = caminho_dados()
     # print(f"Caminho: {path}")
-    
+
     files = glob(os.path.join(path, "*.csv"))
     if not files:
         print("Nenhum arquivo CSV encontrado!")
         return
-    
+
     # print("Arquivos encontrados:", files)
-    
+
     dicf = {}
-    
+
     for f in files:
         nome = os.path.splitext(os.path.basename(f))[0]
-        df = pd.read_csv(f, sep=',', na_values="\\N")
-        dicf[nome] = df
-    
+        dicf[nome] = carregar_tabela(nome)
+
     # print("DataFrames carregados:", list(dicf.keys()))
 
     return dicf
 
-data_frames = carregar_dados()
\ No newline at end of file
+# Tabelas lidas já na importação (por padrão nenhuma: cada uma é lida no primeiro acesso)
+TABELAS_PRE_CARREGADAS = []
+
+data_frames = TabelasEmCache(TABELAS_PRE_CARREGADAS)
+
@@ -0,0 +1,119 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from utils.materializacao import materializado
+from utils.prepracao_dados import ids_anexados, tabela_corridas
+
+# Rating de quem ainda não correu
+ELO_INICIAL = 1500.0
+
+# Quanto o rating anda por corrida (dividido entre os n-1 adversários)
+FATOR_K = 32.0
+
+# Diferença de rating em que o favorito tem 10x mais chance de chegar na frente
+ESCALA_ELO = 400.0
+
+COLUNAS_ELO = ['raceId', 'ano', 'rodada', 'data_corrida', 'driverId', 'elo_antes', 'elo']
+
+
+# ------------------------------
+# Atualização (todos os pares de uma corrida de uma vez)
+# ------------------------------
+def atualizar_elo(elo: np.ndarray, posicao: np.ndarray) -> np.ndarray:
+    """Função para conseguir o novo rating dos pilotos de uma corrida a partir da ordem de chegada"""
+    n = len(elo)
+    if n < 2:
+        return elo.copy()
+
+    # Matriz n x n: chance esperada de i chegar na frente de j e o que aconteceu (1, 0,5 ou 0)
+    esperado = 1 / (1 + 10 ** ((elo[None, :] - elo[:, None]) / ESCALA_ELO))
+    real = (posicao[:, None] < posicao[None, :]) + 0.5 * (posicao[:, None] == posicao[None, :])
+
+    # Na diagonal, real e esperado valem 0,5: o piloto não conta contra si mesmo
+    return elo + FATOR_K / (n - 1) * (real - esperado).sum(axis=1)
+
+
+def aplicar_corridas(df: pd.DataFrame, ratings: np.ndarray) -> pd.DataFrame:
+    """Função para aplicar as corridas em ordem cronológica, atualizando o vetor de ratings (indexado por driverId)"""
+    df = df.sort_values(['data_corrida', 'raceId', 'positionOrder'], kind='stable', ignore_index=True)
+
+    # Carro dividido (anos 50): o piloto aparece mais de uma vez na corrida e só conta o melhor resultado
+    df = df.drop_duplicates(['raceId', 'driverId'], keep='first', ignore_index=True)
+    pilotos = df['driverId'].to_numpy(dtype=np.intp)
+    posicoes = df['positionOrder'].to_numpy()
+
+    # Cada corrida é um bloco contínuo depois da ordenação: um passo de atualização por bloco
+    corridas = df['raceId'].to_numpy()
+    inicios = np.flatnonzero(np.r_[True, corridas[1:] != corridas[:-1]])
+    fins = np.r_[inicios[1:], len(df)]
+
+    antes, depois = np.empty(len(df)), np.empty(len(df))
+    for inicio, fim in zip(inicios, fins):
+        ids = pilotos[inicio:fim]
+        antes[inicio:fim] = ratings[ids]
+        ratings[ids] = depois[inicio:fim] = atualizar_elo(ratings[ids], posicoes[inicio:fim])
+
+    return df.assign(elo_antes=antes, elo=depois)[COLUNAS_ELO]
+
+
+def _corridas_principais(df: pd.DataFrame) -> pd.DataFrame:
+    """Função para ficar só com as corridas principais (sprints não entram no rating)"""
+    return df[df['tipo_corrida'] == 'Corrida_Principal']
+
+
+def _vetor_ratings(*dfs: pd.DataFrame) -> np.ndarray:
+    """Função para conseguir o vetor de ratings iniciais (posição = driverId) cobrindo os pilotos dos DataFrames"""
+    tamanho = max(int(df['driverId'].to_numpy().max(initial=0)) for df in dfs)
+    return np.full(tamanho + 1, ELO_INICIAL)
+
+
+# ------------------------------
+# Série temporal (corrida, piloto)
+# ------------------------------
+@materializado('elo', *tabela_corridas.tabelas, versao=2)
+def tabela_elo() -> pd.DataFrame:
+    """Função para calcular o rating de todos os pilotos depois de cada corrida da história"""
+    df = _corridas_principais(tabela_corridas())
+    return aplicar_corridas(df, _vetor_ratings(df))
+
+
+@tabela_elo.incremental
+def _anexar_elo(df_elo: pd.DataFrame, anexos: dict) -> pd.DataFrame:
+    """Função para aplicar só as corridas novas, partindo do último rating de cada piloto"""
+    corridas = ids_anexados(anexos, 'raceId', ('results',))
+    df = _corridas_principais(tabela_corridas())
+    df_novas = df[df['raceId'].isin(corridas)]
+
+    # Corrida já aplicada (ou anterior à última) muda a história: refaz tudo
+    if df_elo['raceId'].isin(corridas).any() or (not df_novas.empty and df_novas['data_corrida'].min() < df_elo['data_corrida'].max()):
+        return aplicar_corridas(df, _vetor_ratings(df))
+
+    ratings = _vetor_ratings(df, df_elo)
+    ultimos = df_elo.drop_duplicates('driverId', keep='last')
+    ratings[ultimos['driverId'].to_numpy(dtype=np.intp)] = ultimos['elo'].to_numpy()
+
+    return pd.concat([df_elo, aplicar_corridas(df_novas, ratings)], ignore_index=True)
+
+
+def trajetoria_elo(driver_ids: list) -> pd.DataFrame:
+    """Função para conseguir a evolução do rating de alguns pilotos, corrida a corrida"""
+    df = tabela_elo()
+    return df[df['driverId'].isin(driver_ids)]
+
+
+def ranking_elo(ano: int = None) -> pd.DataFrame:
+    """Função para conseguir o rating final de cada piloto (na história ou ao fim de um ano)"""
+    df = tabela_elo()
+    if ano is not None:
+        df = df[df['ano'] == ano]
+
+    return df.drop_duplicates('driverId', keep='last').sort_values('elo', ascending=False, ignore_index=True)
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.elo [ano]
+    inicio = time.perf_counter()
+    df_elo = tabela_elo()
+    print(f"{df_elo['raceId'].nunique()} corridas e {len(df_elo)} ratings em {time.perf_counter() - inicio:.2f}s")
+    print(ranking_elo(int(sys.argv[1]) if len(sys.argv) > 1 else None).head(10).to_string(index=False))
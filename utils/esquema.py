@@ -0,0 +1,266 @@
+import numpy as np
+import pandas as pd
+
+# ------------------------------
+# Versão do esquema
+# ------------------------------
+# Aumentar sempre que algum tipo mudar: invalida os Parquet e as tabelas materializadas
+VERSAO_ESQUEMA = 3
+
+# Tipo usado para colunas de data (lidas como texto e convertidas depois)
+DATA = "datetime64[ns]"
+
+
+# ------------------------------
+# Tabelas cruas (nomes das colunas dos CSV)
+# ------------------------------
+ESQUEMA = {
+    'circuits': {
+        'circuitId': 'int16',
+        'circuitRef': 'str',
+        'name_circuit': 'category',
+        'location': 'category',
+        'country': 'category',
+        'lat': 'float32',
+        'lng': 'float32',
+        'alt': 'Int16',
+        'url': 'str',
+    },
+    'constructor_results': {
+        'constructorResultsId': 'int32',
+        'raceId': 'int16',
+        'constructorId': 'int16',
+        'points': 'float32',
+        'status': 'category',
+    },
+    'constructor_standings': {
+        'constructorStandingsId': 'int32',
+        'raceId': 'int16',
+        'constructorId': 'int16',
+        'points': 'float32',
+        'position': 'Int8',
+        'positionText': 'category',
+        'wins': 'int8',
+    },
+    'constructors': {
+        'constructorId': 'int16',
+        'constructorRef': 'str',
+        'name_constructor': 'category',
+        'nationality_constructor': 'category',
+        'url_circuit': 'str',
+    },
+    'driver_standings': {
+        'driverStandingsId': 'int32',
+        'raceId': 'int16',
+        'driverId': 'int16',
+        'points': 'float32',
+        'position': 'Int16',
+        'positionText': 'category',
+        'wins': 'int8',
+    },
+    'drivers': {
+        'driverId': 'int16',
+        'driverRef': 'str',
+        'number_driver': 'Int16',
+        'code': 'category',
+        'forename': 'str',
+        'surname': 'str',
+        'dob': DATA,
+        'nationality_driver': 'category',
+        'url_driver': 'str',
+    },
+    'lap_times': {
+        'raceId': 'int16',
+        'driverId': 'int16',
+        'lap': 'int16',
+        'position': 'int16',
+        'time': 'str',
+        'milliseconds': 'int32',
+    },
+    'pit_stops': {
+        'raceId': 'int16',
+        'driverId': 'int16',
+        'stop': 'int8',
+        'lap': 'int16',
+        'time': 'str',
+        'duration': 'str',
+        'milliseconds': 'int32',
+        'duration_ms': 'Int32',
+    },
+    'qualifying': {
+        'qualifyId': 'int32',
+        'raceId': 'int16',
+        'driverId': 'int16',
+        'constructorId': 'int16',
+        'number_driver_season': 'Int16',
+        'position': 'Int8',
+        'q1': 'str',
+        'q2': 'str',
+        'q3': 'str',
+        'q1_ms': 'Int32',
+        'q2_ms': 'Int32',
+        'q3_ms': 'Int32',
+    },
+    'races': {
+        'raceId': 'int16',
+        'year': 'int16',
+        'round': 'int8',
+        'circuitId': 'int16',
+        'name_circuit': 'category',
+        'date': DATA,
+        'time': 'str',
+        'url': 'str',
+        'fp1_date': DATA,
+        'fp1_time': 'str',
+        'fp2_date': DATA,
+        'fp2_time': 'str',
+        'fp3_date': DATA,
+        'fp3_time': 'str',
+        'quali_date': DATA,
+        'quali_time': 'str',
+        'sprint_date': DATA,
+        'sprint_time': 'str',
+    },
+    'results': {
+        'resultId': 'int32',
+        'raceId': 'int16',
+        'driverId': 'int16',
+        'constructorId': 'int16',
+        'number_driver_season': 'Int16',
+        'grid': 'Int8',
+        'position': 'Int8',
+        'positionText': 'category',
+        'positionOrder': 'int8',
+        'points': 'float32',
+        'laps': 'int16',
+        'time': 'str',
+        'milliseconds': 'Int32',
+        'fastestLap': 'Int16',
+        'rank': 'Int8',
+        'fastestLapTime': 'str',
+        'fastestLapSpeed': 'float32',
+        'statusId': 'int16',
+        'time_ms': 'Int32',
+        'gap_ms': 'Int32',
+        'fastestLapTime_ms': 'Int32',
+    },
+    'seasons': {
+        'year': 'int16',
+        'url': 'str',
+    },
+    'sprint_results': {
+        'resultId': 'int32',
+        'raceId': 'int16',
+        'driverId': 'int16',
+        'constructorId': 'int16',
+        'number': 'Int16',
+        'grid': 'Int8',
+        'position': 'Int8',
+        'positionText': 'category',
+        'positionOrder': 'int8',
+        'points': 'float32',
+        'laps': 'int16',
+        'time': 'str',
+        'milliseconds': 'Int32',
+        'fastestLap': 'Int16',
+        'fastestLapTime': 'str',
+        'statusId': 'int16',
+        'time_ms': 'Int32',
+        'gap_ms': 'Int32',
+        'fastestLapTime_ms': 'Int32',
+    },
+    'status': {
+        'statusId': 'int16',
+        'status': 'category',
+    },
+}
+
+
+# Colunas de tempo em texto que ganham, na leitura, a versão em milissegundos (<coluna>_ms, já no registro acima)
+COLUNAS_TEMPO = {
+    'results': ['time', 'fastestLapTime'],
+    'sprint_results': ['time', 'fastestLapTime'],
+    'pit_stops': ['duration'],
+    'qualifying': ['q1', 'q2', 'q3'],
+}
+
+# Colunas de tempo em que "+5.478" é a diferença para o vencedor: vai para a coluna indicada, não para <coluna>_ms
+COLUNAS_DIFERENCA = {
+    'results': {'time': 'gap_ms'},
+    'sprint_results': {'time': 'gap_ms'},
+}
+
+
+# ------------------------------
+# Colunas renomeadas/derivadas pelos get_* e pelo merge
+# ------------------------------
+ESQUEMA_DERIVADO = {
+    'ano': 'int16',
+    'rodada': 'int8',
+    'data_corrida': DATA,
+    'data_aniversario': DATA,
+    'idade': 'Int16',
+    'numero_do_piloto': 'Int16',
+    'posicao_grid': 'Int8',
+    'posicao_final': 'Int8',
+    'ganho_posicao': 'Int8',
+    'pontos': 'float32',
+    'tipo_corrida': 'category',
+    'status_race': 'category',
+    'nome_equipe': 'category',
+    'nacionalidade_piloto': 'category',
+    'nacionalidade_equipe': 'category',
+}
+
+
+def _inteiro_numpy(tipo: str) -> bool:
+    """Função para saber se o tipo é um inteiro do NumPy (que não aceita nulos)"""
+    return tipo not in (DATA, 'str', 'category') and tipo[0].islower() and np.dtype(tipo).kind in 'iu'
+
+
+def dtypes_leitura(tabela: str) -> dict:
+    """Função para conseguir os tipos passados ao read_csv (datas e texto ficam de fora)"""
+    tipos = {}
+    for col, tipo in ESQUEMA.get(tabela, {}).items():
+        if tipo in (DATA, 'str'):
+            continue
+        # Lê inteiros como anuláveis: um \N inesperado não quebra a leitura
+        tipos[col] = tipo.capitalize() if _inteiro_numpy(tipo) else tipo
+
+    return tipos
+
+
+def colunas_data(tabela: str) -> list:
+    """Função para conseguir as colunas de data de uma tabela"""
+    return [col for col, tipo in ESQUEMA.get(tabela, {}).items() if tipo == DATA]
+
+
+def aplicar_esquema(df: pd.DataFrame, tabela: str = None) -> pd.DataFrame:
+    """Função para garantir que as colunas do DataFrame estão com os tipos do registro"""
+    esquema = {**ESQUEMA_DERIVADO, **ESQUEMA.get(tabela, {})}
+
+    for col, tipo in esquema.items():
+        if col not in df.columns:
+            continue
+
+        serie = df[col]
+        if tipo == DATA:
+            if not pd.api.types.is_datetime64_dtype(serie):
+                df[col] = pd.to_datetime(serie, errors='coerce')
+        elif tipo == 'str':
+            continue
+        elif serie.dtype != tipo:
+            if _inteiro_numpy(tipo) and serie.isna().any():
+                # Inteiro com nulo: usa a versão anulável do mesmo tamanho
+                tipo = tipo.capitalize()
+            df[col] = serie.astype(tipo)
+
+    return df
+
+
+def tabela_vazia(tabela: str) -> pd.DataFrame:
+    """Função para conseguir uma tabela sem linhas, com as colunas e os tipos do registro"""
+    return pd.DataFrame({
+        col: pd.Series(dtype=object if tipo == 'str' else tipo)
+        for col, tipo in ESQUEMA.get(tabela, {}).items()
+    })
@@ -0,0 +1,274 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from scipy import stats
+from utils.data_frames import anexar_linhas, cache_por_tabelas
+from utils.materializacao import materializado
+from utils.prepracao_dados import ids_anexados, merge_tabelas, tabela_companheiros, tabela_corridas
+
+# Nível de confiança dos intervalos
+CONFIANCA = 0.95
+
+
+# ------------------------------
+# Momentos e testes vetorizados
+# ------------------------------
+def momentos(df: pd.DataFrame, chaves: list, coluna: str, prefixo: str = "") -> pd.DataFrame:
+    """Função para conseguir contagem, média e variância amostral de uma coluna por grupo"""
+    # float64 (e não Float64 anulável): os nulos viram NaN e as contas seguem no NumPy
+    df_momentos = df.astype({coluna: 'float64'}).groupby(chaves, observed=True)[coluna].agg(['count', 'mean', 'var'])
+    return df_momentos.rename(columns={'count': f"{prefixo}n", 'mean': f"{prefixo}media", 'var': f"{prefixo}var"})
+
+
+def intervalo_confianca(n: np.ndarray, media: np.ndarray, var: np.ndarray, confianca: float = CONFIANCA) -> tuple:
+    """Função para conseguir os limites do intervalo t de vários grupos de uma vez"""
+    n, media, var = (np.asarray(x, dtype=float) for x in (n, media, var))
+    sem = np.sqrt(var / n)
+
+    with np.errstate(invalid='ignore'):
+        margem = stats.t.ppf((1 + confianca) / 2, n - 1) * sem
+
+    # Igual ao stats.t.interval: sem dispersão (ou sem dados) não há intervalo
+    margem = np.where((n >= 2) & (sem > 0), margem, np.nan)
+    return media - margem, media + margem
+
+
+def teste_welch(n1, media1, var1, n2, media2, var2) -> tuple:
+    """Função para calcular o teste t de Welch unilateral (média 1 < média 2) de vários grupos"""
+    n1, media1, var1, n2, media2, var2 = (np.asarray(x, dtype=float) for x in (n1, media1, var1, n2, media2, var2))
+    a, b = var1 / n1, var2 / n2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_stat = (media1 - media2) / np.sqrt(a + b)
+        graus = (a + b) ** 2 / (a ** 2 / (n1 - 1) + b ** 2 / (n2 - 1))
+        p_val = stats.t.cdf(t_stat, graus)
+
+    # Poucos dados ou os dois grupos sem variação: teste indefinido
+    valido = (n1 >= 2) & (n2 >= 2) & ((var1 > 0) | (var2 > 0))
+    return np.where(valido, t_stat, np.nan), np.where(valido, p_val, np.nan)
+
+
+def comparar_grupos(df: pd.DataFrame, chaves: list, coluna: str = 'posicao_final') -> pd.DataFrame:
+    """Função para comparar piloto x companheiro em todos os grupos (médias, IC e Welch)"""
+    df_stats = momentos(df, chaves, coluna).join(momentos(df, chaves, f"{coluna}_companheiro", prefixo="tm_"))
+
+    df_stats['ic_inferior'], df_stats['ic_superior'] = intervalo_confianca(df_stats['n'], df_stats['media'], df_stats['var'])
+    df_stats['tm_ic_inferior'], df_stats['tm_ic_superior'] = intervalo_confianca(df_stats['tm_n'], df_stats['tm_media'], df_stats['tm_var'])
+    df_stats['diferenca'] = df_stats['media'] - df_stats['tm_media']
+    df_stats['t_stat'], df_stats['p_val'] = teste_welch(
+        df_stats['n'], df_stats['media'], df_stats['var'],
+        df_stats['tm_n'], df_stats['tm_media'], df_stats['tm_var'],
+    )
+
+    # Médias de grupos com menos de 2 corridas não entram na comparação
+    poucos = (df_stats['n'] < 2) | (df_stats['tm_n'] < 2)
+    df_stats.loc[poucos, ['media', 'tm_media', 'diferenca']] = np.nan
+
+    return df_stats.reset_index()
+
+
+# ------------------------------
+# Densidade (KDE) de vários grupos de uma vez
+# ------------------------------
+# Espaçamento da grade comum de avaliação (posições inteiras caem exatamente na grade)
+PASSO_DENSIDADE = 0.05
+
+
+def kde_agrupado(valores: pd.Series, grupos: pd.Series, passo: float = PASSO_DENSIDADE) -> pd.DataFrame:
+    """Função para estimar a densidade (KDE gaussiana) de cada grupo em uma grade comum"""
+    validos = valores.notna() & grupos.notna()
+    codigos, nomes = pd.factorize(grupos[validos], sort=True)
+    pontos, posicao = np.unique(valores[validos].to_numpy(dtype=float), return_inverse=True)
+    if len(pontos) == 0:
+        # Nenhum grupo com valores: não há grade nem curvas
+        return pd.DataFrame(index=pd.Index([], dtype=float, name=valores.name), columns=pd.Index([], name=grupos.name), dtype=float)
+
+    # Contagem de cada valor distinto por grupo: a KDE é uma soma ponderada sobre esses valores
+    contagens = np.bincount(codigos * len(pontos) + posicao, minlength=len(nomes) * len(pontos))
+    contagens = contagens.reshape(len(nomes), len(pontos)).astype(float)
+
+    n = contagens.sum(axis=1)
+    media = contagens @ pontos / n
+
+    # Mesma largura de banda do gaussian_kde padrão (regra de Scott): desvio * n^(-1/5)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (contagens * (pontos - media[:, None]) ** 2).sum(axis=1) / (n - 1)
+        banda = np.sqrt(var) * n ** -0.2
+
+    grade = pontos[0] + passo * np.arange(int(round((pontos[-1] - pontos[0]) / passo)) + 1)
+
+    # Um termo por valor distinto (poucos, já que as posições são inteiras), todos os grupos juntos
+    densidade = np.zeros((len(nomes), len(grade)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k, ponto in enumerate(pontos):
+            densidade += contagens[:, [k]] * np.exp(-0.5 * ((grade - ponto) / banda[:, None]) ** 2)
+        densidade /= (n * banda * np.sqrt(2 * np.pi))[:, None]
+
+    # Fora do intervalo observado de cada grupo (ou sem dispersão) não há curva
+    presentes = contagens > 0
+    minimo = pontos[presentes.argmax(axis=1)]
+    maximo = pontos[len(pontos) - 1 - presentes[:, ::-1].argmax(axis=1)]
+    fora = (grade < minimo[:, None] - 1e-9) | (grade > maximo[:, None] + 1e-9) | ~(banda > 0)[:, None]
+    densidade[fora] = np.nan
+
+    return pd.DataFrame(densidade.T, index=pd.Index(grade, name=valores.name), columns=pd.Index(np.asarray(nomes), name=grupos.name))
+
+
+@cache_por_tabelas(*tabela_corridas.tabelas)
+def densidade_posicoes(driver_id: int, equipes: tuple = None) -> pd.DataFrame:
+    """Função para conseguir a densidade das posições finais de um piloto por equipe"""
+    # Mesmo recorte (2007 em diante) dos outros gráficos da página
+    df = merge_tabelas()
+    df = df[df['driverId'] == driver_id]
+    if equipes is not None:
+        df = df[df['nome_equipe'].isin(equipes)]
+
+    return kde_agrupado(df['posicao_final'], df['nome_equipe'])
+
+
+# ------------------------------
+# Tabelas persistidas (todas as duplas da história)
+# ------------------------------
+CHAVES_DUPLA = ['driverId', 'nome_completo', 'driverId_companheiro', 'nome_completo_companheiro']
+
+
+@materializado('estatisticas_companheiros_temporada', *tabela_companheiros.tabelas, versao=2)
+def estatisticas_companheiros_temporada() -> pd.DataFrame:
+    """Função para comparar cada piloto com cada companheiro, temporada a temporada"""
+    return comparar_grupos(tabela_companheiros(), CHAVES_DUPLA + ['ano'])
+
+
+@estatisticas_companheiros_temporada.incremental
+def _anexar_estatisticas_temporada(df_stats: pd.DataFrame, anexos: dict) -> pd.DataFrame:
+    """Função para refazer só as temporadas que têm resultados novos"""
+    df_corridas = tabela_corridas()
+    anos = df_corridas.loc[df_corridas['raceId'].isin(ids_anexados(anexos, 'raceId')), 'ano'].unique()
+
+    df_pares = tabela_companheiros()
+    df_novos = comparar_grupos(df_pares[df_pares['ano'].isin(anos)], CHAVES_DUPLA + ['ano'])
+
+    df_stats = anexar_linhas(df_stats[~df_stats['ano'].isin(anos)], df_novos)
+    return df_stats.sort_values(CHAVES_DUPLA + ['ano'], ignore_index=True)
+
+
+@materializado('estatisticas_companheiros', *tabela_companheiros.tabelas, versao=2)
+def estatisticas_companheiros() -> pd.DataFrame:
+    """Função para comparar cada piloto com cada companheiro no período completo juntos"""
+    return comparar_grupos(tabela_companheiros(), CHAVES_DUPLA)
+
+
+@estatisticas_companheiros.incremental
+def _anexar_estatisticas(df_stats: pd.DataFrame, anexos: dict) -> pd.DataFrame:
+    """Função para refazer só as duplas dos pilotos que têm resultados novos"""
+    ids = ids_anexados(anexos, 'driverId')
+
+    df_pares = tabela_companheiros()
+    df_novos = comparar_grupos(df_pares[df_pares['driverId'].isin(ids)], CHAVES_DUPLA)
+
+    df_stats = anexar_linhas(df_stats[~df_stats['driverId'].isin(ids)], df_novos)
+    return df_stats.sort_values(CHAVES_DUPLA, ignore_index=True)
+
+
+def ranking_companheiros(minimo_corridas: int = 10, significancia: float = 0.05) -> pd.DataFrame:
+    """Função para ranquear os pilotos pelo número de companheiros superados com significância"""
+    df_stats = estatisticas_companheiros()
+    df_stats = df_stats[(df_stats['n'] >= minimo_corridas) & (df_stats['tm_n'] >= minimo_corridas)]
+
+    df_stats = df_stats.assign(superou=df_stats['p_val'] < significancia)
+    return df_stats.groupby(['driverId', 'nome_completo'], observed=True).agg(
+        companheiros=('driverId_companheiro', 'size'),
+        superados=('superou', 'sum'),
+        diferenca_media=('diferenca', 'mean'),
+    ).reset_index().sort_values(['superados', 'diferenca_media'], ascending=[False, True], ignore_index=True)
+
+
+# ------------------------------
+# Conferência com o scipy.stats
+# ------------------------------
+# Duplas analisadas na página (conferidas além das duplas com mais corridas juntas)
+DUPLAS_CONFERENCIA = (
+    ('Lewis Hamilton', 'Nico Rosberg'),
+    ('Lewis Hamilton', 'Valtteri Bottas'),
+    ('Lewis Hamilton', 'George Russell'),
+)
+
+# Diferença tolerada entre as contas vetorizadas e as do scipy (arredondamento de float)
+TOLERANCIA_SCIPY = 1e-9
+
+
+def conferir_scipy(quantidade: int = 5) -> pd.DataFrame:
+    """Função para comparar o IC e o teste de Welch vetorizados com o scipy.stats em algumas duplas"""
+    df_pares = tabela_companheiros()
+    df_stats = comparar_grupos(df_pares, CHAVES_DUPLA)
+    df_stats = df_stats[(df_stats['n'] >= 2) & (df_stats['tm_n'] >= 2)]
+
+    nomes = list(zip(df_stats['nome_completo'], df_stats['nome_completo_companheiro']))
+    da_pagina = df_stats[[dupla in DUPLAS_CONFERENCIA for dupla in nomes]]
+    df_stats = pd.concat([da_pagina, df_stats.nlargest(quantidade, 'n')]).drop_duplicates(['driverId', 'driverId_companheiro'])
+
+    linhas = []
+    for dupla in df_stats.itertuples():
+        df = df_pares[(df_pares['driverId'] == dupla.driverId) & (df_pares['driverId_companheiro'] == dupla.driverId_companheiro)]
+        x = df['posicao_final'].dropna().to_numpy(dtype=float)
+        y = df['posicao_final_companheiro'].dropna().to_numpy(dtype=float)
+
+        t_stat, p_val = stats.ttest_ind(x, y, equal_var=False, alternative='less')
+        ic = stats.t.interval(CONFIANCA, len(x) - 1, loc=x.mean(), scale=stats.sem(x))
+        tm_ic = stats.t.interval(CONFIANCA, len(y) - 1, loc=y.mean(), scale=stats.sem(y))
+
+        linhas.append({
+            'nome_completo': dupla.nome_completo,
+            'nome_completo_companheiro': dupla.nome_completo_companheiro,
+            'n': dupla.n,
+            'tm_n': dupla.tm_n,
+            'p_val': dupla.p_val,
+            'p_val_scipy': p_val,
+            'diferenca_t': abs(dupla.t_stat - t_stat),
+            'diferenca_p': abs(dupla.p_val - p_val),
+            'diferenca_ic': np.abs(np.r_[dupla.ic_inferior, dupla.ic_superior, dupla.tm_ic_inferior, dupla.tm_ic_superior] - np.r_[ic, tm_ic]).max(),
+        })
+
+    df_conferencia = pd.DataFrame(linhas)
+    df_conferencia['confere'] = df_conferencia[['diferenca_t', 'diferenca_p', 'diferenca_ic']].max(axis=1) <= TOLERANCIA_SCIPY
+    return df_conferencia
+
+
+def conferir_kde(driver_id: int = None) -> pd.DataFrame:
+    """Função para comparar a densidade do kde_agrupado com a do scipy.stats.gaussian_kde em cada equipe"""
+    df = merge_tabelas()
+    if driver_id is not None:
+        df = df[df['driverId'] == driver_id]
+
+    densidades = kde_agrupado(df['posicao_final'], df['nome_equipe'])
+
+    linhas = []
+    for equipe in densidades.columns:
+        curva = densidades[equipe].dropna()
+        posicoes = df.loc[df['nome_equipe'] == equipe, 'posicao_final'].dropna().to_numpy(dtype=float)
+        if curva.empty:
+            # Sem dispersão o gaussian_kde não tem banda: não há o que comparar
+            continue
+
+        esperado = stats.gaussian_kde(posicoes)(curva.index.to_numpy())
+        linhas.append({'nome_equipe': equipe, 'n': len(posicoes), 'diferenca': np.abs(curva.to_numpy() - esperado).max()})
+
+    df_conferencia = pd.DataFrame(linhas, columns=['nome_equipe', 'n', 'diferenca'])
+    df_conferencia['confere'] = df_conferencia['diferenca'] <= TOLERANCIA_SCIPY
+    return df_conferencia
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.estatisticas [minimo_corridas]
+    inicio = time.perf_counter()
+    df_stats = comparar_grupos(tabela_companheiros(), CHAVES_DUPLA + ['ano'])
+    print(f"{len(df_stats)} grupos piloto/companheiro/temporada em {time.perf_counter() - inicio:.2f}s")
+
+    df_conferencia = conferir_scipy()
+    print(df_conferencia.to_string(index=False))
+    print(f"Conferência com o scipy: {(~df_conferencia['confere']).sum()} de {len(df_conferencia)} duplas divergem")
+
+    df_kde = pd.concat([conferir_kde(), conferir_kde(int(tabela_corridas().query("code == 'HAM'")['driverId'].iloc[0]))])
+    print(f"Conferência com o gaussian_kde: {(~df_kde['confere']).sum()} de {len(df_kde)} densidades divergem (diferença máxima {df_kde['diferenca'].max():.2e})")
+
+    print(ranking_companheiros(int(sys.argv[1]) if len(sys.argv) > 1 else 10).head(20).to_string())
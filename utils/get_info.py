@@ -1,6 +1,7 @@
 import pandas as pd
 from datetime import datetime as dt
 from utils.data_frames import *
+from utils.esquema import aplicar_esquema, tabela_vazia
 
 # Variável global
 EQUIPES_CORES = {
@@ -219,37 +220,53 @@ EQUIPES_CORES = {
 }
 
 
+# Renomeando colunas
+RENOMEAR_CORRIDAS = {
+    'year' : 'ano',
+    'round' : 'rodada',
+    'name' : 'nome_gp',
+    'date' : 'data_corrida',
+    'time' : 'largada',
+    'url' : 'wiki_url_corrida',
+    'idade' : 'idade',
+    'nome_completo' : 'nome_completo'
+}
+
+
+@cache_por_tabelas('races')
 def get_info_corrida() -> pd.DataFrame:
     """Função para conseguir informações sobre todos os pilotos"""
-    df_races = data_frames['races'].copy()
+    df_races = data_frames['races']
 
-    # Renomeando colunas
-    colunas = {
-        'year' : 'ano',
-        'round' : 'rodada',
-        'name' : 'nome_gp',
-        'date' : 'data_corrida',
-        'time' : 'largada',
-        'url' : 'wiki_url_corrida',
-        'idade' : 'idade',
-        'nome_completo' : 'nome_completo'
-    }
+    df_races = df_races.rename(columns=RENOMEAR_CORRIDAS)
 
-    df_races = df_races.rename(columns=colunas)
-
-    return df_races
+    return aplicar_esquema(df_races, 'races')
 
 
 # ------------------------------
 # Pilotos
 # ------------------------------
-def get_info_pilotos() -> pd.DataFrame:
-    """Função para conseguir informações sobre todos os pilotos"""
-    df_pilotos = data_frames['drivers'].copy()
+# Colunas desnecessárias
+DESCARTAR_PILOTOS = ['driverRef', 'surname', 'forename']
+
+# Renomeando colunas
+RENOMEAR_PILOTOS = {
+    'driverId' : 'driverId',
+    'number_driver' : 'numero_do_piloto',
+    'code' : 'code',
+    'dob' : 'data_aniversario',
+    'nationality_driver' : 'nacionalidade_piloto',
+    'url_driver' : 'wiki_url_piloto',
+    'idade' : 'idade',
+    'nome_completo' : 'nome_completo'
+}
 
-    # Calcula idade
+
+@cache_por_tabelas('drivers')
+def _info_pilotos() -> pd.DataFrame:
+    """Função para conseguir as informações dos pilotos que só dependem do drivers.csv (sem a idade)"""
+    df_pilotos = data_frames['drivers']
     df_pilotos['dob'] = pd.to_datetime(df_pilotos['dob'])
-    df_pilotos['idade'] = (dt.today() - df_pilotos['dob']).dt.days // 365
 
      # Se já tiver nome_completo, não recria
     if "nome_completo" not in df_pilotos.columns:
@@ -260,266 +277,353 @@ def get_info_pilotos() -> pd.DataFrame:
     df_pilotos['nome_completo'] = df_pilotos['forename'] + " " + df_pilotos['surname']
 
     # Remover colunas desnecessárias
-    df_pilotos.drop(['driverRef', 'surname', 'forename'], axis=1, inplace=True)
+    df_pilotos.drop(DESCARTAR_PILOTOS, axis=1, inplace=True)
 
-    # Renomeando colunas
-    colunas = {
-        'driverId' : 'driverId',
-        'number_driver' : 'numero_do_piloto',
-        'code' : 'code',
-        'dob' : 'data_aniversario',
-        'nationality_driver' : 'nacionalidade_piloto',
-        'url_driver' : 'wiki_url_piloto',
-        'idade' : 'idade',
-        'nome_completo' : 'nome_completo'
-    }
+    df_pilotos = df_pilotos.rename(columns=RENOMEAR_PILOTOS)
 
-    df_pilotos = df_pilotos.rename(columns=colunas)
+    return aplicar_esquema(df_pilotos, 'drivers')
 
-    return df_pilotos
+
+def get_info_pilotos() -> pd.DataFrame:
+    """Função para conseguir informações sobre todos os pilotos"""
+    df_pilotos = _info_pilotos()
+
+    # Calcula idade a cada chamada (fora do cache, que só muda com o drivers.csv)
+    idade = (dt.today() - df_pilotos['data_aniversario']).dt.days // 365
+    df_pilotos.insert(df_pilotos.columns.get_loc('nome_completo'), 'idade', idade)
+
+    return aplicar_esquema(df_pilotos, 'drivers')
 
 
 # ------------------------------
 # Time
 # ------------------------------
-def get_info_time(cores_equipe: dict[list] = EQUIPES_CORES) -> pd.DataFrame:
+# Colunas desnecessárias
+DESCARTAR_EQUIPES = ['constructorRef', 'url_circuit']
+
+# Renomeando colunas
+RENOMEAR_EQUIPES = {
+    'constructorId' : 'constructorId',
+    'name_constructor' : 'nome_equipe',
+    'nationality_constructor' : 'nacionalidade_equipe'
+}
+
+
+@cache_por_tabelas('constructors')
+def get_info_time() -> pd.DataFrame:
     """Função para conseguir informações sobre todas as equipes"""
-    df_equipes = data_frames['constructors'].copy()
+    df_equipes = data_frames['constructors']
 
     # Remove colunas desnecessárias
-    df_equipes.drop(['constructorRef', 'url_circuit'], axis=1, inplace=True)
+    df_equipes.drop(DESCARTAR_EQUIPES, axis=1, inplace=True)
+
+    df_equipes = df_equipes.rename(columns=RENOMEAR_EQUIPES)
 
-    # Renomeando colunas
-    colunas = {
-        'constructorId' : 'constructorId',
-        'name_constructor' : 'nome_equipe',
-        'nationality_constructor' : 'nacionalidade_equipe'
-    }
+    return aplicar_esquema(df_equipes, 'constructors')
 
-    df_equipes = df_equipes.rename(columns=colunas)
 
-    # Usando o método .map() para associar as cores às equipes
-    df_equipes['cores'] = df_equipes['nome_equipe'].map(cores_equipe)  
+# ------------------------------
+# Paleta de cores das equipes
+# ------------------------------
+COR_PADRAO = "#808080"  # Cinza para equipes sem cor cadastrada
+COR_SECUNDARIA_PADRAO = "#000000"  # Preto quando a equipe só tem uma cor
+
+
+@cache_por_tabelas('constructors')
+def get_paleta_equipes(cores_equipe: dict[list] = EQUIPES_CORES) -> pd.DataFrame:
+    """Função para conseguir a paleta (cor primária e secundária) de cada equipe, por constructorId"""
+    df_paleta = data_frames['constructors'][['constructorId', 'name_constructor']]
+
+    # Uma linha por equipe, com as cores em colunas de tamanho fixo (categóricas)
+    nomes = df_paleta['name_constructor'].astype(object)
+    df_paleta = pd.DataFrame({
+        'constructorId': df_paleta['constructorId'],
+        'nome_equipe': df_paleta['name_constructor'],
+        'cor_primaria': nomes.map(lambda nome: cores_equipe.get(nome, [COR_PADRAO])[0]),
+        'cor_secundaria': nomes.map(lambda nome: (cores_equipe.get(nome, []) + [COR_SECUNDARIA_PADRAO])[1]),
+    })
+
+    df_paleta['cor_primaria'] = df_paleta['cor_primaria'].astype('category')
+    df_paleta['cor_secundaria'] = df_paleta['cor_secundaria'].astype('category')
+
+    return df_paleta.set_index('constructorId', drop=False)
+
+
+def juntar_cores(df: pd.DataFrame) -> pd.DataFrame:
+    """Função para juntar as cores da equipe ao DataFrame (feito só na hora de plotar)"""
+    df_paleta = get_paleta_equipes()[['constructorId', 'cor_primaria', 'cor_secundaria']]
+    return df.merge(df_paleta.reset_index(drop=True), on='constructorId', how='left')
 
-    return df_equipes
+
+def get_cor_equipe(constructor_id: int, coluna: str = 'cor_primaria') -> str:
+    """Função para conseguir a cor de uma equipe pelo constructorId"""
+    df_paleta = get_paleta_equipes()
+    if constructor_id not in df_paleta.index:
+        return COR_PADRAO if coluna == 'cor_primaria' else COR_SECUNDARIA_PADRAO
+
+    return df_paleta.at[constructor_id, coluna]
 
 
 # ------------------------------
 # Tempo de Volta
 # ------------------------------
+# Renomeando colunas
+RENOMEAR_TEMPO_VOLTA = {
+    'raceId' : 'raceId',
+    'driverId' : 'driverId',
+    'lap' : 'lap',
+    'position' : 'posicao',
+    'time' : 'lap_time',
+    'milliseconds' : 'ms_lap_time',
+}
+
+
+@cache_por_tabelas('lap_times')
 def get_lap_time() -> pd.DataFrame:
     """Função para conseguir informações sobre os tempos de volta"""
-    df_lap_time = data_frames['lap_times'].copy()
-
-    # Renomeando colunas
-    colunas = {
-        'raceId' : 'raceId',
-        'driverId' : 'driverId',
-        'lap' : 'lap',
-        'position' : 'posicao',
-        'time' : 'lap_time',
-        'milliseconds' : 'ms_lap_time',
-    }
+    # O CSV de voltas é opcional (e grande): sem ele, tabela vazia com as colunas certas
+    if 'lap_times' not in data_frames:
+        df_lap_time = tabela_vazia('lap_times')
+    else:
+        df_lap_time = data_frames['lap_times']
 
-    df_lap_time = df_lap_time.rename(columns=colunas)
+    df_lap_time = df_lap_time.rename(columns=RENOMEAR_TEMPO_VOLTA)
 
-    return df_lap_time
+    return aplicar_esquema(df_lap_time, 'lap_times')
 
 # ------------------------------
 # Status ao Final da Corrida
 # ------------------------------
+# Renomeando colunas
+RENOMEAR_STATUS = {
+    'status' : 'status_race'
+}
+
+
+@cache_por_tabelas('status')
 def get_status_race() -> pd.DataFrame:
     """Função para conseguir a informação sobre o status do piloto"""
-    df_status_race = data_frames['status'].copy()
-
-    # Renomeando colunas
-    colunas = {
-        'status' : 'status_race'
-    }
+    df_status_race = data_frames['status']
 
-    df_status_race = df_status_race.rename(columns=colunas)
+    df_status_race = df_status_race.rename(columns=RENOMEAR_STATUS)
 
-    return df_status_race
+    return aplicar_esquema(df_status_race, 'status')
 
 # -------------------------------------
 # Classificação dos Pilotos no Mundial
 # --------------------------------------
+# Renomeando colunas
+RENOMEAR_CLASSIFICACAO_PILOTOS = {
+    'points' : 'pontos',
+    'position' : 'posicao_mundial',
+    'win' : 'vitorias'
+}
+
+
+@cache_por_tabelas('driver_standings')
 def get_drivers_standing() -> pd.DataFrame:
     """Função para conseguir a informação sobre a classificação dos pilotos"""
-    df_drivers_standing = data_frames['driver_standings'].copy()
+    df_drivers_standing = data_frames['driver_standings']
 
-    # Renomeando colunas
-    colunas = {
-        'points' : 'pontos',
-        'position' : 'posicao_mundial',
-        'win' : 'vitorias'
-    }
+    df_drivers_standing = df_drivers_standing.rename(columns=RENOMEAR_CLASSIFICACAO_PILOTOS)
 
-    df_drivers_standing = df_drivers_standing.rename(columns=colunas)
-
-    return df_drivers_standing
+    return aplicar_esquema(df_drivers_standing, 'driver_standings')
 
 
 # -------------------------------------
 # Temporadas
 # --------------------------------------
+# Renomeando colunas
+RENOMEAR_TEMPORADAS = {
+    'year' : 'ano',
+    'url' : 'url_temporada',
+}
+
+
+@cache_por_tabelas('seasons')
 def get_seasons() -> pd.DataFrame:
     """Função para conseguir a informação sobre as temporadas"""
-    df_seasons = data_frames['seasons'].copy()
+    df_seasons = data_frames['seasons']
 
-    # Renomeando colunas
-    colunas = {
-        'year' : 'ano',
-        'url' : 'url_temporada',
-    }
+    df_seasons = df_seasons.rename(columns=RENOMEAR_TEMPORADAS)
 
-    df_seasons = df_seasons.rename(columns=colunas)
-
-    return df_seasons
+    return aplicar_esquema(df_seasons, 'seasons')
 
 
 # -------------------------------------
 # Paradas ou Pit Stops
 # --------------------------------------
+# Renomeando colunas
+RENOMEAR_PIT_STOPS = {
+    'stop' : 'qtd_paradas',
+    'time' : 'time_pit_stop',
+    'duration' : 'duracao_pit_stop',
+    'milliseconds' : 'ms_pit_stop',
+    'duration_ms' : 'ms_duracao_pit_stop',
+}
+
+
+@cache_por_tabelas('pit_stops')
 def get_pit_stops() -> pd.DataFrame:
     """Função para conseguir a informação sobre os PitStops"""
-    df_pit_stops = data_frames['pit_stops'].copy()
+    df_pit_stops = data_frames['pit_stops']
 
     # Transformando unidades
     df_pit_stops['milliseconds'] = (df_pit_stops['milliseconds']) / 1000
 
-    # Renomeando colunas
-    colunas = {
-        'stop' : 'qtd_paradas',
-        'time' : 'time_pit_stop',
-        'duration' : 'duracao_pit_stop',
-        'milliseconds' : 'ms_pit_stop',
-    }
+    df_pit_stops = df_pit_stops.rename(columns=RENOMEAR_PIT_STOPS)
 
-    df_pit_stops = df_pit_stops.rename(columns=colunas)
-
-    return df_pit_stops
+    return aplicar_esquema(df_pit_stops, 'pit_stops')
 
 
 # -------------------------------------
 # Resultados da Sprint
 # --------------------------------------
+# Colunas desnecessárias
+DESCARTAR_SPRINTS = ['positionText']
+
+# Renomeando colunas
+RENOMEAR_SPRINTS = {
+    'number' : 'numero_do_piloto',
+    'grid' : 'posicao_grid',
+    'position' : 'posicao_final',
+    'points' : 'pontos',
+    'time' : 'tempo_volta_ultima',
+    'milliseconds' : 'ms_volta_ultima',
+    'fastestLap' : 'volta_rapida',
+    'fastestLapTime' : 'volta_rapida_tempo',
+    'time_ms' : 'ms_tempo_volta_ultima',
+    'gap_ms' : 'ms_diferenca_vencedor',
+    'fastestLapTime_ms' : 'ms_volta_rapida_tempo',
+}
+
+
+@cache_por_tabelas('sprint_results')
 def get_sprints_results() -> pd.DataFrame:
     """Função para conseguir a informação sobre o resultado das sprints"""
-    df_sprints_results = data_frames['sprint_results'].copy()
+    df_sprints_results = data_frames['sprint_results']
 
     # Remove colunas desnecessárias
-    df_sprints_results.drop(['positionText'], axis=1, inplace=True)
+    df_sprints_results.drop(DESCARTAR_SPRINTS, axis=1, inplace=True)
     
-    # Renomeando colunas
-    colunas = {
-        'number' : 'numero_do_piloto',
-        'grid' : 'posicao_grid',
-        'position' : 'posicao_final',
-        'points' : 'pontos',
-        'time' : 'tempo_volta_ultima',
-        'milliseconds' : 'ms_volta_ultima',
-        'fastestLap' : 'volta_rapida',
-        'fastestLapTime' : 'volta_rapida_tempo',
-    }
-
-    df_sprints_results = df_sprints_results.rename(columns=colunas)
+
+    df_sprints_results = df_sprints_results.rename(columns=RENOMEAR_SPRINTS)
 
     # Tipo
     df_sprints_results['tipo_corrida'] = 'Sprint'
 
-    return df_sprints_results
+    return aplicar_esquema(df_sprints_results, 'sprint_results')
 
 
 # -------------------------------------
 # Classificação das Time
 # --------------------------------------
+# Renomeando colunas
+RENOMEAR_CLASSIFICACAO_EQUIPES = {
+    'points' : 'pontos_time',
+    'position' : 'posicao_mundial_time',
+    'wins' : 'vitorias_time',
+}
+
+
+@cache_por_tabelas('constructor_standings')
 def get_time_standing() -> pd.DataFrame:
     """Função para conseguir a informação sobre a classificação dos times"""
-    df_time_standing = data_frames['constructor_standings'].copy()
-
-    # Renomeando colunas
-    colunas = {
-        'points' : 'pontos_time',
-        'position' : 'posicao_mundial_time',
-        'wins' : 'vitorias_time',
-    }
+    df_time_standing = data_frames['constructor_standings']
 
-    df_time_standing = df_time_standing.rename(columns=colunas)
+    df_time_standing = df_time_standing.rename(columns=RENOMEAR_CLASSIFICACAO_EQUIPES)
 
-    return df_time_standing
+    return aplicar_esquema(df_time_standing, 'constructor_standings')
 
 
 # -------------------------------------
 # Resultados das Corridas
 # --------------------------------------
+# Colunas desnecessárias
+DESCARTAR_RESULTADOS = ['rank', 'fastestLapSpeed', 'positionText']
+
+# Renomeando colunas
+RENOMEAR_RESULTADOS = {
+    'number_driver_season' : 'numero_do_piloto',
+    'grid' : 'posicao_grid',
+    'position' : 'posicao_final',
+    'points' : 'pontos',
+    'time' : 'tempo_volta_ultima',
+    'milliseconds' : 'ms_volta_ultima',
+    'fastestLap' : 'volta_rapida',
+    'fastestLapTime' : 'volta_rapida_tempo',
+    'time_ms' : 'ms_tempo_volta_ultima',
+    'gap_ms' : 'ms_diferenca_vencedor',
+    'fastestLapTime_ms' : 'ms_volta_rapida_tempo',
+}
+
+
+@cache_por_tabelas('results')
 def get_race_results() -> pd.DataFrame:
     """Função para conseguir a informação sobre os resultados das corridas"""
-    df_race_results = data_frames['results'].copy()
+    df_race_results = data_frames['results']
     
     # Remove colunas desnecessárias
-    df_race_results.drop(['rank', 'fastestLapSpeed', 'positionText'], axis=1, inplace=True)
-
-    # Renomeando colunas
-    colunas = {
-        'number_driver_season' : 'numero_do_piloto',
-        'grid' : 'posicao_grid',
-        'position' : 'posicao_final',
-        'points' : 'pontos',
-        'time' : 'tempo_volta_ultima',
-        'milliseconds' : 'ms_volta_ultima',
-        'fastestLap' : 'volta_rapida',
-        'fastestLapTime' : 'volta_rapida_tempo',
-    }
-
-    df_race_results = df_race_results.rename(columns=colunas)
+    df_race_results.drop(DESCARTAR_RESULTADOS, axis=1, inplace=True)
+
+    df_race_results = df_race_results.rename(columns=RENOMEAR_RESULTADOS)
 
     # Tipo de Corrida
     df_race_results['tipo_corrida'] = 'Corrida_Principal'
 
-    return df_race_results
+    return aplicar_esquema(df_race_results, 'results')
 
 
 # -------------------------------------
 # Circuitos
 # --------------------------------------
+# Colunas desnecessárias
+DESCARTAR_CIRCUITOS = ['circuitRef', 'alt']
+
+# Renomeando colunas
+RENOMEAR_CIRCUITOS = {
+    'name_circuit' : 'nome_circuito',
+    'location' : 'cidade',
+    'country' : 'pais',
+    'lng' : 'long',
+    'url' : 'url_circuito',
+}
+
+
+@cache_por_tabelas('circuits')
 def get_circuits() -> pd.DataFrame:
     """Função para conseguir a informação sobre os circuitos"""
-    df_circuit = data_frames['circuits'].copy()
+    df_circuit = data_frames['circuits']
     
     # Remove colunas desnecessárias
-    df_circuit.drop(['circuitRef', 'alt'], axis=1, inplace=True)
-
-    # Renomeando colunas
-    colunas = {
-        'name_circuit' : 'nome_circuito',
-        'location' : 'cidade',
-        'country' : 'pais',
-        'lng' : 'long',
-        'url' : 'url_circuito',
-    }
+    df_circuit.drop(DESCARTAR_CIRCUITOS, axis=1, inplace=True)
 
-    df_circuit = df_circuit.rename(columns=colunas)
+    df_circuit = df_circuit.rename(columns=RENOMEAR_CIRCUITOS)
 
-    return df_circuit
+    return aplicar_esquema(df_circuit, 'circuits')
 
 
 # -------------------------------------
 # Qualificação
 # --------------------------------------
+# Renomeando colunas
+RENOMEAR_QUALIFICACAO = {
+    'number_driver_season' : 'numero_do_piloto',
+    'position' : 'posicao_grid',
+    'q1_ms' : 'ms_q1',
+    'q2_ms' : 'ms_q2',
+    'q3_ms' : 'ms_q3',
+}
+
+
+@cache_por_tabelas('qualifying')
 def get_qualifying() -> pd.DataFrame:
     """Função para conseguir a informação sobre das qualificações"""
-    df_qualifying = data_frames['qualifying'].copy()
-
-    # Renomeando colunas
-    colunas = {
-        'number_driver_season' : 'numero_do_piloto',
-        'position' : 'posicao_grid',
-    }
+    df_qualifying = data_frames['qualifying']
 
-    df_qualifying = df_qualifying.rename(columns=colunas)
+    df_qualifying = df_qualifying.rename(columns=RENOMEAR_QUALIFICACAO)
 
-    return df_qualifying
+    return aplicar_esquema(df_qualifying, 'qualifying')
 
 # df = get_qualifying()
 # print(df)
@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from utils.data_frames import versao_tabela
+
+# ------------------------------
+# Colunas auxiliares dos gráficos (vetorizadas)
+# ------------------------------
+# Posição usada no gráfico quando o piloto não terminou (fica abaixo do grid)
+POSICAO_NAO_TERMINOU = 25
+
+# Ganho usado no gráfico de barras quando o piloto não terminou (barra negativa destacada)
+GANHO_NAO_TERMINOU = -10
+
+
+def status_corrida(posicao_final: pd.Series) -> pd.Series:
+    """Função para classificar cada corrida em 'Terminou' ou 'Desqualificado'"""
+    status = np.where(posicao_final.isna().to_numpy(), "Desqualificado", "Terminou")
+    return pd.Series(status, index=posicao_final.index, name="status_corrida")
+
+
+def posicao_plot(posicao_final: pd.Series) -> pd.Series:
+    """Função para conseguir a posição final com os não classificados no fim do gráfico"""
+    return posicao_final.fillna(POSICAO_NAO_TERMINOU)
+
+
+def ganho_plot(df: pd.DataFrame) -> pd.Series:
+    """Função para conseguir o ganho de posições, com valor fixo para quem não terminou"""
+    return df["ganho_posicao"].where(df["posicao_final"].notna(), GANHO_NAO_TERMINOU)
+
+
+def posicao_histograma(posicao_final: pd.Series) -> pd.Series:
+    """Função para conseguir a posição final como texto de categoria do histograma"""
+    return posicao_final.astype(object).fillna("Desqualificado")
+
+
+def colunas_grafico(df: pd.DataFrame) -> pd.DataFrame:
+    """Função para adicionar todas as colunas auxiliares dos gráficos de uma vez"""
+    return df.assign(
+        posicao_plot=posicao_plot(df["posicao_final"]),
+        status_corrida=status_corrida(df["posicao_final"]),
+        ganho_plot=ganho_plot(df),
+    )
+
+
+# ------------------------------
+# Cache de figuras (LRU, guardadas como JSON)
+# ------------------------------
+# Quantidade máxima de figuras guardadas (as usadas há mais tempo saem primeiro)
+MAX_FIGURAS = 128
+
+_FIGURAS = OrderedDict()
+_TRAVA_FIGURAS = threading.Lock()
+
+
+def figura_cacheada(chave: tuple, tabelas: tuple, construtor):
+    """Função para reaproveitar uma figura já montada até alguma das tabelas mudar no disco"""
+    chave = (chave, tuple(versao_tabela(nome) for nome in tabelas))
+
+    with _TRAVA_FIGURAS:
+        spec = _FIGURAS.get(chave)
+        if spec is not None:
+            _FIGURAS.move_to_end(chave)
+
+    if spec is None:
+        # Só aqui o pandas e o Plotly trabalham; depois a figura vem pronta do JSON
+        spec = construtor().to_json()
+        with _TRAVA_FIGURAS:
+            _FIGURAS[chave] = spec
+            _FIGURAS.move_to_end(chave)
+            while len(_FIGURAS) > MAX_FIGURAS:
+                _FIGURAS.popitem(last=False)
+
+    return pio.from_json(spec)
+
+
+def figura_em_cache(*tabelas: str):
+    """Decorador para guardar a figura de uma função pelos argumentos e versões das tabelas"""
+    def decorador(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            chave = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(chave)
+            except TypeError:
+                # Argumentos não hashable (ex.: DataFrames) não passam pelo cache
+                return func(*args, **kwargs)
+
+            return figura_cacheada(chave, tabelas, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorador
+
+
+def limpar_figuras() -> None:
+    """Função para esvaziar o cache de figuras"""
+    with _TRAVA_FIGURAS:
+        _FIGURAS.clear()
+
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+import time
+from utils.classificacao import conferir_classificacoes, temporadas_divergentes
+from utils.data_frames import (
+    caminho_colunar, caminho_tabela, carregar_tabela, data_frames, impressao_tabela, ler_csv, ler_manifesto, versao_tabela,
+)
+from utils.elo import tabela_elo
+from utils.esquema import VERSAO_ESQUEMA
+from utils.estatisticas import estatisticas_companheiros, estatisticas_companheiros_temporada
+from utils.prepracao_dados import resumo_carreiras, tabela_companheiros, tabela_corridas
+from utils.stints import tabela_perdas_pit, tabela_stints
+from utils.voltas import particionar_voltas, particoes_em_dia
+
+
+def converter_para_colunar(nomes: list = None, ler=ler_csv) -> dict:
+    """Função para converter os CSV da pasta data/ em Parquet tipado"""
+    pasta = caminho_colunar()
+    os.makedirs(pasta, exist_ok=True)
+
+    arquivo_manifesto = os.path.join(pasta, "manifesto.json")
+    manifesto = {}
+    if os.path.exists(arquivo_manifesto):
+        with open(arquivo_manifesto, encoding="utf-8") as f:
+            manifesto = json.load(f)
+
+    if nomes is None:
+        nomes = list(data_frames)
+
+    for nome in nomes:
+        versao = versao_tabela(nome)
+        if versao is None:
+            print(f"Tabela '{nome}' não encontrada em {caminho_tabela(nome)}")
+            continue
+
+        # Voltas: lidas em blocos e gravadas por temporada (nunca a tabela inteira na memória)
+        if nome == 'lap_times':
+            particionar_voltas()
+            continue
+
+        # Por padrão lê direto do CSV (o Parquet antigo pode estar desatualizado)
+        df = ler(nome)
+
+        temporario = os.path.join(pasta, f"{nome}.parquet.tmp")
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, os.path.join(pasta, f"{nome}.parquet"))
+
+        manifesto[nome] = [*versao, VERSAO_ESQUEMA, impressao_tabela(nome, versao[1]).hex()]
+
+    temporario = f"{arquivo_manifesto}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2)
+    os.replace(temporario, arquivo_manifesto)
+
+    return manifesto
+
+
+def ingerir_anexos(nomes: list = None) -> dict:
+    """Função para ingerir só as linhas novas dos CSV e atualizar as tabelas derivadas"""
+    # Só as tabelas cujo CSV mudou desde o último Parquet (ex.: results, qualifying, pit_stops...)
+    manifesto = ler_manifesto()
+    nomes = [
+        nome for nome in (nomes or list(data_frames))
+        if versao_tabela(nome) is not None and not (
+            particoes_em_dia() if nome == 'lap_times'
+            else manifesto.get(nome, ())[:3] == (*versao_tabela(nome), VERSAO_ESQUEMA)
+        )
+    ]
+
+    # Parquet antigo + trecho novo do CSV (carregar_tabela só lê o texto anexado)
+    manifesto = converter_para_colunar(nomes, ler=carregar_tabela)
+
+    # Cada tabela materializada junta só as linhas novas à versão salva anterior
+    tempos = {}
+    for tabela in (tabela_corridas, resumo_carreiras, tabela_companheiros, estatisticas_companheiros_temporada, estatisticas_companheiros,
+                   tabela_stints, tabela_perdas_pit, tabela_elo):
+        inicio = time.perf_counter()
+        tabela()
+        tempos[tabela.__name__] = time.perf_counter() - inicio
+
+    # Classificações recalculadas dos resultados, conferidas com as publicadas
+    inicio = time.perf_counter()
+    df_conferencia = conferir_classificacoes()
+    tempos['conferir_classificacoes'] = time.perf_counter() - inicio
+
+    return {'tabelas': nomes, 'tempos': tempos, 'conferencia': df_conferencia}
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.ingestao [tabela ...]          (converte tudo de novo)
+    #      python -m utils.ingestao --anexos [tabela ...]  (só as linhas novas de cada GP)
+    inicio = time.perf_counter()
+    if sys.argv[1:2] == ["--anexos"]:
+        resultado = ingerir_anexos(sys.argv[2:] or None)
+        for nome, tempo in resultado['tempos'].items():
+            print(f"{nome:>40}: {tempo * 1000:.1f}ms")
+        print(f"Ingestão incremental em {time.perf_counter() - inicio:.2f}s")
+    else:
+        convertidas = converter_para_colunar(sys.argv[1:] or None)
+        print(f"{len(convertidas)} tabelas em {caminho_colunar()} ({time.perf_counter() - inicio:.2f}s)")
+
+    df_divergentes = temporadas_divergentes(conferir_classificacoes())
+    if not df_divergentes.empty:
+        print(df_divergentes.to_string(index=False))
+    print(f"Classificações: {len(df_divergentes)} temporadas diferem das publicadas (driver_standings/constructor_standings)")
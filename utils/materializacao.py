@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import threading
+from functools import wraps
+from glob import glob
+import pandas as pd
+from utils.data_frames import (
+    caminho_dados, caminho_tabela, foi_anexada, impressao_tabela, ler_csv_anexado, versao_tabela, visao_somente_leitura,
+)
+from utils.esquema import VERSAO_ESQUEMA
+
+# ------------------------------
+# Cache das tabelas materializadas
+# ------------------------------
+_HASHES = {}
+_MATERIALIZADOS = {}
+_TRAVA = threading.RLock()
+
+
+def caminho_cache() -> str:
+    """Função para conseguir a pasta onde as tabelas materializadas ficam salvas"""
+    return os.path.join(caminho_dados(), "cache")
+
+
+def hash_tabela(nome: str) -> str:
+    """Função para conseguir o hash do conteúdo do CSV (recalculado só se o arquivo mudar)"""
+    versao = versao_tabela(nome)
+    if versao is None:
+        return "ausente"
+
+    em_cache = _HASHES.get(nome)
+    if em_cache is not None and em_cache[0] == versao:
+        return em_cache[1]
+
+    sha = hashlib.sha256()
+    with open(caminho_tabela(nome), "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloco)
+
+    _HASHES[nome] = (versao, sha.hexdigest())
+    return _HASHES[nome][1]
+
+
+def hash_entradas(tabelas: tuple, versao: int = 1) -> str:
+    """Função para combinar os hashes das tabelas de entrada em uma única chave"""
+    # A versão do esquema entra na chave: mudar um tipo invalida as tabelas salvas
+    sha = hashlib.sha256(f"v{versao}-e{VERSAO_ESQUEMA}".encode())
+    for nome in tabelas:
+        sha.update(f"{nome}:{hash_tabela(nome)};".encode())
+
+    return sha.hexdigest()
+
+
+def _salvar(df: pd.DataFrame, arquivo: str, estado: dict) -> None:
+    """Função para salvar a tabela de forma atômica (outro processo nunca lê arquivo pela metade)"""
+    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+    temporario = f"{arquivo}.{os.getpid()}.tmp"
+    df.to_pickle(temporario)
+    os.replace(temporario, arquivo)
+
+    # Ao lado da tabela: de onde ela veio, para a próxima versão só processar as linhas novas
+    temporario = f"{arquivo_estado(arquivo)}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(temporario, arquivo_estado(arquivo))
+
+
+def arquivo_estado(arquivo: str) -> str:
+    """Função para conseguir o arquivo com o estado das entradas de uma tabela materializada"""
+    return f"{os.path.splitext(arquivo)[0]}.json"
+
+
+def _limpar_versoes_antigas(nome: str, arquivo_atual: str) -> None:
+    """Função para remover as versões antigas de uma tabela materializada"""
+    for arquivo in glob(os.path.join(caminho_cache(), f"{nome}-*.pkl")):
+        if arquivo != arquivo_atual:
+            for antigo in (arquivo, arquivo_estado(arquivo)):
+                try:
+                    os.remove(antigo)
+                except OSError:
+                    pass
+
+
+# ------------------------------
+# Atualização incremental (CSV que só ganharam linhas no fim)
+# ------------------------------
+def estado_entradas(tabelas: tuple, versao: int = 1) -> dict:
+    """Função para registrar o hash, o tamanho e os bytes finais de cada CSV de entrada"""
+    entradas = {}
+    for nome in tabelas:
+        versao_csv = versao_tabela(nome)
+        if versao_csv is None:
+            continue
+
+        entradas[nome] = {
+            'hash': hash_tabela(nome),
+            'tamanho': versao_csv[1],
+            'impressao': impressao_tabela(nome, versao_csv[1]).hex(),
+        }
+
+    return {'versao': f"v{versao}-e{VERSAO_ESQUEMA}", 'entradas': entradas}
+
+
+def linhas_anexadas(anterior: dict, atual: dict) -> dict | None:
+    """Função para conseguir as linhas novas de cada entrada (None se alguma mudou de outro jeito)"""
+    if anterior['versao'] != atual['versao']:
+        return None
+
+    anexos = {}
+    for nome, entrada in atual['entradas'].items():
+        antes = anterior['entradas'].get(nome)
+        if antes is None:
+            return None
+        if antes['hash'] == entrada['hash']:
+            continue
+        if not foi_anexada(nome, antes['tamanho'], bytes.fromhex(antes['impressao'])):
+            return None
+
+        anexos[nome] = ler_csv_anexado(nome, antes['tamanho'], entrada['tamanho'])
+
+    # Uma entrada que sumiu também exige reconstruir
+    return anexos if set(anterior['entradas']) <= set(atual['entradas']) else None
+
+
+def _versao_anterior(nome: str, arquivo_atual: str) -> tuple | None:
+    """Função para conseguir a última versão salva de uma tabela (tabela e estado das entradas)"""
+    salvas = [
+        arquivo for arquivo in glob(os.path.join(caminho_cache(), f"{nome}-*.pkl"))
+        if arquivo != arquivo_atual and os.path.exists(arquivo_estado(arquivo))
+    ]
+    if not salvas:
+        return None
+
+    arquivo = max(salvas, key=os.path.getmtime)
+    try:
+        with open(arquivo_estado(arquivo), encoding="utf-8") as f:
+            estado = json.load(f)
+        return pd.read_pickle(arquivo), estado
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def materializar(nome: str, tabelas: tuple, construtor, versao: int = 1, incremental=None) -> pd.DataFrame:
+    """Função para construir uma tabela uma única vez e reaproveitá-la até alguma entrada mudar"""
+    chave = hash_entradas(tabelas, versao)
+
+    with _TRAVA:
+        em_memoria = _MATERIALIZADOS.get(nome)
+        if em_memoria is not None and em_memoria[0] == chave:
+            return visao_somente_leitura(em_memoria[1])
+
+        arquivo = os.path.join(caminho_cache(), f"{nome}-{chave[:16]}.pkl")
+        estado = estado_entradas(tabelas, versao)
+
+        if os.path.exists(arquivo):
+            df = pd.read_pickle(arquivo)
+        else:
+            df = None
+
+            # Entradas que só ganharam linhas: atualiza a versão anterior em vez de refazer tudo
+            anterior = em_memoria[1:] if em_memoria is not None else _versao_anterior(nome, arquivo)
+            if incremental is not None and anterior is not None:
+                anexos = linhas_anexadas(anterior[1], estado)
+                if anexos is not None:
+                    df = incremental(visao_somente_leitura(anterior[0]), anexos)
+
+            if df is None:
+                df = construtor()
+
+            _salvar(df, arquivo, estado)
+            _limpar_versoes_antigas(nome, arquivo)
+
+        _MATERIALIZADOS[nome] = (chave, df, estado)
+
+    return visao_somente_leitura(df)
+
+
+def versao_materializada(nome: str) -> str | None:
+    """Função para conseguir a chave da versão em memória de uma tabela materializada"""
+    em_memoria = _MATERIALIZADOS.get(nome)
+    return None if em_memoria is None else em_memoria[0]
+
+
+def materializado(nome: str, *tabelas: str, versao: int = 1):
+    """Decorador para materializar o retorno de uma função sem argumentos"""
+    def decorador(func):
+        atualizacao = {}
+
+        @wraps(func)
+        def wrapper() -> pd.DataFrame:
+            return materializar(nome, tabelas, func, versao, atualizacao.get('func'))
+
+        def incremental(atualizar):
+            """Registra a função que junta as linhas novas das entradas à versão anterior da tabela"""
+            atualizacao['func'] = atualizar
+            return atualizar
+
+        wrapper.tabelas = tabelas
+        wrapper.incremental = incremental
+        return wrapper
+
+    return decorador
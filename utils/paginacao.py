@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Quantidade máxima de índices de tabela guardados (os usados há mais tempo saem primeiro)
+MAX_INDICES = 16
+
+_INDICES = OrderedDict()
+_TRAVA_INDICES = threading.Lock()
+
+
+# ------------------------------
+# Índice (ordenação e filtro no servidor)
+# ------------------------------
+class IndiceTabela:
+    """Ordenações pré-calculadas de um DataFrame para servir só a página visível"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._ordens = {}
+
+    def ordem(self, coluna: str | None, crescente: bool = True) -> np.ndarray:
+        """Posições das linhas ordenadas pela coluna (calculadas uma vez por coluna)"""
+        if coluna is None:
+            return np.arange(len(self.df))
+
+        if coluna not in self._ordens:
+            # Estável e com nulos no fim, como o sort_values
+            self._ordens[coluna] = self.df[coluna].reset_index(drop=True).sort_values(kind='stable', na_position='last').index.to_numpy()
+
+        ordem = self._ordens[coluna]
+        if crescente:
+            return ordem
+
+        # Decrescente mantendo os nulos no fim
+        nulos = self.df[coluna].isna().to_numpy()[ordem]
+        return np.concatenate([ordem[~nulos][::-1], ordem[nulos]])
+
+    def filtro(self, coluna: str | None, texto: str) -> np.ndarray | None:
+        """Máscara das linhas cuja coluna contém o texto (números comparam o valor exato)"""
+        if coluna is None or not texto:
+            return None
+
+        serie = self.df[coluna]
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            valor = pd.to_numeric(texto.replace(",", "."), errors='coerce')
+            return serie.eq(valor).fillna(False).to_numpy(dtype=bool)
+
+        return serie.astype(str).str.contains(texto, case=False, regex=False).to_numpy(dtype=bool)
+
+    def pagina(self, colunas: list, pagina: int, linhas: int, ordenar_por: str = None,
+               crescente: bool = True, coluna_filtro: str = None, texto: str = "") -> tuple[pd.DataFrame, int]:
+        """Função para conseguir só as linhas e colunas da página pedida e o total filtrado"""
+        posicoes = self.ordem(ordenar_por, crescente)
+
+        mascara = self.filtro(coluna_filtro, texto)
+        if mascara is not None:
+            posicoes = posicoes[mascara[posicoes]]
+
+        inicio = (pagina - 1) * linhas
+        return self.df.iloc[posicoes[inicio:inicio + linhas]][colunas], len(posicoes)
+
+
+def indice_tabela(df: pd.DataFrame, chave: str, versao=None) -> IndiceTabela:
+    """Função para reaproveitar o índice de uma tabela enquanto a versão dos dados for a mesma"""
+    if versao is None:
+        return IndiceTabela(df)
+
+    with _TRAVA_INDICES:
+        indice = _INDICES.get((chave, versao))
+        if indice is None:
+            indice = _INDICES[(chave, versao)] = IndiceTabela(df)
+            while len(_INDICES) > MAX_INDICES:
+                _INDICES.popitem(last=False)
+        _INDICES.move_to_end((chave, versao))
+
+    return indice
+
+
+# ------------------------------
+# Componente
+# ------------------------------
+def tabela_paginada(df: pd.DataFrame, chave: str, versao=None, colunas_padrao: list = None, linhas_por_pagina: int = 25) -> None:
+    """Função para renderizar uma tabela paginada, enviando ao navegador só a página e as colunas escolhidas"""
+    indice = indice_tabela(df, chave, versao)
+    todas = list(df.columns)
+
+    colunas = st.multiselect(
+        "Colunas:", todas,
+        default=[c for c in (colunas_padrao or todas) if c in todas],
+        key=f"{chave}_colunas",
+    ) or todas
+
+    ordemCol, sentidoCol = st.columns([0.7, 0.3], vertical_alignment="bottom")
+    with ordemCol:
+        ordenar_por = st.selectbox("Ordenar por:", [None] + todas, format_func=lambda c: "—" if c is None else c, key=f"{chave}_ordem")
+    with sentidoCol:
+        crescente = st.toggle("Crescente", value=True, key=f"{chave}_crescente")
+
+    filtroCol, textoCol = st.columns(2)
+    with filtroCol:
+        coluna_filtro = st.selectbox("Filtrar coluna:", [None] + todas, format_func=lambda c: "—" if c is None else c, key=f"{chave}_filtro")
+    with textoCol:
+        texto = st.text_input("Contém:", key=f"{chave}_texto", disabled=coluna_filtro is None)
+
+    # Total filtrado antes de escolher a página (o número de páginas depende dele)
+    mascara = indice.filtro(coluna_filtro, texto)
+    total = len(df) if mascara is None else int(mascara.sum())
+    paginas = max(1, -(-total // linhas_por_pagina))
+
+    pagina = st.number_input(f"Página (de {paginas}):", min_value=1, max_value=paginas, value=1, step=1, key=f"{chave}_pagina")
+    pagina = min(int(pagina), paginas)
+
+    df_pagina, total = indice.pagina(colunas, pagina, linhas_por_pagina, ordenar_por, crescente, coluna_filtro, texto)
+    st.dataframe(df_pagina, hide_index=True)
+
+    inicio = (pagina - 1) * linhas_por_pagina
+    st.caption(f"Linhas {min(inicio + 1, total)}–{inicio + len(df_pagina)} de {total} ({len(df)} no total)")
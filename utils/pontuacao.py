@@ -0,0 +1,126 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from utils.classificacao import Classificacao, classificacao_equipes, classificacao_pilotos, resultados_pontuados
+from utils.data_frames import versao_tabela
+from utils.get_info import get_drivers_standing, get_info_corrida, get_info_pilotos, get_info_time, get_time_standing
+
+# Sistemas de pontos da F1 (pontos do 1º, 2º, 3º...)
+SISTEMAS_PONTOS = {
+    '2010-hoje (25-18-15-12-10-8-6-4-2-1)': (25, 18, 15, 12, 10, 8, 6, 4, 2, 1),
+    '2003-2009 (10-8-6-5-4-3-2-1)': (10, 8, 6, 5, 4, 3, 2, 1),
+    '1991-2002 (10-6-4-3-2-1)': (10, 6, 4, 3, 2, 1),
+    '1961-1990 (9-6-4-3-2-1)': (9, 6, 4, 3, 2, 1),
+    '1950-1959 (8-6-4-3-2)': (8, 6, 4, 3, 2),
+}
+
+# Pontos das sprints (2022 em diante)
+PONTOS_SPRINT = (8, 7, 6, 5, 4, 3, 2, 1)
+
+# Bônus da volta mais rápida (só para quem termina na zona de pontos, como em 2019-2024)
+PONTOS_VOLTA_RAPIDA = 1
+
+# O campeonato de construtores começou em 1958
+PRIMEIRO_ANO_CONSTRUTORES = 1958
+
+
+# ------------------------------
+# Pontos por resultado (consulta vetorizada)
+# ------------------------------
+def tabela_pontos(pontos: tuple, tamanho: int) -> np.ndarray:
+    """Função para montar o vetor posição -> pontos (posição 0 e fora da zona de pontos valem 0)"""
+    tabela = np.zeros(max(tamanho, len(pontos)) + 1)
+    tabela[1:len(pontos) + 1] = pontos
+    return tabela
+
+
+def pontos_alternativos(df: pd.DataFrame, pontos: tuple, volta_rapida: bool = False, sprint: bool = True) -> np.ndarray:
+    """Função para pontuar todos os resultados de uma vez com outro sistema de pontos"""
+    # Só quem é classificado pontua: os demais ficam na posição 0
+    posicao = np.where(df['posicao_final'].isna(), 0, df['positionOrder'].to_numpy(dtype=np.intp))
+    tamanho = int(posicao.max(initial=0))
+    eh_sprint = df['sprint'].to_numpy()
+
+    tabela_sprint = tabela_pontos(PONTOS_SPRINT if sprint else (), tamanho)
+    valores = np.where(eh_sprint, tabela_sprint[posicao], tabela_pontos(pontos, tamanho)[posicao])
+
+    if volta_rapida:
+        na_zona = (posicao >= 1) & (posicao <= len(pontos))
+        valores = valores + PONTOS_VOLTA_RAPIDA * (df['volta_mais_rapida'].to_numpy() & na_zona)
+
+    return valores
+
+
+def recalcular_campeonatos(pontos: tuple, volta_rapida: bool = False, sprint: bool = True) -> tuple[Classificacao, Classificacao]:
+    """Função para refazer as classificações de pilotos e construtores de todas as temporadas"""
+    valores = pontos_alternativos(resultados_pontuados(), pontos, volta_rapida, sprint)
+    return classificacao_pilotos().repontuar(valores), classificacao_equipes().repontuar(valores)
+
+
+# ------------------------------
+# Comparação com os pontos originais
+# ------------------------------
+def campeoes_publicados(classificacao: Classificacao) -> pd.DataFrame:
+    """Função para conseguir o campeão de cada temporada na classificação publicada (1º após a última rodada)"""
+    if classificacao.coluna == 'driverId':
+        tabela, colunas = 'driver_standings', {'posicao_mundial': 'posicao'}
+    else:
+        tabela, colunas = 'constructor_standings', {'pontos_time': 'pontos', 'posicao_mundial_time': 'posicao'}
+
+    # Sem a classificação publicada: o campeão calculado pelo motor
+    if versao_tabela(tabela) is None:
+        return classificacao.campeoes()
+
+    df = get_drivers_standing() if tabela == 'driver_standings' else get_time_standing()
+    df = df.rename(columns=colunas).merge(get_info_corrida()[['raceId', 'ano', 'rodada']], on='raceId', how='inner')
+    df = df[(df['rodada'] == df.groupby('ano')['rodada'].transform('max')) & (df['posicao'] == 1)]
+
+    return df[['ano', classificacao.coluna, 'pontos']].sort_values('ano', ignore_index=True)
+
+
+def _comparar(original: Classificacao, alternativa: Classificacao, nomes: pd.Series) -> pd.DataFrame:
+    """Função para colocar lado a lado o campeão oficial e o do sistema alternativo"""
+    coluna = original.coluna
+    df = campeoes_publicados(original).merge(alternativa.campeoes(), on='ano', suffixes=('_original', '_alternativo'))
+    df['campeao_original'] = df[f'{coluna}_original'].map(nomes)
+    df['campeao_alternativo'] = df[f'{coluna}_alternativo'].map(nomes)
+    df['mudou'] = df[f'{coluna}_original'] != df[f'{coluna}_alternativo']
+
+    return df[['ano', 'campeao_original', 'pontos_original', 'campeao_alternativo', 'pontos_alternativo', 'mudou']]
+
+
+def comparar_campeoes(pontos: tuple, volta_rapida: bool = False, sprint: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Função para conseguir, por temporada, o campeão com os pontos originais e o do sistema escolhido (pilotos e construtores)"""
+    pilotos, equipes = recalcular_campeonatos(pontos, volta_rapida, sprint)
+
+    nomes_pilotos = get_info_pilotos().set_index('driverId')['nome_completo']
+    nomes_equipes = get_info_time().set_index('constructorId')['nome_equipe'].astype(str)
+
+    df_pilotos = _comparar(classificacao_pilotos(), pilotos, nomes_pilotos)
+    df_equipes = _comparar(classificacao_equipes(), equipes, nomes_equipes)
+
+    return df_pilotos, df_equipes[df_equipes['ano'] >= PRIMEIRO_ANO_CONSTRUTORES].reset_index(drop=True)
+
+
+def classificacao_alternativa(ano: int, pontos: tuple, volta_rapida: bool = False, sprint: bool = True) -> pd.DataFrame:
+    """Função para conseguir a classificação final de pilotos de um ano nos dois sistemas"""
+    pilotos, _ = recalcular_campeonatos(pontos, volta_rapida, sprint)
+
+    df = classificacao_pilotos().apos_rodada(ano).merge(pilotos.apos_rodada(ano), on='driverId', suffixes=('_original', '_alternativo'))
+    df['nome_completo'] = df['driverId'].map(get_info_pilotos().set_index('driverId')['nome_completo'])
+    df['variacao'] = df['posicao_original'] - df['posicao_alternativo']
+
+    return df[['nome_completo', 'posicao_original', 'pontos_original', 'posicao_alternativo', 'pontos_alternativo', 'variacao']].sort_values('posicao_alternativo', ignore_index=True)
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.pontuacao ["25,18,15,12,10,8,6,4,2,1"]
+    pontos = tuple(float(p) for p in sys.argv[1].split(",")) if len(sys.argv) > 1 else SISTEMAS_PONTOS['2010-hoje (25-18-15-12-10-8-6-4-2-1)']
+    classificacao_pilotos(), classificacao_equipes()
+
+    inicio = time.perf_counter()
+    df_pilotos, df_equipes = comparar_campeoes(pontos, volta_rapida=True)
+    print(f"{len(df_pilotos)} temporadas repontuadas em {time.perf_counter() - inicio:.3f}s")
+    print(df_pilotos[df_pilotos['mudou']].to_string(index=False))
+    print(df_equipes[df_equipes['mudou']].to_string(index=False))
@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 from utils.get_info import *
+from utils.data_frames import anexar_linhas
+from utils.esquema import aplicar_esquema
+from utils.materializacao import materializado
 
 
 
@@ -15,12 +19,15 @@ def organizar_ids(df: pd.DataFrame, ids_prioritarios: list = None) -> pd.DataFra
     return df[ids + [col for col in df.columns if col not in ids]]
 
 
-def merge_tabelas() -> pd.DataFrame:
-    """Função para dar merge nos dataframes que precisamos"""
+def ids_anexados(anexos: dict, coluna: str, tabelas: tuple = ('sprint_results', 'results')) -> np.ndarray:
+    """Função para conseguir os ids (raceId, driverId) presentes nas linhas novas dos resultados"""
+    valores = [anexos[nome][coluna].to_numpy() for nome in tabelas if nome in anexos]
+    return np.unique(np.concatenate(valores)) if valores else np.array([], dtype=int)
 
+
+def juntar_corridas(df_sprint: pd.DataFrame, df_races_result: pd.DataFrame) -> pd.DataFrame:
+    """Função para juntar resultados (sprints e corridas) com corrida, status, equipe e piloto"""
     # Conseguindo os dataframes
-    df_sprint = get_sprints_results()
-    df_races_result = get_race_results()
     df_status = get_status_race()
     df_races = get_info_corrida()
     df_equipes = get_info_time()
@@ -32,8 +39,8 @@ def merge_tabelas() -> pd.DataFrame:
 
     # Filtrandos as colunas necessárias para análise
     df_races = df_races[['raceId', 'ano', 'circuitId', 'name_circuit', 'rodada', 'data_corrida']]
-    df_pilotos = df_pilotos[['driverId','nome_completo', 'code']]
-    df_equipes = df_equipes[['constructorId','nome_equipe', 'cores']]
+    df_pilotos = df_pilotos[['driverId','nome_completo', 'code', 'wiki_url_piloto', 'nacionalidade_piloto']]
+    df_equipes = df_equipes[['constructorId','nome_equipe']]
 
     # Dando Merge
     df_juntando_tudo = pd.merge(df_races, df_juntando, on="raceId")
@@ -41,18 +48,173 @@ def merge_tabelas() -> pd.DataFrame:
     df_juntando_tudo = pd.merge(df_juntando_tudo, df_equipes, on="constructorId")
     df_juntando_tudo = pd.merge(df_juntando_tudo, df_pilotos, on="driverId")
 
-    # Filtrando Dados apenas dos anos que Lewis Hamilton participou da temporada
-    df_juntando_tudo = df_juntando_tudo[df_juntando_tudo['ano'] >= 2007]
-
     df_juntando_tudo['posicao_final'] = pd.to_numeric(df_juntando_tudo['posicao_final'], errors='coerce')
     df_juntando_tudo['posicao_grid'] = pd.to_numeric(df_juntando_tudo['posicao_grid'], errors='coerce')
 
     df_juntando_tudo['ganho_posicao'] = df_juntando_tudo['posicao_grid'] - df_juntando_tudo['posicao_final']
 
     # Organizando ids
-    df_juntando_tudo = organizar_ids(df_juntando_tudo)
+    return organizar_ids(aplicar_esquema(df_juntando_tudo))
+
+
+@materializado('corridas', 'sprint_results', 'results', 'status', 'races', 'constructors', 'drivers', versao=3)
+def tabela_corridas() -> pd.DataFrame:
+    """Função para construir a junção completa (todas as temporadas) das corridas"""
+    return juntar_corridas(get_sprints_results(), get_race_results())
+
+
+@tabela_corridas.incremental
+def _anexar_corridas(df_corridas: pd.DataFrame, anexos: dict) -> pd.DataFrame:
+    """Função para juntar só os resultados novos à junção já materializada"""
+    # Linhas novas em corridas, status, equipes ou pilotos não mudam as linhas já juntadas
+    df_sprint = get_sprints_results()
+    df_races_result = get_race_results()
+
+    novas = juntar_corridas(
+        df_sprint[df_sprint['resultId'].isin(ids_anexados(anexos, 'resultId', ('sprint_results',)))],
+        df_races_result[df_races_result['resultId'].isin(ids_anexados(anexos, 'resultId', ('results',)))],
+    )
+
+    return anexar_linhas(df_corridas, novas)
+
+
+def resumir_carreiras(df: pd.DataFrame) -> pd.DataFrame:
+    """Função para resumir a carreira dos pilotos presentes no DataFrame (um groupby)"""
+    # Ordem cronológica: "última equipe" e "último número" vêm da corrida mais recente
+    df = df.sort_values('data_corrida', kind='stable')
+
+    # Corridas principais e sprints contados em colunas separadas (vitória de sprint não é vitória de GP)
+    principal = df['tipo_corrida'].eq('Corrida_Principal')
+    sprint = ~principal
+    df = df.assign(
+        largada=principal,
+        vitorias=df['posicao_final'].eq(1) & principal,
+        podios=df['posicao_final'].le(3) & principal,
+        poles=df['posicao_grid'].eq(1) & principal,
+        terminou=df['posicao_final'].notna() & principal,
+        largada_sprint=sprint,
+        vitorias_sprint=df['posicao_final'].eq(1) & sprint,
+        podios_sprint=df['posicao_final'].le(3) & sprint,
+        poles_sprint=df['posicao_grid'].eq(1) & sprint,
+        terminou_sprint=df['posicao_final'].notna() & sprint,
+    )
+
+    resumo = df.groupby('driverId').agg(
+        nome_completo=('nome_completo', 'first'),
+        code=('code', 'first'),
+        nacionalidade_piloto=('nacionalidade_piloto', 'first'),
+        ultima_equipe=('nome_equipe', 'last'),
+        ultimo_numero=('numero_do_piloto', 'last'),
+        largadas=('largada', 'sum'),
+        vitorias=('vitorias', 'sum'),
+        podios=('podios', 'sum'),
+        poles=('poles', 'sum'),
+        corridas_terminadas=('terminou', 'sum'),
+        sprints=('largada_sprint', 'sum'),
+        vitorias_sprint=('vitorias_sprint', 'sum'),
+        podios_sprint=('podios_sprint', 'sum'),
+        poles_sprint=('poles_sprint', 'sum'),
+        sprints_terminadas=('terminou_sprint', 'sum'),
+        temporadas=('ano', 'nunique'),
+        primeiro_ano=('ano', 'min'),
+        ultimo_ano=('ano', 'max'),
+    )
+
+    contagens = [
+        'largadas', 'vitorias', 'podios', 'poles', 'corridas_terminadas',
+        'sprints', 'vitorias_sprint', 'podios_sprint', 'poles_sprint', 'sprints_terminadas',
+        'temporadas', 'primeiro_ano', 'ultimo_ano',
+    ]
+    return resumo.astype({col: 'int16' for col in contagens}).reset_index()
+
+
+@materializado('resumo_carreiras', *tabela_corridas.tabelas, versao=2)
+def resumo_carreiras() -> pd.DataFrame:
+    """Função para resumir a carreira de todos os pilotos (um groupby sobre a junção completa)"""
+    return resumir_carreiras(tabela_corridas())
+
+
+@resumo_carreiras.incremental
+def _anexar_resumos(df_resumo: pd.DataFrame, anexos: dict) -> pd.DataFrame:
+    """Função para refazer o resumo só dos pilotos que têm resultados novos"""
+    ids = ids_anexados(anexos, 'driverId')
+    df = tabela_corridas()
+
+    df_novos = resumir_carreiras(df[df['driverId'].isin(ids)])
+    return anexar_linhas(df_resumo[~df_resumo['driverId'].isin(ids)], df_novos).sort_values('driverId', ignore_index=True)
+
+
+# Colunas da corrida (iguais para os dois pilotos do par) e colunas de cada piloto
+COLUNAS_CORRIDA = ['raceId', 'tipo_corrida', 'ano', 'rodada', 'data_corrida', 'name_circuit', 'constructorId', 'nome_equipe']
+COLUNAS_PILOTO = ['driverId', 'nome_completo', 'code', 'posicao_grid', 'posicao_final', 'pontos', 'ganho_posicao', 'status_race']
+
+
+def pares_companheiros(df: pd.DataFrame, tipo_corrida: str = 'Corrida_Principal') -> pd.DataFrame:
+    """Função para montar os pares de companheiros de equipe das corridas do DataFrame (por padrão só as corridas principais)"""
+    if tipo_corrida is not None:
+        df = df[df['tipo_corrida'] == tipo_corrida]
+    df = df[COLUNAS_CORRIDA + COLUNAS_PILOTO]
+
+    # Mesma corrida (e mesmo tipo, quando corridas e sprints entram juntos) pela mesma equipe
+    chaves = ['raceId', 'tipo_corrida', 'constructorId']
+    df_pares = pd.merge(
+        df,
+        df[chaves + COLUNAS_PILOTO],
+        on=chaves,
+        suffixes=('', '_companheiro'),
+    )
+    df_pares = df_pares[df_pares['driverId'] != df_pares['driverId_companheiro']]
+
+    # Ordenado por piloto: cada piloto vira uma fatia contínua da tabela
+    return df_pares.sort_values(['driverId', 'data_corrida', 'tipo_corrida'], kind='stable').reset_index(drop=True)
+
+
+@materializado('companheiros', *tabela_corridas.tabelas, versao=2)
+def tabela_companheiros() -> pd.DataFrame:
+    """Função para montar todos os pares de companheiros de equipe (corrida a corrida)"""
+    return pares_companheiros(tabela_corridas())
+
+
+@tabela_companheiros.incremental
+def _anexar_companheiros(df_pares: pd.DataFrame, anexos: dict) -> pd.DataFrame:
+    """Função para refazer só os pares das corridas que têm resultados novos"""
+    corridas = ids_anexados(anexos, 'raceId')
+    df = tabela_corridas()
+
+    df_novos = pares_companheiros(df[df['raceId'].isin(corridas)])
+    df_pares = anexar_linhas(df_pares[~df_pares['raceId'].isin(corridas)], df_novos)
+
+    return df_pares.sort_values(['driverId', 'data_corrida', 'tipo_corrida'], kind='stable').reset_index(drop=True)
+
+
+def companheiros_de(driver_id: int) -> pd.DataFrame:
+    """Função para conseguir todos os pares de um piloto com seus companheiros (busca binária)"""
+    df_pares = tabela_companheiros()
+    ids = df_pares['driverId'].to_numpy()
+
+    inicio, fim = np.searchsorted(ids, driver_id, 'left'), np.searchsorted(ids, driver_id, 'right')
+    return df_pares.iloc[inicio:fim]
+
+
+def confronto(df_pares: pd.DataFrame, nome_companheiro: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Função para separar as corridas em comum com um companheiro nas linhas de cada piloto"""
+    df_pares = df_pares[df_pares['nome_completo_companheiro'] == nome_companheiro]
+
+    df_piloto = df_pares[COLUNAS_CORRIDA + COLUNAS_PILOTO]
+    df_companheiro = df_pares[COLUNAS_CORRIDA + [f"{col}_companheiro" for col in COLUNAS_PILOTO]]
+    df_companheiro = df_companheiro.rename(columns=lambda col: col.removesuffix('_companheiro'))
+
+    return df_piloto, df_companheiro
+
+
+def merge_tabelas() -> pd.DataFrame:
+    """Função para dar merge nos dataframes que precisamos"""
+    df_juntando_tudo = tabela_corridas()
+
+    # Filtrando Dados apenas dos anos que Lewis Hamilton participou da temporada
+    df_juntando_tudo = df_juntando_tudo[df_juntando_tudo['ano'] >= 2007]
 
-    return df_juntando_tudo
+    return df_juntando_tudo.drop(columns=['wiki_url_piloto', 'nacionalidade_piloto'])
 
 
 def df_especifico() -> pd.DataFrame:
@@ -64,7 +226,7 @@ def df_especifico() -> pd.DataFrame:
     df_merge = df_merge[df_merge['code'] == 'HAM']
 
     # Criando colunas
-    df_merge['vitorias'] = df_merge['posicao_final'] == 1 
+    df_merge['vitorias'] = df_merge['posicao_final'] == 1
     df_merge['podios'] = df_merge['posicao_final'] <= 3
     df_merge['pole_position'] = df_merge['posicao_grid'] == 1
 
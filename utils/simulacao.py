@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from utils.classificacao import classificacao_equipes, classificacao_pilotos
+from utils.dashboard_utils import merge_tabelas
+from utils.get_info import get_info_corrida, get_info_pilotos, get_info_time
+from utils.pontuacao import PONTOS_SPRINT
+
+# Temporadas simuladas por lote (cada lote é uma tarefa do pool de processos)
+TAMANHO_LOTE = 10_000
+
+# Com menos resultados que isso na temporada, a distribuição do piloto inclui a temporada anterior
+MINIMO_RESULTADOS = 3
+
+# Piloto regular: correu pelo menos essa fração das rodadas já disputadas (tira participações avulsas, como a Indy 500)
+FRACAO_REGULARES = 0.5
+
+_EXECUTOR = None
+_TRAVA_EXECUTOR = threading.Lock()
+
+
+# ------------------------------
+# Dados de entrada (classificação atual e distribuição de posições)
+# ------------------------------
+def pontos_por_posicao(df_disputadas: pd.DataFrame, tamanho: int, padrao: tuple = ()) -> np.ndarray:
+    """Função para conseguir os pontos de cada posição usados nas corridas já disputadas (mediana entre elas)"""
+    classificados = df_disputadas[df_disputadas['posicao_final'].notna()]
+    if classificados.empty:
+        # Nenhuma corrida desse tipo disputada ainda: usa a tabela de pontos padrão
+        return np.pad(np.asarray(padrao, dtype=float), (0, max(tamanho - len(padrao), 0)))[:tamanho]
+
+    pontos = classificados.groupby('positionOrder')['pontos'].median()
+
+    # Índice 0 = 1º lugar; posições sem registro valem 0
+    return pontos.reindex(range(1, tamanho + 1), fill_value=0).fillna(0).to_numpy(dtype=float)
+
+
+def dados_simulacao(ano: int, rodada: int) -> dict:
+    """Função para montar os arrays da simulação: pontos atuais, grid e posições de cada piloto"""
+    df_todas = merge_tabelas()
+    df_sprints = df_todas[(df_todas['tipo_corrida'] == 'Sprint') & (df_todas['ano'] == ano)]
+    df = df_todas[df_todas['tipo_corrida'] == 'Corrida_Principal']
+    df_temporada = df[df['ano'] == ano]
+
+    df_calendario = get_info_corrida().query('ano == @ano')
+    total_rodadas = int(df_calendario['rodada'].max())
+    rodada = int(min(max(rodada, 1), df_temporada['rodada'].max(), total_rodadas))
+    df_disputadas = df_temporada[df_temporada['rodada'] <= rodada]
+
+    # Sprints ainda por correr: pelo calendário ou pelos resultados já publicados
+    rodadas_sprint = set(df_calendario.loc[df_calendario['sprint_date'].notna(), 'rodada']) | set(df_sprints['rodada'])
+    sprints_restantes = sum(1 for r in rodadas_sprint if r > rodada)
+
+    # Grid: pilotos regulares da temporada até aqui, cada um com a equipe da última corrida que disputou
+    largadas = df_disputadas.groupby('driverId')['rodada'].nunique()
+    regulares = largadas.index[largadas >= FRACAO_REGULARES * df_disputadas['rodada'].nunique()]
+    df_grid = df_disputadas[df_disputadas['driverId'].isin(regulares)].sort_values('rodada').drop_duplicates('driverId', keep='last')
+    grid = df_grid['driverId'].to_numpy()
+
+    # Posições de cada piloto na temporada até aqui (e na anterior, se forem poucas)
+    df_historico = df_disputadas[df_disputadas['driverId'].isin(grid)]
+    contagem = df_historico['driverId'].value_counts()
+    poucos = contagem.index[contagem < MINIMO_RESULTADOS]
+    df_anterior = df[(df['ano'] == ano - 1) & df['driverId'].isin(poucos)]
+    df_historico = pd.concat([df_historico, df_anterior])
+
+    posicoes = df_historico.groupby('driverId')['positionOrder'].apply(lambda s: s.to_numpy()).reindex(grid)
+    tamanhos = posicoes.map(len).to_numpy()
+    amostras = np.zeros((len(grid), tamanhos.max()))
+    for i, valores in enumerate(posicoes):
+        amostras[i, :len(valores)] = valores
+
+    # Classificações depois da rodada (todos os pilotos e equipes que já pontuaram ou correram)
+    df_pilotos = classificacao_pilotos().apos_rodada(ano, rodada)
+    df_equipes = classificacao_equipes().apos_rodada(ano, rodada)
+    equipe_de = df_equipes['constructorId'].reset_index().set_index('constructorId')['index']
+
+    return {
+        'ano': ano,
+        'rodada': rodada,
+        'rodadas_restantes': total_rodadas - rodada,
+        'sprints_restantes': sprints_restantes,
+        'pilotos': df_pilotos,
+        'equipes': df_equipes,
+        'amostras': amostras,
+        'tamanhos': tamanhos,
+        'pontos_posicao': pontos_por_posicao(df_disputadas, len(grid)),
+        'pontos_sprint': pontos_por_posicao(df_sprints[df_sprints['rodada'] <= rodada], len(grid), PONTOS_SPRINT),
+        'colunas_grid': df_pilotos.reset_index().set_index('driverId').loc[grid, 'index'].to_numpy(),
+        # Equipe fora do campeonato de construtores (ex.: antes de 1958): -1, os pontos não vão para nenhuma
+        'equipes_grid': equipe_de.reindex(df_grid['constructorId']).fillna(-1).to_numpy(dtype=np.intp),
+    }
+
+
+# ------------------------------
+# Simulação (lotes de temporadas em arrays simulações x pilotos)
+# ------------------------------
+def _simular_lote(dados: dict, simulacoes: int, semente) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Função para simular um lote de temporadas e contar os títulos de cada piloto e equipe"""
+    rng = np.random.default_rng(semente)
+    amostras, tamanhos = dados['amostras'], dados['tamanhos']
+    n = len(tamanhos)
+    linhas = np.arange(n)
+
+    # Corridas e sprints restantes, cada uma com a sua tabela de pontos
+    pontos_corridas = [dados['pontos_posicao']] * dados['rodadas_restantes'] + [dados['pontos_sprint']] * dados['sprints_restantes']
+
+    ganhos = np.zeros((simulacoes, n))
+    for pontos_posicao in pontos_corridas:
+        # Uma posição sorteada do histórico de cada piloto; o desempate aleatório define a ordem de chegada
+        sorteio = (rng.random((simulacoes, n)) * tamanhos).astype(np.intp)
+        nota = amostras[linhas, sorteio] + rng.random((simulacoes, n))
+
+        chegada = np.empty((simulacoes, n), dtype=np.intp)
+        np.put_along_axis(chegada, np.argsort(nota, axis=1), linhas[None, :], axis=1)
+        ganhos += pontos_posicao[chegada]
+
+    # Pontos finais = classificação atual + pontos simulados
+    pontos_pilotos = np.tile(dados['pilotos']['pontos'].to_numpy(dtype=float), (simulacoes, 1))
+    pontos_pilotos[:, dados['colunas_grid']] += ganhos
+
+    pontos_equipes = np.tile(dados['equipes']['pontos'].to_numpy(dtype=float), (simulacoes, 1))
+    com_equipe = dados['equipes_grid'] >= 0
+    np.add.at(pontos_equipes.T, dados['equipes_grid'][com_equipe], ganhos.T[com_equipe])
+
+    # Empates no fim decididos por sorteio
+    campeao_piloto = np.argmax(pontos_pilotos + rng.random(pontos_pilotos.shape) * 1e-6, axis=1)
+    campeao_equipe = np.argmax(pontos_equipes + rng.random(pontos_equipes.shape) * 1e-6, axis=1)
+
+    return (
+        np.bincount(campeao_piloto, minlength=pontos_pilotos.shape[1]),
+        np.bincount(campeao_equipe, minlength=pontos_equipes.shape[1]),
+        pontos_pilotos.sum(axis=0),
+    )
+
+
+def _executor() -> ProcessPoolExecutor:
+    """Função para conseguir o pool de processos das simulações (criado no primeiro uso)"""
+    global _EXECUTOR
+
+    with _TRAVA_EXECUTOR:
+        if _EXECUTOR is None:
+            # spawn: o fork copiaria as travas e threads do processo (ex.: Streamlit) em um estado qualquer
+            _EXECUTOR = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+    return _EXECUTOR
+
+
+def simular_temporada(ano: int, rodada: int, simulacoes: int = 100_000, semente: int = None, paralelo: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Função para estimar a chance de título de cada piloto e equipe repetindo o resto da temporada"""
+    dados = dados_simulacao(ano, rodada)
+
+    # Lotes independentes com sementes derivadas (o resultado não depende de quantos processos rodam)
+    tamanhos = [TAMANHO_LOTE] * (simulacoes // TAMANHO_LOTE) + ([simulacoes % TAMANHO_LOTE] if simulacoes % TAMANHO_LOTE else [])
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+
+    if paralelo and len(tamanhos) > 1 and (os.cpu_count() or 1) > 1:
+        resultados = list(_executor().map(_simular_lote, [dados] * len(tamanhos), tamanhos, sementes))
+    else:
+        resultados = [_simular_lote(dados, tamanho, s) for tamanho, s in zip(tamanhos, sementes)]
+
+    titulos_pilotos, titulos_equipes, soma_pontos = (sum(partes) for partes in zip(*resultados))
+
+    nomes_pilotos = get_info_pilotos().set_index('driverId')['nome_completo']
+    df_pilotos = dados['pilotos'].assign(
+        nome_completo=lambda df: df['driverId'].map(nomes_pilotos),
+        pontos_medios=soma_pontos / simulacoes,
+        chance_titulo=titulos_pilotos / simulacoes,
+    )
+
+    nomes_equipes = get_info_time().set_index('constructorId')['nome_equipe'].astype(str)
+    df_equipes = dados['equipes'].assign(
+        nome_equipe=lambda df: df['constructorId'].map(nomes_equipes),
+        chance_titulo=titulos_equipes / simulacoes,
+    )
+
+    return (
+        df_pilotos.sort_values(['chance_titulo', 'pontos'], ascending=False, ignore_index=True),
+        df_equipes.sort_values(['chance_titulo', 'pontos'], ascending=False, ignore_index=True),
+    )
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.simulacao ano rodada [simulacoes]
+    ano, rodada = int(sys.argv[1]), int(sys.argv[2])
+    simulacoes = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+
+    inicio = time.perf_counter()
+    df_pilotos, df_equipes = simular_temporada(ano, rodada, simulacoes)
+    print(f"{simulacoes} temporadas simuladas em {time.perf_counter() - inicio:.2f}s ({os.cpu_count()} processadores)")
+    print(df_pilotos.head(10).to_string(index=False))
+    print(df_equipes.head(5).to_string(index=False))
@@ -0,0 +1,233 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from utils.data_frames import caminho_dados
+from utils.esquema import aplicar_esquema, dtypes_leitura
+from utils.get_info import RENOMEAR_PIT_STOPS, RENOMEAR_TEMPO_VOLTA, get_pit_stops
+from utils.materializacao import materializado
+from utils.voltas import ler_voltas, voltas_corrida
+
+# Voltas mais lentas que este múltiplo da mediana da corrida não entram no ritmo (safety car, bandeira, problemas)
+LIMITE_VOLTA_LIMPA = 1.07
+
+# Mínimo de voltas limpas para estimar a degradação de um stint
+MINIMO_VOLTAS_DEGRADACAO = 3
+
+CHAVES_VOLTA = ['raceId', 'driverId', 'lap']
+
+
+def _chave_volta(corrida: np.ndarray, piloto: np.ndarray, volta: np.ndarray) -> np.ndarray:
+    """Função para juntar (raceId, driverId, volta) em um único inteiro (comparações vetorizadas)"""
+    return (corrida.astype(np.int64) << 32) | (piloto.astype(np.int64) << 16) | volta.astype(np.int64)
+
+
+# ------------------------------
+# Segmentação (várias corridas de uma vez)
+# ------------------------------
+def marcar_stints(df: pd.DataFrame, df_paradas: pd.DataFrame) -> pd.DataFrame:
+    """Função para marcar o stint de cada volta das corridas com paradas registradas"""
+    # Só corridas com paradas registradas (sem elas, a corrida inteira pareceria um stint só)
+    df = df[df['raceId'].isin(df_paradas['raceId'].unique())].sort_values(CHAVES_VOLTA, ignore_index=True)
+
+    corrida, piloto, volta = (df[col].to_numpy() for col in CHAVES_VOLTA)
+    ms = df['ms_lap_time'].to_numpy(dtype=float)
+
+    # Volta de entrada nos boxes: a parada acontece no fim dela
+    chaves_parada = _chave_volta(*(df_paradas[col].to_numpy() for col in CHAVES_VOLTA))
+    entrada_box = np.isin(_chave_volta(corrida, piloto, volta), chaves_parada)
+
+    # Um stint começa na primeira volta do piloto ou logo depois de uma entrada nos boxes
+    novo_piloto = np.ones(len(df), dtype=bool)
+    novo_piloto[1:] = (corrida[1:] != corrida[:-1]) | (piloto[1:] != piloto[:-1])
+    saida_box = np.zeros(len(df), dtype=bool)
+    saida_box[1:] = entrada_box[:-1] & ~novo_piloto[1:]
+    inicio_stint = novo_piloto | saida_box
+
+    # Contagem acumulada: id global do stint e número do stint dentro da corrida do piloto
+    id_stint = np.cumsum(inicio_stint) - 1
+    stint = id_stint - id_stint[novo_piloto][np.cumsum(novo_piloto) - 1] + 1
+
+    # Volta limpa: nem largada, nem entrada/saída dos boxes, nem muito acima da mediana da corrida
+    candidata = ~entrada_box & ~saida_box & (volta > 1)
+    mediana = pd.Series(np.where(candidata, ms, np.nan)).groupby(corrida).transform('median').to_numpy()
+    volta_limpa = candidata & (ms <= LIMITE_VOLTA_LIMPA * mediana)
+
+    return df.assign(
+        stint=stint.astype('int8'),
+        id_stint=id_stint,
+        entrada_box=entrada_box,
+        saida_box=saida_box,
+        volta_limpa=volta_limpa,
+    )
+
+
+def segmentar_stints() -> pd.DataFrame:
+    """Função para marcar o stint de cada volta de todas as corridas (só para montar as tabelas materializadas)"""
+    return marcar_stints(ler_voltas(CHAVES_VOLTA + ['ms_lap_time']), get_pit_stops())
+
+
+# ------------------------------
+# Ritmo e degradação por stint
+# ------------------------------
+def resumir_stints(df: pd.DataFrame) -> pd.DataFrame:
+    """Função para resumir cada stint: voltas, ritmo e degradação (ms por volta)"""
+    if df.empty:
+        return pd.DataFrame(columns=[
+            'raceId', 'driverId', 'stint', 'volta_inicial', 'volta_final', 'voltas', 'voltas_limpas',
+            'ritmo_medio_ms', 'ritmo_mediano_ms', 'degradacao_ms', 'intercepto_ms',
+        ])
+
+    ids = df['id_stint'].to_numpy()
+    limpa = df['volta_limpa'].to_numpy()
+    x = np.where(limpa, df['lap'].to_numpy(dtype=float), 0.0)
+    y = np.where(limpa, df['ms_lap_time'].to_numpy(dtype=float), 0.0)
+
+    # Somas por stint em uma passada: base da média e da regressão linear (ms x volta)
+    def soma(valores):
+        return np.bincount(ids, weights=valores)
+
+    n, sx, sy, sxy, sxx = soma(limpa.astype(float)), soma(x), soma(y), soma(x * y), soma(x * x)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ritmo = sy / n
+        degradacao = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+    degradacao = np.where(n >= MINIMO_VOLTAS_DEGRADACAO, degradacao, np.nan)
+    intercepto = ritmo - degradacao * sx / n
+
+    # Primeira e última volta de cada stint (as linhas de um stint são contínuas)
+    inicio = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    fim = np.r_[inicio[1:], len(ids)] - 1
+
+    mediana = df['ms_lap_time'].astype(float).where(df['volta_limpa']).groupby(ids).median().to_numpy()
+
+    return pd.DataFrame({
+        'raceId': df['raceId'].to_numpy()[inicio],
+        'driverId': df['driverId'].to_numpy()[inicio],
+        'stint': df['stint'].to_numpy()[inicio],
+        'volta_inicial': df['lap'].to_numpy()[inicio],
+        'volta_final': df['lap'].to_numpy()[fim],
+        'voltas': (fim - inicio + 1).astype('int16'),
+        'voltas_limpas': n.astype('int16'),
+        'ritmo_medio_ms': ritmo,
+        'ritmo_mediano_ms': mediana,
+        'degradacao_ms': degradacao,
+        'intercepto_ms': intercepto,
+    })
+
+
+@materializado('stints', 'lap_times', 'pit_stops', 'races', versao=1)
+def tabela_stints() -> pd.DataFrame:
+    """Função para resumir todos os stints da história"""
+    return resumir_stints(segmentar_stints())
+
+
+# ------------------------------
+# Tempo perdido nas paradas
+# ------------------------------
+def perdas_pit(df: pd.DataFrame, df_paradas: pd.DataFrame) -> pd.DataFrame:
+    """Função para estimar o tempo perdido em cada parada (entrada + saída dos boxes - 2 voltas limpas)"""
+    df_paradas = df_paradas[CHAVES_VOLTA + ['qtd_paradas', 'ms_pit_stop']]
+    if df.empty:
+        return df_paradas.iloc[:0].assign(ms_entrada=[], ms_saida=[], ms_referencia=[], perda_ms=[])
+
+    ms = df['ms_lap_time'].to_numpy(dtype=float)
+
+    # Referência: volta limpa mediana do piloto na corrida
+    referencia = df['ms_lap_time'].astype(float).where(df['volta_limpa']).groupby([df['raceId'], df['driverId']]).transform('median').to_numpy()
+
+    # A volta de saída é a linha seguinte à de entrada (do mesmo piloto, garantido pelo saida_box)
+    entrada = np.flatnonzero(df['entrada_box'].to_numpy())
+    saida = entrada + 1
+    tem_saida = saida < len(df)
+    tem_saida[tem_saida] = df['saida_box'].to_numpy()[saida[tem_saida]]
+    ms_saida = np.full(len(entrada), np.nan)
+    ms_saida[tem_saida] = ms[saida[tem_saida]]
+
+    df_perdas = df.iloc[entrada][CHAVES_VOLTA].assign(
+        ms_entrada=ms[entrada],
+        ms_saida=ms_saida,
+        ms_referencia=referencia[entrada],
+    )
+    df_perdas['perda_ms'] = df_perdas['ms_entrada'] + df_perdas['ms_saida'] - 2 * df_perdas['ms_referencia']
+
+    return df_paradas.merge(df_perdas, on=CHAVES_VOLTA, how='inner').sort_values(CHAVES_VOLTA, ignore_index=True)
+
+
+@materializado('perdas_pit', 'lap_times', 'pit_stops', 'races', versao=1)
+def tabela_perdas_pit() -> pd.DataFrame:
+    """Função para estimar o tempo perdido em todas as paradas da história"""
+    return perdas_pit(segmentar_stints(), get_pit_stops())
+
+
+# ------------------------------
+# Consultas para o Dashboard
+# ------------------------------
+def stints_piloto(driver_id: int, race_id: int = None) -> pd.DataFrame:
+    """Função para conseguir os stints de um piloto (opcionalmente de uma corrida)"""
+    df = tabela_stints()
+    filtro = df['driverId'] == driver_id
+    if race_id is not None:
+        filtro &= df['raceId'] == race_id
+
+    return df[filtro]
+
+
+def voltas_stints(driver_id: int, race_id: int) -> pd.DataFrame:
+    """Função para conseguir as voltas de um piloto em uma corrida já marcadas por stint"""
+    # Só a corrida é lida (todos os pilotos: a volta limpa depende da mediana da corrida)
+    df_paradas = get_pit_stops()
+    df = marcar_stints(voltas_corrida(race_id)[CHAVES_VOLTA + ['ms_lap_time']], df_paradas[df_paradas['raceId'] == race_id])
+    return df[df['driverId'] == driver_id]
+
+
+# ------------------------------
+# Conferência com a amostra de voltas (data/amostras)
+# ------------------------------
+# Stint de cada volta, perda de cada parada e degradação esperados na amostra (calculados à mão)
+STINTS_AMOSTRA = {1: [1, 1, 1, 1, 2, 2, 2, 3, 3, 3], 2: [1, 1, 1, 1, 1, 2, 2, 2, 2, 2], 3: [1] * 10}
+PERDAS_AMOSTRA = {(1, 4): 38000.0, (1, 7): 39000.0, (2, 5): 40000.0}
+DEGRADACAO_AMOSTRA = {(3, 1): 100.0}
+
+
+def ler_amostra(nome: str) -> pd.DataFrame:
+    """Função para ler um CSV da amostra com os tipos do registro da tabela"""
+    arquivo = os.path.join(caminho_dados(), "amostras", f"{nome}.csv")
+    return aplicar_esquema(pd.read_csv(arquivo, sep=',', na_values="\\N", dtype=dtypes_leitura(nome)), nome)
+
+
+def conferir_amostra() -> pd.DataFrame:
+    """Função para comparar stints, degradação e perdas calculados na amostra com os valores esperados"""
+    df_paradas = ler_amostra('pit_stops').rename(columns=RENOMEAR_PIT_STOPS)
+    df = marcar_stints(ler_amostra('lap_times').rename(columns=RENOMEAR_TEMPO_VOLTA), df_paradas)
+    df_stints = resumir_stints(df).set_index(['driverId', 'stint'])
+    df_perdas = perdas_pit(df, df_paradas).set_index(['driverId', 'lap'])
+
+    # A corrida 2 não tem paradas registradas: nenhuma volta dela entra na segmentação
+    linhas = [("voltas da corrida sem paradas", 0, int((df['raceId'] == 2).sum()))]
+    linhas += [(f"stints piloto {piloto}", esperado, df.loc[df['driverId'] == piloto, 'stint'].tolist()) for piloto, esperado in STINTS_AMOSTRA.items()]
+    linhas += [(f"perda piloto {piloto} volta {volta}", esperado, float(df_perdas.loc[(piloto, volta), 'perda_ms'])) for (piloto, volta), esperado in PERDAS_AMOSTRA.items()]
+    linhas += [(f"degradação piloto {piloto} stint {stint}", esperado, float(df_stints.loc[(piloto, stint), 'degradacao_ms'])) for (piloto, stint), esperado in DEGRADACAO_AMOSTRA.items()]
+
+    df_conferencia = pd.DataFrame(linhas, columns=['item', 'esperado', 'calculado'])
+    df_conferencia['confere'] = [np.allclose(e, c) for e, c in zip(df_conferencia['esperado'], df_conferencia['calculado'])]
+    return df_conferencia
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.stints [raceId]
+    inicio = time.perf_counter()
+    df_voltas = segmentar_stints()
+    df_stints = tabela_stints()
+    df_perdas = tabela_perdas_pit()
+    print(f"{len(df_voltas)} voltas, {len(df_stints)} stints e {len(df_perdas)} paradas em {time.perf_counter() - inicio:.2f}s")
+
+    df_conferencia = conferir_amostra()
+    print(df_conferencia.to_string(index=False))
+    print(f"Amostra: {(~df_conferencia['confere']).sum()} de {len(df_conferencia)} valores diferem do esperado")
+
+    if len(sys.argv) > 1:
+        race_id = int(sys.argv[1])
+        print(df_stints[df_stints['raceId'] == race_id].to_string())
+        print(df_perdas[df_perdas['raceId'] == race_id].to_string())
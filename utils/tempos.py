@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------
+# Tempos em texto -> milissegundos (vetorizado, sem regex)
+# ------------------------------
+def _numero(texto: np.ndarray) -> np.ndarray:
+    """Função para converter um array de textos em float (vazio ou inválido vira NaN)"""
+    return pd.to_numeric(texto, errors='coerce').astype(float)
+
+
+def tempo_em_ms(valores) -> pd.Series:
+    """Função para converter tempos como "1:27.452", "+5.478", "26.898" ou "1:34:50.616" em milissegundos"""
+    serie = pd.Series(valores)
+    texto = np.char.lstrip(serie.to_numpy(dtype=str, na_value=""), "+")
+
+    # Separa do fim para o início: segundos, minutos e horas.
+    # Só a parte ausente (sem o ":") vale 0; parte presente e inválida deixa o tempo todo nulo
+    partes = np.char.rpartition(texto, ":")
+    segundos = _numero(partes[:, 2])
+    tem_minutos = partes[:, 1] != ""
+    partes = np.char.rpartition(partes[:, 0], ":")
+    minutos = np.where(tem_minutos, _numero(partes[:, 2]), 0.0)
+    horas = np.where(partes[:, 1] != "", _numero(partes[:, 0]), 0.0)
+
+    total = horas * 3600 + minutos * 60 + segundos
+
+    # Texto que não é tempo ("+1 Lap", "DNF", "x:12.000", nulo) fica nulo: alguma parte é NaN
+    return pd.Series(np.round(total * 1000), index=serie.index).astype('Int32')
+
+
+def adicionar_tempos(df: pd.DataFrame, colunas: list, diferencas: dict = None) -> pd.DataFrame:
+    """Função para criar, ao lado de cada coluna de tempo em texto, a coluna <nome>_ms com o tempo em milissegundos"""
+    diferencas = diferencas or {}
+    for col in colunas:
+        if col not in df.columns:
+            continue
+
+        ms = tempo_em_ms(df[col])
+        if col in diferencas:
+            # "+5.478" é a diferença para o vencedor: fica na coluna própria (nula para o vencedor), não no tempo
+            eh_diferenca = np.char.startswith(df[col].to_numpy(dtype=str, na_value=""), "+")
+            df[diferencas[col]] = ms.where(eh_diferenca)
+            ms = ms.where(~eh_diferenca)
+        df[f"{col}_ms"] = ms
+
+    return df
@@ -0,0 +1,219 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import warnings
+from glob import glob
+import pandas as pd
+from utils.consultas import consultar_visao
+from utils.data_frames import caminho_colunar, caminho_tabela, versao_tabela
+from utils.esquema import VERSAO_ESQUEMA, aplicar_esquema, dtypes_leitura, tabela_vazia
+from utils.get_info import RENOMEAR_TEMPO_VOLTA, get_info_corrida
+
+# Linhas lidas por vez do CSV de voltas (o arquivo inteiro nunca fica na memória)
+TAMANHO_BLOCO = 200_000
+
+_TRAVA_PARTICOES = threading.Lock()
+
+
+# ------------------------------
+# Partições por temporada (Parquet)
+# ------------------------------
+def caminho_voltas() -> str:
+    """Função para conseguir a pasta com as voltas particionadas por temporada"""
+    return os.path.join(caminho_colunar(), "lap_times")
+
+
+def caminho_temporada(ano: int) -> str:
+    """Função para conseguir o arquivo de voltas de uma temporada"""
+    return os.path.join(caminho_voltas(), f"ano={ano}.parquet")
+
+
+def _arquivo_versao() -> str:
+    """Função para conseguir o arquivo com a versão do CSV que gerou as partições"""
+    return os.path.join(caminho_voltas(), "versao.json")
+
+
+def particoes_em_dia() -> bool:
+    """Função para saber se as partições foram geradas do CSV atual e com o esquema atual"""
+    versao = versao_tabela('lap_times')
+    try:
+        with open(_arquivo_versao(), encoding="utf-8") as f:
+            return versao is not None and json.load(f) == [*versao, VERSAO_ESQUEMA]
+    except (OSError, ValueError):
+        return False
+
+
+def anos_das_corridas() -> pd.Series:
+    """Função para conseguir a temporada de cada raceId"""
+    return get_info_corrida().set_index('raceId')['ano']
+
+
+def particionar_voltas(tamanho_bloco: int = TAMANHO_BLOCO) -> dict:
+    """Função para ler o CSV de voltas em blocos e gravar um Parquet por temporada"""
+    # Import aqui: só quem gera as partições precisa do pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    versao = versao_tabela('lap_times')
+    if versao is None:
+        raise KeyError('lap_times')
+
+    # Gera em uma pasta temporária e troca no fim (leitores nunca veem partições pela metade)
+    pasta = caminho_voltas()
+    temporaria = f"{pasta}.{os.getpid()}.tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+
+    anos = anos_das_corridas()
+    escritores, linhas = {}, {}
+    sem_corrida = {}
+    esquema = None
+
+    blocos = pd.read_csv(caminho_tabela('lap_times'), sep=',', na_values="\\N", dtype=dtypes_leitura('lap_times'), chunksize=tamanho_bloco)
+    for bloco in blocos:
+        bloco = aplicar_esquema(bloco, 'lap_times')
+
+        # Mesmo esquema Arrow em todos os blocos (Int16 anulável e int16 viram o mesmo tipo)
+        tabela = pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False)
+        esquema = esquema or tabela.schema
+
+        # Voltas de corridas que não estão em races.csv não têm temporada (o groupby as deixaria de fora)
+        anos_bloco = bloco['raceId'].map(anos)
+        for race_id, quantidade in bloco.loc[anos_bloco.isna(), 'raceId'].value_counts().items():
+            sem_corrida[int(race_id)] = sem_corrida.get(int(race_id), 0) + int(quantidade)
+
+        # Cada bloco vira um grupo de linhas no arquivo de cada temporada presente nele
+        for ano, indices in bloco.groupby(anos_bloco, sort=False).indices.items():
+            if ano not in escritores:
+                escritores[ano] = pq.ParquetWriter(os.path.join(temporaria, f"ano={int(ano)}.parquet"), esquema)
+            escritores[ano].write_table(tabela.take(indices))
+            linhas[int(ano)] = linhas.get(int(ano), 0) + len(indices)
+
+    for escritor in escritores.values():
+        escritor.close()
+
+    if sem_corrida:
+        warnings.warn(
+            f"{sum(sem_corrida.values())} voltas ficaram fora das partições: raceId sem corrida em races.csv "
+            f"({', '.join(map(str, sorted(sem_corrida)))})"
+        )
+
+    with open(os.path.join(temporaria, "versao.json"), "w", encoding="utf-8") as f:
+        json.dump([*versao, VERSAO_ESQUEMA], f)
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(temporaria, pasta)
+
+    return linhas
+
+
+def garantir_particoes() -> bool:
+    """Função para (re)gerar as partições quando o CSV mudou (False se não for possível)"""
+    with _TRAVA_PARTICOES:
+        if particoes_em_dia():
+            return True
+        if versao_tabela('lap_times') is None:
+            return False
+
+        try:
+            particionar_voltas()
+        except ImportError:
+            # Sem pyarrow: as consultas vão para o banco do utils.consultas
+            return False
+
+    return True
+
+
+# ------------------------------
+# Leitura (só o pedaço necessário)
+# ------------------------------
+def _formatar(df: pd.DataFrame) -> pd.DataFrame:
+    """Função para deixar as voltas com os nomes de coluna do get_lap_time"""
+    return aplicar_esquema(df, 'lap_times').rename(columns=RENOMEAR_TEMPO_VOLTA)
+
+
+def voltas_corrida(race_id: int, pilotos: list = None) -> pd.DataFrame:
+    """Função para conseguir as voltas de uma corrida (opcionalmente de alguns pilotos)"""
+    ano = anos_das_corridas().get(race_id)
+    if ano is None or versao_tabela('lap_times') is None:
+        return _formatar(tabela_vazia('lap_times'))
+
+    if not garantir_particoes():
+        # Sem partições (sem pyarrow): consulta indexada no banco do utils.consultas
+        filtros = {'raceId': race_id}
+        if pilotos is not None:
+            filtros['driverId'] = list(pilotos)
+        return consultar_visao('get_lap_time', filtros=filtros, ordem=['driverId', 'lap'])
+
+    arquivo = caminho_temporada(ano)
+    if not os.path.exists(arquivo):
+        return _formatar(tabela_vazia('lap_times'))
+
+    # Filtro empurrado para o Parquet: só os grupos de linhas com essa corrida são lidos
+    filtros = [('raceId', '==', race_id)]
+    if pilotos is not None:
+        filtros.append(('driverId', 'in', list(pilotos)))
+    df = pd.read_parquet(arquivo, filters=filtros)
+
+    return _formatar(df.sort_values(['driverId', 'lap'], ignore_index=True))
+
+
+def voltas_temporada(ano: int) -> pd.DataFrame:
+    """Função para conseguir todas as voltas de uma temporada"""
+    if versao_tabela('lap_times') is None:
+        return _formatar(tabela_vazia('lap_times'))
+
+    if not garantir_particoes():
+        anos = anos_das_corridas()
+        corridas = anos.index[anos == ano].tolist()
+        return consultar_visao('get_lap_time', filtros={'raceId': corridas}, ordem=['raceId', 'driverId', 'lap'])
+
+    if not os.path.exists(caminho_temporada(ano)):
+        return _formatar(tabela_vazia('lap_times'))
+
+    return _formatar(pd.read_parquet(caminho_temporada(ano)))
+
+
+def ler_voltas(colunas: list = None) -> pd.DataFrame:
+    """Função para conseguir as voltas de todas as temporadas, lendo só as colunas pedidas"""
+    vazia = _formatar(tabela_vazia('lap_times'))
+    if versao_tabela('lap_times') is None:
+        return vazia if colunas is None else vazia[colunas]
+
+    if not garantir_particoes():
+        return consultar_visao('get_lap_time', colunas)
+
+    # As colunas pedidas usam os nomes do get_lap_time; no Parquet estão com os nomes do CSV
+    crus = {novo: cru for cru, novo in RENOMEAR_TEMPO_VOLTA.items()}
+    colunas_crus = None if colunas is None else [crus.get(col, col) for col in colunas]
+
+    partes = [pd.read_parquet(arquivo, columns=colunas_crus) for arquivo in sorted(glob(os.path.join(caminho_voltas(), "ano=*.parquet")))]
+    if not partes:
+        return vazia if colunas is None else vazia[colunas]
+
+    return _formatar(pd.concat(partes, ignore_index=True))
+
+
+def temporadas_com_voltas() -> list:
+    """Função para conseguir as temporadas que têm voltas registradas"""
+    if not garantir_particoes():
+        return []
+
+    arquivos = glob(os.path.join(caminho_voltas(), "ano=*.parquet"))
+    return sorted(int(os.path.basename(f)[4:-8]) for f in arquivos)
+
+
+if __name__ == "__main__":
+    # Uso: python -m utils.voltas [raceId]
+    inicio = time.perf_counter()
+    linhas = particionar_voltas()
+    print(f"{sum(linhas.values())} voltas em {len(linhas)} temporadas ({time.perf_counter() - inicio:.2f}s)")
+
+    if len(sys.argv) > 1:
+        inicio = time.perf_counter()
+        df = voltas_corrida(int(sys.argv[1]))
+        print(df.head(10).to_string())
+        print(f"{len(df)} voltas da corrida em {time.perf_counter() - inicio:.3f}s")